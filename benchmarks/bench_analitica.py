@@ -0,0 +1,87 @@
+"""
+================================================================================
+BENCHMARK: ANALÍTICA CON PANDAS VS. BUCLE SOBRE OBJETOS ORM
+================================================================================
+Compara utils.analitica.resumen() con el cálculo equivalente recorriendo
+objetos Venta/Compra en Python (como hacían generar_reporte_ventas y
+venta_view.list): ingresos por producto, categoría, día y vendedor, top 10
+de productos y percentiles del tiempo de aprobación.
+
+Verifica además que los dos métodos den los mismos ingresos por categoría.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_analitica --ventas 1000000 --compras 100000
+    python -m benchmarks.bench_analitica --ventas 100000 --memoria
+================================================================================
+"""
+
+import argparse
+import statistics
+from collections import defaultdict
+
+from benchmarks import comun
+
+
+def bucle_orm():
+    """Cálculo de referencia: objetos ORM y acumuladores en Python"""
+    from models.compra_model import Compra
+    from models.venta_model import Venta
+
+    ventas = Venta.query.all()
+    por_producto, por_categoria = defaultdict(float), defaultdict(float)
+    por_dia, por_vendedor = defaultdict(float), defaultdict(float)
+    for venta in ventas:
+        por_producto[venta.producto.nombre] += venta.total
+        por_categoria[venta.producto.categoria or 'sin categoría'] += venta.total
+        por_dia[venta.fecha.date()] += venta.total
+        por_vendedor[venta.vendedor_id] += venta.total
+    top = sorted(por_producto.items(), key=lambda item: item[1], reverse=True)[:10]
+
+    horas = defaultdict(list)
+    for compra in Compra.query.filter(Compra.fecha_aprobacion.is_not(None)).all():
+        horas[compra.estado].append((compra.fecha_aprobacion - compra.fecha).total_seconds() / 3600)
+    latencia = {estado: statistics.quantiles(valores, n=100)[89] for estado, valores in horas.items()}
+
+    return {'ingresos': sum(venta.total for venta in ventas), 'por_categoria': dict(por_categoria),
+            'top': top, 'por_dia': len(por_dia), 'por_vendedor': len(por_vendedor), 'p90': latencia}
+
+
+def con_pandas():
+    from utils import analitica
+    return analitica.resumen()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ventas', type=int, default=1_000_000)
+    parser.add_argument('--compras', type=int, default=100_000)
+    parser.add_argument('--memoria', action='store_true', help='Medir además el pico de memoria (tracemalloc)')
+    args = parser.parse_args()
+
+    app = comun.preparar_app('bench_analitica')
+    with app.app_context():
+        print(f'Generando {args.ventas:,} ventas y {args.compras:,} compras...')
+        catalogo = comun.sembrar_catalogo()
+        comun.sembrar_ventas(args.ventas, catalogo)
+        comun.sembrar_compras(args.compras, catalogo)
+
+    resultados = {}
+    for nombre, funcion in (('Bucle ORM', bucle_orm), ('pandas (utils.analitica)', con_pandas)):
+        with app.app_context():
+            resultados[nombre], duracion, _ = comun.medir(funcion)
+        comun.imprimir_fila(nombre, duracion)
+        if args.memoria:
+            with app.app_context():
+                _, duracion, pico = comun.medir(funcion, memoria=True)
+            comun.imprimir_fila(f'{nombre} (con tracemalloc)', duracion, pico)
+
+    orm, vectorial = resultados['Bucle ORM'], resultados['pandas (utils.analitica)']
+    categorias_pandas = {clave: ingresos for clave, _, _, ingresos in vectorial['por_categoria']}
+    diferencia = max(abs(orm['por_categoria'][clave] - categorias_pandas.get(clave, 0))
+                     for clave in orm['por_categoria'])
+    print(f'Diferencia máxima de ingresos por categoría: {diferencia:.6f}')
+    print(f'Top 1: ORM {orm["top"][0][0]} / pandas {vectorial["por_producto"][0][0]}')
+
+
+if __name__ == '__main__':
+    main()
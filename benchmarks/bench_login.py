@@ -0,0 +1,72 @@
+"""
+================================================================================
+BENCHMARK: LATENCIA DE /login SEGÚN LA CANTIDAD DE CUENTAS
+================================================================================
+Mide, a medida que la tabla de usuarios crece de 100 a 1.000.000 de filas:
+
+- la búsqueda indexada Usuario.get_by_username (lower(username))
+- el POST /login completo (búsqueda + verificación scrypt + sesión)
+
+La latencia debe mantenerse plana: la búsqueda no depende del tamaño de la
+tabla y el costo del hash es fijo. Las cuentas de relleno comparten un hash
+precalculado (generar un scrypt por fila llevaría horas).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_login
+    python -m benchmarks.bench_login --tamanos 100 10000 --repeticiones 20
+================================================================================
+"""
+
+import argparse
+
+from benchmarks import comun
+
+CLAVE = 'clave-benchmark'
+
+
+def agregar_usuarios(desde, hasta, hash_guardado):
+    from models.usuario_model import Usuario
+
+    comun.insertar_por_lotes(Usuario, (
+        {'nombre': f'Usuario {numero}', 'username': f'usuario{numero}', 'password': hash_guardado, 'rol': 'cliente'}
+        for numero in range(desde, hasta)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[100, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeticiones', type=int, default=30)
+    args = parser.parse_args()
+
+    app = comun.preparar_app('bench_login')
+    from models.usuario_model import Usuario
+    from utils.seguridad import hash_password
+
+    hash_guardado = hash_password(CLAVE)
+    cliente = app.test_client()
+    actuales = 0
+
+    print(f'{"cuentas":>10} {"búsqueda p50":>13} {"p95":>8} {"login p50":>11} {"p95":>8}   (ms)')
+    for tamano in sorted(args.tamanos):
+        with app.app_context():
+            agregar_usuarios(actuales, tamano, hash_guardado)
+        actuales = tamano
+        buscado = f'USUARIO{tamano // 2}'  # Sin distinguir mayúsculas, a mitad de la tabla
+
+        with app.app_context():
+            busqueda = comun.cronometrar(lambda: Usuario.get_by_username(buscado), args.repeticiones)
+
+        def login():
+            respuesta = cliente.post('/login', data={'username': buscado, 'password': CLAVE,
+                                                     'tipo_usuario': 'usuario'})
+            assert respuesta.status_code == 302, 'El login de prueba falló'
+            with cliente.session_transaction() as sesion:
+                sesion.clear()
+
+        inicio_sesion = comun.cronometrar(login, args.repeticiones)
+        print(f'{tamano:>10,} {busqueda[0]:>13.3f} {busqueda[1]:>8.3f} {inicio_sesion[0]:>11.2f} {inicio_sesion[1]:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+================================================================================
+BENCHMARK: LATENCIA POR FACTURA CON RECURSOS PDF COMPARTIDOS
+================================================================================
+Mide generar_factura_compra() factura por factura en dos modos:
+
+- compartidos: el registro RecursosPDF (hoja de estilos, TableStyle, anchos
+  y logo ya decodificado) se crea una vez y se reutiliza, como en producción
+- en frío: el registro se descarta antes de cada factura, que vuelve a
+  construir estilos y a leer y decodificar el logo (el costo que tenía cada
+  generación antes de compartirlos)
+
+Informa mediana y p95 en milisegundos por factura. Las facturas salen de
+compras distintas para que no influya la caché de facturas en disco (no se
+usa: se llama directamente al generador).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_pdf_recursos
+    python -m benchmarks.bench_pdf_recursos --facturas 500
+================================================================================
+"""
+
+import argparse
+import itertools
+
+from benchmarks import comun
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--facturas', type=int, default=200, help='Facturas generadas en cada modo')
+    args = parser.parse_args()
+
+    app = comun.preparar_app('bench_pdf_recursos')
+    from models.compra_model import Compra
+    from utils import pdf_generator
+
+    with app.app_context():
+        catalogo = comun.sembrar_catalogo()
+        comun.sembrar_compras(args.facturas, catalogo)
+
+        compras = itertools.cycle(Compra.get_all())
+
+        def factura():
+            pdf_generator.generar_factura_compra(next(compras))
+
+        def factura_en_frio():
+            pdf_generator._recursos = None
+            factura()
+
+        factura()  # Calentar imports y cachés de reportlab (fuentes) en ambos modos
+        print(f'{"modo":<15} {"p50":>9} {"p95":>9}   (ms por factura, {args.facturas} facturas)')
+        for nombre, funcion in (('en frío', factura_en_frio), ('compartidos', factura)):
+            mediana, p95 = comun.cronometrar(funcion, args.facturas)
+            print(f'{nombre:<15} {mediana:>9.2f} {p95:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+================================================================================
+BENCHMARK: REPORTE DE VENTAS EN PDF (STREAMING VS. LISTA DE OBJETOS ORM)
+================================================================================
+Genera el reporte de ventas como lo hace el trabajo 'reporte_ventas'
+(generar_reporte_ventas_stream con filas leídas por lotes, totales desde
+el resumen diario y agrupados de utils.analitica) y, hasta --legado-hasta
+ventas, como lo hacía antes generar_reporte_ventas(Venta.get_all()). El
+método anterior arma una sola tabla con todas las filas y su tiempo crece
+más rápido que la cantidad de ventas, por eso se omite en los tamaños
+grandes.
+
+Por cada tamaño informa duración, tamaño del PDF y, con --memoria, el pico
+de memoria de Python (tracemalloc, en una ejecución aparte y unas diez
+veces más lenta). Con streaming el pico solo crece con lo que reportlab
+retiene de las páginas ya comprimidas, no con los objetos de las ventas.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_reporte_ventas
+    python -m benchmarks.bench_reporte_ventas --ventas 10000 100000 --memoria
+================================================================================
+"""
+
+import argparse
+import tempfile
+
+from benchmarks import comun
+
+
+def con_streaming():
+    from models.venta_model import Venta
+    from utils import analitica
+    from utils.pdf_generator import generar_reporte_ventas_stream
+
+    agrupados = analitica.resumen(secciones=('categoria', 'producto'))
+    with tempfile.TemporaryFile() as destino:
+        generar_reporte_ventas_stream(Venta.iter_filas_reporte(), Venta.stats(), destino, agrupados=agrupados)
+        destino.seek(0, 2)
+        return destino.tell()
+
+
+def legado():
+    from models.venta_model import Venta
+    from utils.pdf_generator import generar_reporte_ventas
+
+    return len(generar_reporte_ventas(Venta.get_all()).getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ventas', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--legado-hasta', type=int, default=20_000,
+                        help='Medir el método anterior solo hasta esta cantidad de ventas')
+    parser.add_argument('--memoria', action='store_true', help='Medir además el pico de memoria (tracemalloc)')
+    args = parser.parse_args()
+
+    app = comun.preparar_app('bench_reporte_ventas')
+    from database import db, transaccion
+    from models.venta_model import Venta
+
+    with app.app_context():
+        catalogo = comun.sembrar_catalogo()
+
+    for cantidad in sorted(args.ventas):
+        # Cada tamaño parte de una tabla vacía con la misma semilla
+        with app.app_context():
+            with transaccion():
+                db.session.execute(db.delete(Venta))
+            print(f'\nGenerando {cantidad:,} ventas...')
+            comun.sembrar_ventas(cantidad, catalogo)
+
+        metodos = [('Streaming', con_streaming)]
+        if cantidad <= args.legado_hasta:
+            metodos.append(('Lista ORM (anterior)', legado))
+
+        for nombre, funcion in metodos:
+            with app.app_context():
+                tamano, duracion, _ = comun.medir(funcion)
+            comun.imprimir_fila(f'{nombre} [{tamano / 2**20:.1f} MiB]', duracion)
+            if args.memoria:
+                with app.app_context():
+                    _, duracion, pico = comun.medir(funcion, memoria=True)
+                comun.imprimir_fila(f'{nombre} (con tracemalloc)', duracion, pico)
+
+
+if __name__ == '__main__':
+    main()
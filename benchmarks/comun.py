@@ -0,0 +1,213 @@
+"""
+================================================================================
+UTILIDADES COMPARTIDAS POR LOS BENCHMARKS
+================================================================================
+Cada benchmark trabaja sobre una base SQLite temporal (nunca sobre
+instance/ventasmuebleria.db) que se crea con el esquema y las migraciones
+actuales y se llena con datos sintéticos reproducibles (semilla fija).
+
+Ejecutar desde la raíz del proyecto, por ejemplo:
+    python -m benchmarks.bench_analitica --ventas 1000000
+================================================================================
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+SEMILLA = 42
+LOTE_INSERCION = 50_000
+INICIO_DATOS = datetime(2025, 1, 1)
+
+
+# ============================================================================
+# APLICACIÓN SOBRE UNA BASE TEMPORAL
+# ============================================================================
+
+def preparar_app(nombre='benchmark'):
+    """
+    Importar la aplicación apuntando a una base SQLite nueva
+
+    Debe llamarse antes de cualquier import de app/modelos: la URI se lee
+    de DATABASE_URL al importar app.py.
+
+    Returns:
+        Flask: Aplicación con las tablas creadas y migradas
+    """
+    directorio = tempfile.mkdtemp(prefix=f'{nombre}_')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(directorio, 'datos.db')
+
+    from app import app
+    from database import db
+    import migraciones
+
+    with app.app_context():
+        db.create_all()
+        migraciones.migrar()
+    return app
+
+
+# ============================================================================
+# DATOS SINTÉTICOS
+# ============================================================================
+
+def insertar_por_lotes(modelo, filas):
+    """Insertar diccionarios en bloques de LOTE_INSERCION filas (sin objetos ORM)"""
+    from database import db, transaccion
+
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) == LOTE_INSERCION:
+            with transaccion():
+                db.session.execute(db.insert(modelo), lote)
+            lote = []
+    if lote:
+        with transaccion():
+            db.session.execute(db.insert(modelo), lote)
+
+
+def sembrar_catalogo(productos=200, vendedores=5, categorias=12):
+    """
+    Crear productos, administradores (vendedores), un usuario y un proveedor
+
+    Returns:
+        dict: 'productos' (lista de (id, precio)), 'vendedores' (ids),
+              'usuario_id', 'proveedor_id'
+    """
+    from database import transaccion
+    from models.administrador_model import Administrador
+    from models.producto_model import Producto
+    from models.proveedor_model import Proveedor
+    from models.usuario_model import Usuario
+
+    azar = random.Random(SEMILLA)
+    with transaccion():
+        lista_productos = []
+        for numero in range(productos):
+            producto = Producto(f'Mueble {numero}', 'Producto de prueba', round(azar.uniform(50, 2000), 2),
+                                stock=1_000_000, categoria=f'categoria {numero % categorias}')
+            producto.save()
+            lista_productos.append((producto.id, producto.precio))
+        admins = []
+        for numero in range(vendedores):
+            admin = Administrador(f'Vendedor {numero}', f'vendedor{numero}@benchmark.local', 'clave-benchmark')
+            admin.save()
+            admins.append(admin.id)
+        usuario = Usuario('Comprador', 'comprador_benchmark', 'clave-benchmark', 'cliente')
+        usuario.save()
+        proveedor = Proveedor('Proveedor de prueba')
+        proveedor.save()
+    return {'productos': lista_productos, 'vendedores': admins,
+            'usuario_id': usuario.id, 'proveedor_id': proveedor.id}
+
+
+def sembrar_ventas(cantidad, catalogo, dias=365):
+    """
+    Insertar ventas sintéticas en bloque y reconstruir el resumen diario
+
+    Args:
+        cantidad (int): Número de ventas
+        catalogo (dict): Resultado de sembrar_catalogo()
+        dias (int): Las fechas se reparten en este número de días
+    """
+    from database import transaccion
+    from models.venta_model import Venta
+    from models.venta_resumen_model import VentaResumenDiario
+
+    azar = random.Random(SEMILLA)
+    productos, vendedores = catalogo['productos'], catalogo['vendedores'] + [None]
+
+    def filas():
+        for numero in range(cantidad):
+            producto_id, precio = azar.choice(productos)
+            unidades = azar.randint(1, 5)
+            fecha = INICIO_DATOS + timedelta(seconds=azar.randrange(dias * 86400))
+            yield {
+                'fecha': fecha, 'updated_at': fecha, 'cliente': f'Cliente {numero % 5000}',
+                'producto_id': producto_id, 'cantidad': unidades, 'precio_unitario': precio,
+                'total': unidades * precio, 'vendedor_id': azar.choice(vendedores),
+                'tipo_venta': 'directa' if azar.random() < 0.7 else 'por_compra',
+            }
+
+    insertar_por_lotes(Venta, filas())
+    with transaccion():
+        VentaResumenDiario.reconstruir()
+
+
+def sembrar_compras(cantidad, catalogo, dias=365):
+    """Insertar compras sintéticas (pendientes, aprobadas y rechazadas) en bloque"""
+    from models.compra_model import Compra
+
+    azar = random.Random(SEMILLA + 1)
+    productos = catalogo['productos']
+
+    def filas():
+        for _ in range(cantidad):
+            producto_id, precio = azar.choice(productos)
+            unidades = azar.randint(1, 5)
+            fecha = INICIO_DATOS + timedelta(seconds=azar.randrange(dias * 86400))
+            estado = azar.choices(['pendiente', 'aprobada', 'rechazada'], weights=[2, 7, 1])[0]
+            procesada = estado != 'pendiente'
+            yield {
+                'fecha': fecha, 'updated_at': fecha, 'usuario_id': catalogo['usuario_id'],
+                'proveedor_id': catalogo['proveedor_id'], 'producto_id': producto_id,
+                'cantidad': unidades, 'precio_unitario': precio, 'total': unidades * precio,
+                'estado': estado,
+                'aprobado_por': catalogo['vendedores'][0] if procesada else None,
+                'fecha_aprobacion': fecha + timedelta(hours=azar.expovariate(1 / 20)) if procesada else None,
+            }
+
+    insertar_por_lotes(Compra, filas())
+
+
+# ============================================================================
+# MEDICIÓN
+# ============================================================================
+
+def medir(funcion, memoria=False):
+    """
+    Ejecutar una función midiendo su duración y, opcionalmente, su pico de memoria
+
+    tracemalloc hace más lento el código Python, por eso la memoria se mide
+    solo si se pide (en una ejecución aparte de la que se cronometra).
+
+    Returns:
+        tuple: (resultado, segundos, pico en bytes o None)
+    """
+    if memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    try:
+        resultado = funcion()
+        duracion = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1] if memoria else None
+    finally:
+        if memoria:
+            tracemalloc.stop()
+    return resultado, duracion, pico
+
+
+def cronometrar(funcion, repeticiones):
+    """
+    Ejecutar una función varias veces
+
+    Returns:
+        tuple: (mediana, p95) en milisegundos
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return statistics.median(tiempos), tiempos[max(int(len(tiempos) * 0.95) - 1, 0)]
+
+
+def imprimir_fila(nombre, duracion, pico=None):
+    memoria = f'  pico {pico / 2**20:8.1f} MiB' if pico is not None else ''
+    print(f'{nombre:<45} {duracion:9.3f} s{memoria}')
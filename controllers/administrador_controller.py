@@ -1,12 +1,14 @@
 from flask import request, redirect, url_for, Blueprint, session, flash
 from models.administrador_model import Administrador
 from views import administrador_view
+from database import transaccion, solo_lectura
 from decorators import login_required, admin_required, super_admin_required
 
 administrador_bp = Blueprint('administrador', __name__, url_prefix="/administradores")
 
 @administrador_bp.route("/")
 @admin_required
+@solo_lectura
 def index():
     administradores = Administrador.get_all()
     return administrador_view.list(administradores)
@@ -21,14 +23,13 @@ def create():
         telefono = request.form['telefono']
         
         # Verificar si el email ya existe
-        administradores = Administrador.get_all()
-        for admin in administradores:
-            if admin.email == email:
-                flash('El email ya está registrado', 'error')
-                return administrador_view.create()
+        if Administrador.get_by_email(email):
+            flash('El email ya está registrado', 'error')
+            return administrador_view.create()
 
         administrador = Administrador(nombre, email, password, telefono, super_admin=False)
-        administrador.save()
+        with transaccion():
+            administrador.save()
         flash('Administrador creado exitosamente', 'success')
         return redirect(url_for('administrador.index'))
 
@@ -55,9 +56,11 @@ def edit(id):
         # Solo el super admin puede cambiar el estado de super admin
         if session.get('super_admin', False) and 'super_admin' in request.form:
             super_admin = request.form.get('super_admin') == 'on'
-            administrador.update(nombre=nombre, email=email, telefono=telefono, super_admin=super_admin)
+            with transaccion():
+                administrador.update(nombre=nombre, email=email, telefono=telefono, super_admin=super_admin)
         else:
-            administrador.update(nombre=nombre, email=email, telefono=telefono)
+            with transaccion():
+                administrador.update(nombre=nombre, email=email, telefono=telefono)
         
         flash('Administrador actualizado exitosamente', 'success')
         return redirect(url_for('administrador.index'))
@@ -77,6 +80,7 @@ def delete(id):
         flash('No se puede eliminar al Super Administrador', 'error')
         return redirect(url_for('administrador.index'))
     
-    administrador.delete()
+    with transaccion():
+        administrador.delete()
     flash('Administrador eliminado exitosamente', 'success')
     return redirect(url_for('administrador.index'))
@@ -1,12 +1,17 @@
-from flask import request, redirect, url_for, Blueprint, session, flash, send_file, render_template
-from models.compra_model import Compra
+from flask import request, redirect, url_for, Blueprint, session, flash, render_template, send_file, Response, stream_with_context
+from datetime import timedelta
+from models.compra_model import Compra, CompraYaProcesadaError, COLUMNAS_EXPORTACION, ESTADOS
 from models.venta_model import Venta
 from models.proveedor_model import Proveedor
 from models.producto_model import Producto
 from models.usuario_model import Usuario
+from models.movimiento_stock_model import StockInsuficienteError
+from database import transaccion, con_reintentos, solo_lectura
 from views import compra_view
 from decorators import login_required, user_only_required, admin_required
-from utils.pdf_generator import generar_factura_compra
+from utils import trabajos, cache_facturas, facturas_lote, exportacion
+from utils.paginacion import parametros_pagina
+from utils.condicional import condicional, marca_agua
 
 # Crear blueprint para las rutas de compras
 compra_bp = Blueprint('compra', __name__, url_prefix="/compras")
@@ -15,19 +20,24 @@ compra_bp = Blueprint('compra', __name__, url_prefix="/compras")
 
 @compra_bp.route("/")
 @login_required
+@solo_lectura
+@condicional(lambda: marca_agua(Compra) + marca_agua(Producto))
 def index():
+    cursor, por_pagina = parametros_pagina(request.args)
     if session.get('tipo') == 'usuario':
         # Los usuarios solo ven sus propias compras
-        compras = Compra.get_by_usuario(session.get('user_id'))
+        pagina = Compra.get_pagina(cursor, por_pagina, usuario_id=session.get('user_id'))
+        conteo = Compra.count_by_estado(usuario_id=session.get('user_id'))
     else:
         # Los administradores ven todas las compras
-        compras = Compra.get_all()
-    return compra_view.list(compras)
+        pagina = Compra.get_pagina(cursor, por_pagina)
+        conteo = Compra.count_by_estado()
+    return compra_view.list(pagina, conteo)
 
 @compra_bp.route("/pendientes")
 @admin_required
 def pendientes():
-    compras_pendientes = Compra.get_pendientes()
+    compras_pendientes = Compra.get_pendientes(carga='joined')
     return compra_view.pendientes(compras_pendientes)
 
 # CREACIÓN DE SOLICITUDES DE COMPRa
@@ -45,7 +55,8 @@ def create():
 
         # Crear nueva compra con estado 'pendiente'
         compra = Compra(session.get('user_id'), proveedor_id, producto_id, cantidad, precio_unitario)
-        compra.save()
+        with transaccion():
+            compra.save()
         
         flash('Solicitud de compra enviada exitosamente. Esperando aprobación del administrador.', 'success')
         return render_template('compras/success.html', compra_id=compra.id)
@@ -72,30 +83,22 @@ def aprobar(id):
     
     comentarios = request.form.get('comentarios', '')
     
-    # Aprobar la compra
-    compra.update(estado='aprobada', aprobado_por=session.get('user_id'), comentarios=comentarios)
+    # APROBACIÓN + VENTA + STOCK EN UN SOLO COMMIT
     
-    # CREACIÓN AUTOMÁTICA DE VENTA
+    def aprobar_compra():
+        with transaccion():
+            return compra.aprobar(session.get('user_id'), comentarios)
     
     try:
-        cliente_nombre = compra.usuario.nombre if compra.usuario else 'Cliente Desconocido'
-        
-        # Crear venta relacionada con la compra aprobada
-        nueva_venta = Venta(
-            cliente=cliente_nombre,
-            producto_id=compra.producto_id,
-            cantidad=compra.cantidad,
-            precio_unitario=compra.precio_unitario,
-            compra_id=compra.id,                    # Relación con la compra
-            vendedor_id=session.get('user_id'),
-            tipo_venta='por_compra'
-        )
-        nueva_venta.save()
-        
-        flash(f'Compra aprobada exitosamente. Se ha generado automáticamente la venta #{nueva_venta.id}', 'success')
-    except Exception as e:
-        flash('Compra aprobada, pero hubo un error al crear la venta automática', 'warning')
+        nueva_venta = con_reintentos(aprobar_compra)
+    except CompraYaProcesadaError:
+        flash('Esta compra ya fue procesada', 'warning')
+        return redirect(url_for('compra.pendientes'))
+    except StockInsuficienteError:
+        flash('No hay stock suficiente para aprobar esta compra', 'error')
+        return redirect(url_for('compra.pendientes'))
     
+    flash(f'Compra aprobada exitosamente. Se ha generado automáticamente la venta #{nueva_venta.id}', 'success')
     return redirect(url_for('compra.pendientes'))
 
 @compra_bp.route("/rechazar/<int:id>", methods=['POST'])
@@ -112,10 +115,54 @@ def rechazar(id):
         return redirect(url_for('compra.pendientes'))
     
     comentarios = request.form.get('comentarios', 'Compra rechazada por el administrador')
-    compra.update(estado='rechazada', aprobado_por=session.get('user_id'), comentarios=comentarios)
+    try:
+        with transaccion():
+            compra.rechazar(session.get('user_id'), comentarios)
+    except CompraYaProcesadaError:
+        flash('Esta compra ya fue procesada', 'warning')
+        return redirect(url_for('compra.pendientes'))
     flash('Compra rechazada', 'warning')
     return redirect(url_for('compra.pendientes'))
 
+# Máximo de compras por envío del formulario de procesamiento en lote
+MAX_LOTE = 500
+
+@compra_bp.route("/procesar-lote", methods=['POST'])
+@admin_required
+def procesar_lote():
+    """
+    Aprobar o rechazar varias compras pendientes con un solo envío
+    
+    Form:
+        ids: IDs de las compras seleccionadas (campo repetido)
+        accion: 'aprobar' o 'rechazar'
+        comentarios: Comentarios comunes a todas (opcional)
+    """
+    accion = request.form.get('accion')
+    ids = [int(i) for i in request.form.getlist('ids') if i.isdigit()]
+    comentarios = request.form.get('comentarios', '').strip() or None
+    
+    if accion not in ('aprobar', 'rechazar'):
+        flash('Acción no válida', 'error')
+        return redirect(url_for('compra.pendientes'))
+    if not ids:
+        flash('Selecciona al menos una compra', 'warning')
+        return redirect(url_for('compra.pendientes'))
+    if len(ids) > MAX_LOTE:
+        flash(f'Se pueden procesar como máximo {MAX_LOTE} compras a la vez', 'warning')
+        return redirect(url_for('compra.pendientes'))
+    if accion == 'rechazar' and not comentarios:
+        comentarios = 'Compra rechazada por el administrador'
+    
+    # TODAS LAS COMPRAS, VENTAS Y STOCK EN UN SOLO COMMIT
+    
+    def procesar():
+        with transaccion():
+            return Compra.procesar_lote(ids, accion, session.get('user_id'), comentarios)
+    
+    resultados = con_reintentos(procesar)
+    return compra_view.resultado_lote(accion, resultados)
+
 # GENERACIÓN DE FACTURAS PDF
 
 @compra_bp.route("/factura/<int:id>")
@@ -137,17 +184,73 @@ def generar_factura(id):
         flash('Solo se pueden generar facturas de compras aprobadas', 'warning')
         return redirect(url_for('compra.index'))
     
-    # Generar PDF usando el generador de reportes
-    pdf_buffer = generar_factura_compra(compra)
     filename = f"factura_compra_{compra.id}.pdf"
     
-    return send_file(
-        pdf_buffer,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='application/pdf'
+    # Si ya fue generada, servirla desde la caché (o 304 si el navegador la tiene)
+    ruta, huella = cache_facturas.obtener(compra)
+    if ruta:
+        return send_file(
+            ruta,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/pdf',
+            etag=huella,
+            last_modified=compra.fecha_aprobacion or compra.fecha,
+            max_age=0
+        )
+    
+    # Generar PDF en segundo plano y mostrar su avance
+    trabajo = trabajos.encolar('factura', {'compra_id': compra.id},
+                               nombre_descarga=filename,
+                               solicitado_por=session.get('user_id'), tipo_solicitante=session.get('tipo'))
+    return redirect(url_for('trabajo.ver', id=trabajo.id))
+
+@compra_bp.route("/facturas/exportar")
+@admin_required
+def exportar_facturas():
+    """Descargar en un ZIP las facturas de las compras aprobadas en un rango de fechas"""
+    try:
+        desde, hasta = exportacion.rango_fechas(request.args)
+    except ValueError:
+        flash('Las fechas deben tener el formato AAAA-MM-DD', 'error')
+        return redirect(url_for('compra.index'))
+
+    compra_ids = Compra.get_ids_facturables(desde, hasta)
+    if not compra_ids:
+        flash('No hay compras aprobadas en el rango seleccionado', 'warning')
+        return redirect(url_for('compra.index'))
+
+    # 'hasta' es exclusivo; el nombre lleva el último día incluido
+    filename = facturas_lote.nombre_archivo(desde, hasta - timedelta(days=1) if hasta else None)
+    return Response(
+        stream_with_context(facturas_lote.generar_zip(compra_ids)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
 
+@compra_bp.route("/exportar")
+@admin_required
+@solo_lectura
+def exportar():
+    """
+    Descargar las compras como CSV (por defecto) o XLSX para contabilidad
+
+    Filtros (query string): desde, hasta (AAAA-MM-DD, incluidos, sobre la
+    fecha de solicitud), estado y formato ('csv' o 'xlsx')
+    """
+    try:
+        desde, hasta = exportacion.rango_fechas(request.args)
+    except ValueError:
+        flash('Las fechas deben tener el formato AAAA-MM-DD', 'error')
+        return redirect(url_for('compra.index'))
+    estado = request.args.get('estado')
+    if estado not in ESTADOS:
+        estado = None
+
+    filas = Compra.filas_exportacion(desde, hasta, estado)
+    return exportacion.respuesta_descarga(request.args.get('formato', 'csv'), 'compras',
+                                          COLUMNAS_EXPORTACION, filas, titulo='Compras')
+
 # EDICIÓN Y ELIMINACIÓN (SOLO USUARIOS, SOLO PENDIENTES)
 
 @compra_bp.route("/edit/<int:id>", methods=['GET', 'POST'])
@@ -176,7 +279,8 @@ def edit(id):
         cantidad = int(request.form['cantidad'])
         precio_unitario = float(request.form['precio_unitario'])
         
-        compra.update(proveedor_id=proveedor_id, producto_id=producto_id, cantidad=cantidad, precio_unitario=precio_unitario)
+        with transaccion():
+            compra.update(proveedor_id=proveedor_id, producto_id=producto_id, cantidad=cantidad, precio_unitario=precio_unitario)
         flash('Compra actualizada exitosamente', 'success')
         return redirect(url_for('compra.index'))
 
@@ -204,6 +308,7 @@ def delete(id):
         flash('Solo se pueden eliminar compras pendientes', 'warning')
         return redirect(url_for('compra.index'))
     
-    compra.delete()
+    with transaccion():
+        compra.delete()
     flash('Compra eliminada exitosamente', 'success')
     return redirect(url_for('compra.index'))
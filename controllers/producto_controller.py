@@ -1,7 +1,13 @@
 from flask import request, redirect, url_for, Blueprint, session, flash
-from models.producto_model import Producto
+from models.producto_model import Producto, COLUMNAS_IMPORTACION
+from models.movimiento_stock_model import StockInsuficienteError
 from views import producto_view
 from decorators import login_required, admin_required
+from utils.paginacion import parametros_pagina, normalizar_cursor
+from utils import imagenes, cache_catalogo, exportacion
+from utils.condicional import condicional, marca_agua
+from database import transaccion, solo_lectura, con_reintentos
+from sqlalchemy.exc import SQLAlchemyError
 import os
 from werkzeug.utils import secure_filename
 
@@ -10,8 +16,8 @@ producto_bp = Blueprint('producto', __name__, url_prefix="/productos")
 
 # CONFIGURACIÓN DE SUBIDA DE ARCHIVOS
 
-UPLOAD_FOLDER = 'static/images/productos'                    # Directorio de imágenes
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}          # Formatos permitidos
+UPLOAD_FOLDER = imagenes.DIRECTORIO_PRODUCTOS               # Directorio de imágenes originales
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}  # Formatos permitidos
 
 def allowed_file(filename):
     """
@@ -37,6 +43,8 @@ def allowed_file(filename):
 
 @producto_bp.route("/")
 @login_required
+@solo_lectura
+@condicional(lambda: marca_agua(Producto))
 def index():
     """
     Mostrar catálogo de productos
@@ -48,8 +56,70 @@ def index():
     Returns:
         Template con lista de productos y opciones según el rol
     """
-    productos = Producto.get_all()
-    return producto_view.list(productos)
+    return producto_view.list(_catalogo())
+
+@producto_bp.route("/categoria/<categoria>")
+@login_required
+@solo_lectura
+@condicional(lambda categoria: marca_agua(Producto))
+def categoria(categoria):
+    """
+    Mostrar los productos de una categoría
+
+    Args:
+        categoria (str): Categoría a listar
+
+    Returns:
+        Template del catálogo filtrado por categoría
+    """
+    return producto_view.list(_catalogo(categoria), categoria=categoria)
+
+def _catalogo(categoria=None):
+    """
+    Grilla del catálogo desde la caché de fragmentos
+
+    La clave incluye el rol (las tarjetas cambian para administradores y
+    usuarios), la categoría y los parámetros de página ya normalizados
+    (cursor válido y por_pagina acotado): otros argumentos de la URL no crean
+    entradas nuevas ni aparecen en los enlaces de paginación. Solo en un
+    fallo de caché se consulta la base de datos y se renderiza la grilla.
+    """
+    cursor, por_pagina = parametros_pagina(request.args)
+    cursor = normalizar_cursor(cursor, [Producto.id])
+
+    def generar():
+        pagina = Producto.get_pagina(cursor, por_pagina, categoria=categoria)
+        return producto_view.catalogo_grid(pagina, categoria=categoria)
+
+    return cache_catalogo.fragmento((session.get('tipo'), categoria, cursor, por_pagina), generar)
+
+@producto_bp.route("/buscar")
+@login_required
+@solo_lectura
+def buscar():
+    """
+    Buscar productos por texto con filtros por categoría, precio y stock
+    
+    Parámetros (query string):
+    - q: Palabras a buscar (se aceptan prefijos y palabras sin tildes)
+    - categoria, precio_min, precio_max, disponibles: Filtros opcionales
+    
+    Returns:
+        Template con resultados ordenados por relevancia y facetas
+    """
+    texto = request.args.get('q', '').strip()
+    filtros = {
+        'categoria': request.args.get('categoria') or None,
+        'precio_min': request.args.get('precio_min', type=float),
+        'precio_max': request.args.get('precio_max', type=float),
+        'solo_disponibles': request.args.get('disponibles') == '1',
+    }
+    if not texto:
+        return redirect(url_for('producto.index'))
+    
+    productos = Producto.buscar(texto, **filtros)
+    facetas = Producto.facetas(texto)
+    return producto_view.buscar(texto, productos, facetas, filtros)
 
 # ============================================================================
 # CREACIÓN DE PRODUCTOS (SOLO ADMINISTRADORES)
@@ -96,6 +166,10 @@ def create():
             
             # Verificar que se seleccionó archivo y es válido
             if file and file.filename != '' and allowed_file(file.filename):
+                if not imagenes.validar_imagen(file):
+                    flash('El archivo no es una imagen válida', 'error')
+                    return producto_view.create()
+
                 # Asegurar nombre de archivo seguro
                 filename = secure_filename(file.filename)
                 
@@ -110,10 +184,14 @@ def create():
                 file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
                 file.save(file_path)
                 imagen_filename = unique_filename
+                
+                # Generar miniaturas y formatos WebP/AVIF fuera de la petición
+                imagenes.encolar_procesamiento(unique_filename)
 
         # Crear nuevo producto con todos los datos
         producto = Producto(nombre, descripcion, precio, stock, categoria, imagen_filename)
-        producto.save()
+        with transaccion():
+            producto.save()
         
         flash('Producto creado exitosamente', 'success')
         return redirect(url_for('producto.index'))
@@ -159,6 +237,10 @@ def edit(id):
         precio = float(request.form['precio'])
         stock = int(request.form['stock'])
         categoria = request.form['categoria']
+
+        if stock < 0:
+            flash('El stock no puede ser negativo', 'error')
+            return producto_view.edit(producto)
         
         # ====================================================================
         # MANEJO DE IMAGEN (OPCIONAL EN EDICIÓN)
@@ -172,6 +254,10 @@ def edit(id):
             
             # Solo procesar si se seleccionó nueva imagen válida
             if file and file.filename != '' and allowed_file(file.filename):
+                if not imagenes.validar_imagen(file):
+                    flash('El archivo no es una imagen válida', 'error')
+                    return producto_view.edit(producto)
+
                 filename = secure_filename(file.filename)
                 
                 # Generar nombre único
@@ -184,18 +270,26 @@ def edit(id):
                 # Guardar nueva imagen
                 file_path = os.path.join(UPLOAD_FOLDER, unique_filename)
                 file.save(file_path)
-                
-                # Eliminar imagen anterior (si no es placeholder)
-                if producto.imagen != 'placeholder.jpg':
-                    old_image_path = os.path.join(UPLOAD_FOLDER, producto.imagen)
-                    if os.path.exists(old_image_path):
-                        os.remove(old_image_path)
+                imagenes.encolar_procesamiento(unique_filename)
                 
                 imagen_filename = unique_filename
         
         # Actualizar producto con nuevos datos
-        producto.update(nombre=nombre, descripcion=descripcion, precio=precio, 
-                       stock=stock, categoria=categoria, imagen=imagen_filename)
+        imagen_anterior = producto.imagen
+        try:
+            with transaccion():
+                producto.update(nombre=nombre, descripcion=descripcion, precio=precio, 
+                               stock=stock, categoria=categoria, imagen=imagen_filename)
+        except StockInsuficienteError:
+            # Una venta concurrente bajó el stock por debajo del ajuste pedido
+            if imagen_filename != imagen_anterior:
+                imagenes.eliminar_imagen(imagen_filename)
+            flash('El stock cambió mientras se editaba el producto; revise el valor e intente de nuevo', 'error')
+            return redirect(url_for('producto.edit', id=id))
+
+        # Eliminar imagen anterior y sus variantes (si se cambió y no es placeholder)
+        if imagen_filename != imagen_anterior and imagen_anterior != 'placeholder.jpg':
+            imagenes.eliminar_imagen(imagen_anterior)
         
         flash('Producto actualizado exitosamente', 'success')
         return redirect(url_for('producto.index'))
@@ -235,13 +329,121 @@ def delete(id):
     # LIMPIEZA DE IMAGEN
     # ========================================================================
     
-    # Eliminar imagen del servidor (excepto placeholder)
-    if producto.imagen != 'placeholder.jpg':
-        image_path = os.path.join(UPLOAD_FOLDER, producto.imagen)
-        if os.path.exists(image_path):
-            os.remove(image_path)
+    # Eliminar imagen y sus variantes del servidor (excepto placeholder)
+    if producto.imagen and producto.imagen != 'placeholder.jpg':
+        imagenes.eliminar_imagen(producto.imagen)
     
     # Eliminar producto de la base de datos
-    producto.delete()
+    with transaccion():
+        producto.delete()
     flash('Producto eliminado exitosamente', 'success')
     return redirect(url_for('producto.index'))
+
+# ============================================================================
+# IMPORTACIÓN Y EXPORTACIÓN MASIVA (SOLO ADMINISTRADORES)
+# ============================================================================
+
+TAMANO_LOTE_IMPORTACION = 2000   # Filas por transacción al importar
+MAX_ERRORES_MOSTRADOS = 100      # Errores de validación listados en el resultado
+IMPORTACION_MAX_BYTES = 100 * 1024 * 1024  # Tamaño máximo del archivo a importar
+
+def _guardar_lote(lote, primera_fila, resultado):
+    """Importar un lote en su propia transacción; si falla, se informa y se sigue"""
+    def guardar():
+        with transaccion():
+            return Producto.importar_lote(list(lote.values()))
+    try:
+        insertados, actualizados = con_reintentos(guardar)
+    except SQLAlchemyError as e:
+        resultado['errores'].append((primera_fila, f'lote no importado: {e.__class__.__name__}'))
+        resultado['omitidas'] += len(lote)
+        return
+    resultado['insertados'] += insertados
+    resultado['actualizados'] += actualizados
+
+def _importar(filas):
+    """
+    Validar las filas y guardarlas en lotes de TAMANO_LOTE_IMPORTACION
+
+    Args:
+        filas (iterable): Diccionarios leídos del archivo (ver utils/exportacion.py)
+
+    Returns:
+        dict: insertados, actualizados, omitidas, errores [(fila, motivo)] e
+              imágenes encoladas / inexistentes
+    """
+    resultado = {'insertados': 0, 'actualizados': 0, 'omitidas': 0, 'errores': []}
+    imagenes_importadas = set()
+    lote, primera_fila = {}, 2
+
+    # La fila 1 del archivo son los encabezados
+    for numero, fila in enumerate(filas, start=2):
+        try:
+            registro = Producto.desde_fila(fila)
+        except ValueError as e:
+            resultado['omitidas'] += 1
+            if len(resultado['errores']) < MAX_ERRORES_MOSTRADOS:
+                resultado['errores'].append((numero, str(e)))
+            continue
+
+        if 'imagen' in registro:
+            imagenes_importadas.add(registro['imagen'])
+        # Un id repetido dentro del lote: vale la última fila
+        lote[registro.get('id', ('nuevo', numero))] = registro
+        if len(lote) >= TAMANO_LOTE_IMPORTACION:
+            _guardar_lote(lote, primera_fila, resultado)
+            lote, primera_fila = {}, numero + 1
+
+    if lote:
+        _guardar_lote(lote, primera_fila, resultado)
+
+    resultado['imagenes_encoladas'], resultado['imagenes_inexistentes'] = \
+        imagenes.encolar_faltantes(imagenes_importadas)
+    return resultado
+
+@producto_bp.route("/importar", methods=['GET', 'POST'])
+@admin_required
+def importar():
+    """
+    Importar productos desde un archivo CSV o XLSX
+
+    GET: Formulario de subida con el formato esperado
+    POST: Lee el archivo fila por fila, valida y guarda en lotes
+
+    Formato: columnas id, nombre, descripcion, precio, stock, categoria,
+    imagen (el mismo de la exportación). Sin id se crea el producto; con id
+    se actualiza, y las celdas vacías conservan el valor actual.
+
+    Returns:
+        Template con el formulario o el resumen de la importación
+    """
+    if request.method == 'POST':
+        request.max_content_length = IMPORTACION_MAX_BYTES
+        archivo = request.files.get('archivo')
+        formato = exportacion.formato_de(archivo.filename if archivo else None)
+        if not formato:
+            flash('Seleccione un archivo .csv o .xlsx', 'error')
+            return producto_view.importar()
+
+        try:
+            resultado = _importar(exportacion.leer_filas(archivo.stream, formato))
+        except exportacion.ArchivoInvalidoError as e:
+            flash(str(e), 'error')
+            return producto_view.importar()
+        return producto_view.importar(resultado)
+
+    return producto_view.importar()
+
+@producto_bp.route("/exportar")
+@admin_required
+@solo_lectura
+def exportar():
+    """
+    Descargar el catálogo completo como CSV (por defecto) o XLSX (?formato=xlsx)
+
+    El archivo tiene las columnas que acepta la importación, así se puede
+    editar en una planilla y volver a subir.
+    """
+    formato = request.args.get('formato', 'csv')
+    return exportacion.respuesta_descarga(formato, 'productos', COLUMNAS_IMPORTACION,
+                                          Producto.filas_exportacion(), titulo='Productos')
@@ -1,5 +1,6 @@
 from flask import request, redirect, url_for, Blueprint, session, flash
 from models.proveedor_model import Proveedor
+from database import transaccion, solo_lectura
 from views import proveedor_view
 from decorators import login_required, admin_required
 
@@ -7,6 +8,7 @@ proveedor_bp = Blueprint('proveedor', __name__, url_prefix="/proveedores")
 
 @proveedor_bp.route("/")
 @admin_required
+@solo_lectura
 def index():
     proveedores = Proveedor.get_all()
     return proveedor_view.list(proveedores)
@@ -22,7 +24,8 @@ def create():
         direccion = request.form['direccion']
 
         proveedor = Proveedor(nombre, contacto, telefono, email, direccion)
-        proveedor.save()
+        with transaccion():
+            proveedor.save()
         flash('Proveedor creado exitosamente', 'success')
         return redirect(url_for('proveedor.index'))
 
@@ -43,7 +46,8 @@ def edit(id):
         email = request.form['email']
         direccion = request.form['direccion']
         
-        proveedor.update(nombre=nombre, contacto=contacto, telefono=telefono, email=email, direccion=direccion)
+        with transaccion():
+            proveedor.update(nombre=nombre, contacto=contacto, telefono=telefono, email=email, direccion=direccion)
         flash('Proveedor actualizado exitosamente', 'success')
         return redirect(url_for('proveedor.index'))
 
@@ -57,6 +61,7 @@ def delete(id):
         flash('Proveedor no encontrado', 'error')
         return redirect(url_for('proveedor.index'))
     
-    proveedor.delete()
+    with transaccion():
+        proveedor.delete()
     flash('Proveedor eliminado exitosamente', 'success')
     return redirect(url_for('proveedor.index'))
@@ -1,9 +1,8 @@
-from flask import Blueprint, session, flash, redirect, url_for, send_file, render_template
-from models.venta_model import Venta
-from models.producto_model import Producto
+from flask import Blueprint, session, flash, redirect, url_for, render_template, request
 from models.compra_model import Compra
 from decorators import admin_required
-from utils.pdf_generator import generar_reporte_ventas, generar_reporte_productos
+from database import solo_lectura
+from utils import trabajos, exportacion
 
 reporte_bp = Blueprint('reporte', __name__, url_prefix="/reportes")
 
@@ -13,45 +12,49 @@ def index():
     """Página principal de reportes"""
     return render_template('reportes/index.html')
 
-@reporte_bp.route("/ventas")
+@reporte_bp.route("/ventas", methods=['POST'])
 @admin_required
 def reporte_ventas():
-    """Generar reporte de ventas en PDF"""
-    ventas = Venta.get_all()
-    pdf_buffer = generar_reporte_ventas(ventas)
-    filename = f"reporte_ventas.pdf"
-    
-    return send_file(
-        pdf_buffer,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='application/pdf'
-    )
-
-@reporte_bp.route("/productos")
+    """Encolar el reporte de ventas en PDF y mostrar su avance (solo POST: cada pedido crea un trabajo)"""
+    trabajo = trabajos.encolar('reporte_ventas', nombre_descarga="reporte_ventas.pdf",
+                               solicitado_por=session.get('user_id'), tipo_solicitante=session.get('tipo'))
+    return redirect(url_for('trabajo.ver', id=trabajo.id))
+
+@reporte_bp.route("/productos", methods=['POST'])
 @admin_required
 def reporte_productos():
-    """Generar reporte de productos en PDF"""
-    productos = Producto.get_all()
-    pdf_buffer = generar_reporte_productos(productos)
-    filename = f"reporte_productos.pdf"
-    
-    return send_file(
-        pdf_buffer,
-        as_attachment=True,
-        download_name=filename,
-        mimetype='application/pdf'
-    )
+    """Encolar el reporte de productos en PDF y mostrar su avance (solo POST)"""
+    trabajo = trabajos.encolar('reporte_productos', nombre_descarga="reporte_productos.pdf",
+                               solicitado_por=session.get('user_id'), tipo_solicitante=session.get('tipo'))
+    return redirect(url_for('trabajo.ver', id=trabajo.id))
 
 @reporte_bp.route("/compras")
 @admin_required
+@solo_lectura
 def reporte_compras():
     """Vista de estadísticas de compras"""
-    compras_pendientes = len(Compra.get_pendientes())
-    compras_aprobadas = len(Compra.get_aprobadas())
-    todas_compras = Compra.get_all()
+    conteo = Compra.count_by_estado()
+    ultimas_compras = Compra.get_pagina(por_pagina=10).items
     
     return render_template('reportes/compras.html', 
-                         compras_pendientes=compras_pendientes,
-                         compras_aprobadas=compras_aprobadas,
-                         todas_compras=todas_compras)
+                         compras_pendientes=conteo['pendiente'],
+                         compras_aprobadas=conteo['aprobada'],
+                         total_compras=conteo['total'],
+                         ultimas_compras=ultimas_compras)
+
+@reporte_bp.route("/analitica")
+@admin_required
+@solo_lectura
+def analitica():
+    """Ingresos por producto, categoría, día y vendedor, y tiempos de aprobación de compras"""
+    from utils import analitica as motor  # pandas se importa solo al usar esta vista
+
+    try:
+        desde, hasta = exportacion.rango_fechas(request.args)
+    except ValueError:
+        flash('Las fechas deben tener el formato AAAA-MM-DD', 'error')
+        return redirect(url_for('reporte.analitica'))
+
+    datos = motor.resumen(desde, hasta)
+    return render_template('reportes/analitica.html', datos=datos,
+                           desde=request.args.get('desde', ''), hasta=request.args.get('hasta', ''))
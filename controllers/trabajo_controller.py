@@ -0,0 +1,72 @@
+import os
+from flask import redirect, url_for, Blueprint, session, flash, send_file, jsonify, abort
+from models.trabajo_model import Trabajo
+from views import trabajo_view
+from decorators import login_required, admin_required
+from utils import trabajos
+
+# Crear blueprint para las rutas de trabajos en segundo plano
+trabajo_bp = Blueprint('trabajo', __name__, url_prefix="/trabajos")
+
+# Reportes que un administrador puede encolar y su nombre de descarga
+REPORTES = {
+    'ventas': ('reporte_ventas', 'reporte_ventas.pdf'),
+    'productos': ('reporte_productos', 'reporte_productos.pdf'),
+}
+
+def _obtener_trabajo(id):
+    """Buscar el trabajo y validar que la sesión actual puede verlo"""
+    trabajo = Trabajo.get_by_id(id)
+    if not trabajo or not trabajo.puede_ver(session.get('user_id'), session.get('tipo')):
+        abort(404)
+    return trabajo
+
+# ENCOLADO DE REPORTES
+
+@trabajo_bp.route("/reportes/<tipo>", methods=['POST'])
+@admin_required
+def encolar_reporte(tipo):
+    """Encolar un reporte PDF y devolver el ID del trabajo (202 Accepted)"""
+    if tipo not in REPORTES:
+        abort(404)
+    tipo_trabajo, nombre_descarga = REPORTES[tipo]
+    trabajo = trabajos.encolar(tipo_trabajo, nombre_descarga=nombre_descarga,
+                               solicitado_por=session.get('user_id'), tipo_solicitante=session.get('tipo'))
+    respuesta = dict(trabajo.to_dict(),
+                     url_estado=url_for('trabajo.estado', id=trabajo.id),
+                     url_descarga=url_for('trabajo.descargar', id=trabajo.id))
+    return jsonify(respuesta), 202
+
+# CONSULTA DE ESTADO Y DESCARGA
+
+@trabajo_bp.route("/<id>")
+@login_required
+def ver(id):
+    """Página que muestra el avance del trabajo y descarga al terminar"""
+    trabajo = _obtener_trabajo(id)
+    return trabajo_view.estado(trabajo)
+
+@trabajo_bp.route("/<id>/estado")
+@login_required
+def estado(id):
+    """Estado y progreso del trabajo en JSON (para sondeo desde el navegador)"""
+    trabajo = _obtener_trabajo(id)
+    return jsonify(trabajo.to_dict())
+
+@trabajo_bp.route("/<id>/descargar")
+@login_required
+def descargar(id):
+    """Descargar el archivo generado cuando el trabajo está completado"""
+    trabajo = _obtener_trabajo(id)
+    if trabajo.estado != 'completado':
+        flash('El archivo todavía no está listo', 'warning')
+        return redirect(url_for('trabajo.ver', id=trabajo.id))
+    if not trabajo.archivo or not os.path.exists(trabajo.archivo):
+        abort(404)  # Eliminado por la limpieza de trabajos vencidos
+    
+    return send_file(
+        trabajo.archivo,
+        as_attachment=True,
+        download_name=trabajo.nombre_descarga or f"{trabajo.id}.pdf",
+        mimetype='application/pdf'
+    )
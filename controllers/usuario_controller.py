@@ -1,15 +1,19 @@
 from flask import request, redirect,url_for, Blueprint, session, flash
 from models.usuario_model import Usuario
+from database import transaccion, solo_lectura
 from views import usuario_view
 from decorators import login_required, admin_required
+from utils.paginacion import parametros_pagina
 
 usuario_bp = Blueprint('usuario',__name__,url_prefix="/usuarios")
 
 @usuario_bp.route("/")
 @login_required
+@solo_lectura
 def index():
-    usuarios = Usuario.get_all()
-    return usuario_view.list(usuarios)
+    cursor, por_pagina = parametros_pagina(request.args)
+    pagina = Usuario.get_pagina(cursor, por_pagina)
+    return usuario_view.list(pagina)
 
 @usuario_bp.route("/create", methods = ['GET','POST'])
 @admin_required
@@ -21,7 +25,8 @@ def create():
         rol = request.form['rol']
 
         usuario = Usuario(nombre,username,password,rol) 
-        usuario.save()
+        with transaccion():
+            usuario.save()
         flash('Usuario creado exitosamente', 'success')
         return redirect(url_for('usuario.index'))
               
@@ -40,7 +45,8 @@ def edit(id):
         username = request.form['username']   
         rol = request.form['rol']
         # No actualizar contraseña
-        usuario.update(nombre=nombre,username=username,rol=rol)
+        with transaccion():
+            usuario.update(nombre=nombre,username=username,rol=rol)
         flash('Usuario actualizado exitosamente', 'success')
         return redirect(url_for('usuario.index'))
 
@@ -54,6 +60,7 @@ def delete(id):
         flash('Usuario no encontrado', 'error')
         return redirect(url_for('usuario.index'))
     
-    usuario.delete()
+    with transaccion():
+        usuario.delete()
     flash('Usuario eliminado exitosamente', 'success')
     return redirect(url_for('usuario.index'))
@@ -1,30 +1,68 @@
 from flask import request, redirect, url_for, Blueprint, session, flash
-from models.venta_model import Venta
+from models.venta_model import Venta, COLUMNAS_EXPORTACION
 from models.producto_model import Producto
+from models.movimiento_stock_model import StockInsuficienteError
+from database import transaccion, con_reintentos, solo_lectura
 from views import venta_view
 from decorators import login_required, admin_required
+from utils.paginacion import parametros_pagina
+from utils.condicional import condicional, marca_agua
+from utils import exportacion
 
 venta_bp = Blueprint('venta', __name__, url_prefix="/ventas")
 
 @venta_bp.route("/")
 @admin_required
+@solo_lectura
+@condicional(lambda: marca_agua(Venta) + marca_agua(Producto))
 def index():
-    ventas = Venta.get_all()
-    return venta_view.list(ventas)
+    cursor, por_pagina = parametros_pagina(request.args)
+    pagina = Venta.get_pagina(cursor, por_pagina)
+    return venta_view.list(pagina)
 
 @venta_bp.route("/directas")
 @admin_required
+@solo_lectura
+@condicional(lambda: marca_agua(Venta) + marca_agua(Producto))
 def directas():
     """Ver solo ventas directas (no generadas por compras)"""
-    ventas = Venta.get_ventas_directas()
-    return venta_view.list_directas(ventas)
+    cursor, por_pagina = parametros_pagina(request.args)
+    pagina = Venta.get_pagina(cursor, por_pagina, tipo_venta='directa')
+    return venta_view.list_directas(pagina)
 
 @venta_bp.route("/por_compras")
 @admin_required
+@solo_lectura
+@condicional(lambda: marca_agua(Venta) + marca_agua(Producto))
 def por_compras():
     """Ver solo ventas generadas por compras aprobadas"""
-    ventas = Venta.get_ventas_por_compra()
-    return venta_view.list_por_compras(ventas)
+    cursor, por_pagina = parametros_pagina(request.args)
+    pagina = Venta.get_pagina(cursor, por_pagina, tipo_venta='por_compra')
+    return venta_view.list_por_compras(pagina)
+
+@venta_bp.route("/exportar")
+@admin_required
+@solo_lectura
+def exportar():
+    """
+    Descargar las ventas como CSV (por defecto) o XLSX para contabilidad
+
+    Filtros (query string): desde, hasta (AAAA-MM-DD, incluidos), tipo_venta
+    y formato ('csv' o 'xlsx'). Las filas se leen por bloques y se envían
+    mientras se generan, así la memoria no depende del número de ventas.
+    """
+    try:
+        desde, hasta = exportacion.rango_fechas(request.args)
+    except ValueError:
+        flash('Las fechas deben tener el formato AAAA-MM-DD', 'error')
+        return redirect(url_for('venta.index'))
+    tipo_venta = request.args.get('tipo_venta')
+    if tipo_venta not in ('directa', 'por_compra'):
+        tipo_venta = None
+
+    filas = Venta.filas_exportacion(desde, hasta, tipo_venta)
+    return exportacion.respuesta_descarga(request.args.get('formato', 'csv'), 'ventas',
+                                          COLUMNAS_EXPORTACION, filas, titulo='Ventas')
 
 @venta_bp.route("/create", methods=['GET', 'POST'])
 @admin_required
@@ -35,8 +73,16 @@ def create():
         cantidad = int(request.form['cantidad'])
         precio_unitario = float(request.form['precio_unitario'])
 
-        venta = Venta(cliente, producto_id, cantidad, precio_unitario, tipo_venta='directa')
-        venta.save()
+        def registrar_venta():
+            # El stock se descuenta en la misma transacción que la venta
+            with transaccion():
+                Venta(cliente, producto_id, cantidad, precio_unitario, tipo_venta='directa').save()
+        
+        try:
+            con_reintentos(registrar_venta)
+        except StockInsuficienteError:
+            flash('No hay stock suficiente del producto para registrar la venta', 'error')
+            return venta_view.create(Producto.get_all())
         flash('Venta directa registrada exitosamente', 'success')
         return redirect(url_for('venta.index'))
 
@@ -62,7 +108,12 @@ def edit(id):
         cantidad = int(request.form['cantidad'])
         precio_unitario = float(request.form['precio_unitario'])
         
-        venta.update(cliente=cliente, producto_id=producto_id, cantidad=cantidad, precio_unitario=precio_unitario)
+        try:
+            with transaccion():
+                venta.update(cliente=cliente, producto_id=producto_id, cantidad=cantidad, precio_unitario=precio_unitario)
+        except StockInsuficienteError:
+            flash('No hay stock suficiente del producto para la nueva cantidad', 'error')
+            return redirect(url_for('venta.edit', id=id))
         flash('Venta actualizada exitosamente', 'success')
         return redirect(url_for('venta.index'))
 
@@ -82,12 +133,15 @@ def delete(id):
         flash('No se pueden eliminar ventas generadas automáticamente por compras', 'warning')
         return redirect(url_for('venta.index'))
     
-    venta.delete()
+    with transaccion():
+        venta.delete()
     flash('Venta eliminada exitosamente', 'success')
     return redirect(url_for('venta.index'))
 
 @venta_bp.route("/detalle/<int:id>")
 @admin_required
+@solo_lectura
+@condicional(lambda id: Venta.get_marca_agua(id))
 def detalle(id):
     """Ver detalle completo de una venta"""
     venta = Venta.get_by_id(id)
@@ -1,3 +1,230 @@
+import time
+from contextlib import contextmanager
+from functools import wraps
+
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+# Clave de SQLALCHEMY_BINDS de la réplica de solo lectura (opcional)
+BIND_REPLICA = 'replica'
+
+# ============================================================================
+# SESIÓN CON RÉPLICA DE LECTURA
+# ============================================================================
+
+class SesionEnrutada(Session):
+    """
+    Sesión que envía los SELECT a la réplica dentro de solo_lectura()
+
+    Todo lo demás (INSERT/UPDATE/DELETE, flush y cualquier consulta dentro de
+    transaccion()) va al primario, así una escritura nunca lee datos de la
+    réplica que podrían estar atrasados. Sin réplica configurada se comporta
+    igual que la sesión normal.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get('solo_lectura') and not self.info.get('en_transaccion') \
+                and not self._flushing and getattr(clause, 'is_select', False):
+            replica = self._db.engines.get(BIND_REPLICA)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': SesionEnrutada})
+
+def solo_lectura(f):
+    """
+    Decorador para vistas de listados y reportes que solo consultan
+
+    Sus SELECT se ejecutan en la réplica (SQLALCHEMY_BINDS['replica']) si
+    está configurada.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        anterior = db.session.info.get('solo_lectura', False)
+        db.session.info['solo_lectura'] = True
+        try:
+            return f(*args, **kwargs)
+        finally:
+            db.session.info['solo_lectura'] = anterior
+    return decorated_function
+
+# ============================================================================
+# CONFIGURACIÓN DEL MOTOR (SQLITE / POSTGRESQL)
+# ============================================================================
+
+# Valores por defecto; se pueden cambiar en app.config o con variables de
+# entorno FLASK_<CLAVE> (ej. FLASK_SQLITE_BUSY_TIMEOUT=10000)
+CONFIG_DEFECTO = {
+    'SQLITE_JOURNAL_MODE': 'WAL',           # Lectores y escritor no se bloquean entre sí
+    'SQLITE_BUSY_TIMEOUT': 5000,            # ms que espera un escritor antes de "database is locked"
+    'SQLITE_SYNCHRONOUS': 'NORMAL',         # Seguro con WAL; fsync solo en los checkpoints
+    'SQLITE_MMAP_SIZE': 256 * 1024 * 1024,  # Lecturas mapeadas en memoria (bytes)
+    'SQLITE_CACHE_SIZE': -64 * 1024,        # Caché de páginas por conexión (negativo = KiB)
+    'SQLITE_TEMP_STORE': 'MEMORY',          # Tablas temporales y ordenaciones en memoria
+    'DB_POOL_SIZE': 10,                     # Conexiones abiertas que se reutilizan
+    'DB_MAX_OVERFLOW': 20,                  # Conexiones extra en picos de carga
+    'DB_POOL_TIMEOUT': 30,                  # Segundos esperando una conexión libre
+    'DB_POOL_RECYCLE': 1800,                # Segundos antes de renovar una conexión (servidores)
+}
+
+def normalizar_uri(uri):
+    """Aceptar el esquema postgres:// que usan muchos proveedores"""
+    if uri and uri.startswith('postgres://'):
+        return 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+def _con_pool(uri):
+    """True si la base de datos admite un pool de conexiones (no SQLite en memoria)"""
+    if uri.startswith('sqlite'):
+        return ':memory:' not in uri and uri.rstrip('/') != 'sqlite:'
+    return True
+
+def _opciones_pool(config, uri):
+    """Opciones del pool de conexiones para el motor de esa URI"""
+    if not _con_pool(uri):
+        return {}
+    opciones = {
+        'pool_size': int(config['DB_POOL_SIZE']),
+        'max_overflow': int(config['DB_MAX_OVERFLOW']),
+        'pool_timeout': int(config['DB_POOL_TIMEOUT']),
+    }
+    if not uri.startswith('sqlite'):
+        opciones['pool_pre_ping'] = True
+        opciones['pool_recycle'] = int(config['DB_POOL_RECYCLE'])
+    return opciones
+
+def _aplicar_pragmas(config):
+    """Listener 'connect' que configura cada conexión nueva de SQLite"""
+    pragmas = [
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('busy_timeout', int(config['SQLITE_BUSY_TIMEOUT'])),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('mmap_size', int(config['SQLITE_MMAP_SIZE'])),
+        ('cache_size', int(config['SQLITE_CACHE_SIZE'])),
+        ('temp_store', config['SQLITE_TEMP_STORE']),
+    ]
+
+    def aplicar(conexion_dbapi, registro):
+        cursor = conexion_dbapi.cursor()
+        try:
+            for nombre, valor in pragmas:
+                cursor.execute(f'PRAGMA {nombre} = {valor}')
+        finally:
+            cursor.close()
+
+    return aplicar
+
+def init_app(app):
+    """
+    Inicializar la base de datos con el perfil de producción
+
+    - Completa la configuración con CONFIG_DEFECTO
+    - Usa un pool de conexiones reutilizables (salvo SQLite en memoria);
+      en servidores como PostgreSQL además verifica y renueva las conexiones
+    - Aplica los PRAGMA de CONFIG_DEFECTO a cada conexión nueva de SQLite (no
+      son persistentes salvo journal_mode, por eso se aplican al conectar)
+
+    Las opciones se aplican al primario y a la réplica (SQLALCHEMY_BINDS).
+    """
+    for clave, valor in CONFIG_DEFECTO.items():
+        app.config.setdefault(clave, valor)
+
+    uri = normalizar_uri(app.config.get('SQLALCHEMY_DATABASE_URI', ''))
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    opciones = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    for clave, valor in _opciones_pool(app.config, uri).items():
+        opciones.setdefault(clave, valor)
+
+    # SQLALCHEMY_ENGINE_OPTIONS solo llega al motor primario: las réplicas
+    # dadas como URI se pasan a la forma {'url': ..., opciones}
+    binds = app.config.get('SQLALCHEMY_BINDS') or {}
+    for clave, valor in binds.items():
+        if isinstance(valor, str):
+            valor = normalizar_uri(valor)
+            binds[clave] = {'url': valor, **_opciones_pool(app.config, valor)}
+
+    db.init_app(app)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _aplicar_pragmas(app.config))
+
+# ============================================================================
+# UNIDAD DE TRABAJO
+# ============================================================================
+
+@contextmanager
+def transaccion():
+    """
+    Agrupar varias operaciones de los modelos en un único commit
+
+    Los métodos save/update/delete de los modelos solo agregan y envían los
+    cambios (flush); este bloque confirma todo al salir o lo deshace si hubo
+    una excepción:
+
+        with transaccion():
+            compra.aprobar(admin_id)
+            ...
+
+    Los bloques anidados se unen a la transacción exterior, que es la única
+    que confirma.
+    """
+    if db.session.info.get('en_transaccion'):
+        yield db.session
+        return
+
+    db.session.info['en_transaccion'] = True
+    try:
+        yield db.session
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.info.pop('en_transaccion', None)
+
+# ============================================================================
+# REINTENTOS ANTE BLOQUEOS DE SQLITE
+# ============================================================================
+
+REINTENTOS_BLOQUEO = 5      # Intentos totales ante "database is locked"
+ESPERA_BLOQUEO = 0.05       # Espera inicial en segundos (se duplica en cada intento)
+
+def es_bloqueo(error):
+    """True si el error es un bloqueo transitorio de SQLite (SQLITE_BUSY/LOCKED)"""
+    mensaje = str(getattr(error, 'orig', error)).lower()
+    return 'database is locked' in mensaje or 'database is busy' in mensaje or 'database table is locked' in mensaje
+
+def con_reintentos(funcion, *args, intentos=REINTENTOS_BLOQUEO, espera=ESPERA_BLOQUEO, **kwargs):
+    """
+    Ejecutar una operación de escritura reintentando si SQLite está ocupado
+
+    Ante un bloqueo se deshace la transacción y se vuelve a llamar a la
+    función completa, por lo que esta debe crear sus objetos nuevos en cada
+    intento y confirmar con transaccion():
+
+        def registrar():
+            with transaccion():
+                Venta(...).save()
+        con_reintentos(registrar)
+
+    Args:
+        funcion (callable): Operación que abre y confirma su transacción
+        intentos (int): Número máximo de intentos
+        espera (float): Espera antes del segundo intento (backoff exponencial)
 
-db = SQLAlchemy()
+    Returns:
+        Lo que devuelva la función
+    """
+    for intento in range(intentos):
+        try:
+            return funcion(*args, **kwargs)
+        except OperationalError as error:
+            db.session.rollback()
+            if not es_bloqueo(error) or intento == intentos - 1:
+                raise
+            time.sleep(espera * (2 ** intento))
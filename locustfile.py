@@ -0,0 +1,166 @@
+"""
+================================================================================
+ESCENARIO DE CARGA (LOCUST)
+================================================================================
+Simula el tráfico real de la aplicación contra un servidor en marcha:
+
+- Clientes: inician sesión, recorren el catálogo (listado, categorías,
+  búsqueda) y envían solicitudes de compra.
+- Administradores: inician sesión, consultan los listados de ventas y
+  compras y aprueban las compras pendientes.
+
+Sirve para comparar el perfil SQLite de database.CONFIG_DEFECTO (WAL,
+busy_timeout, synchronous=NORMAL, pool) con la configuración anterior.
+Cada variante se levanta con las mismas cuentas y los mismos datos:
+
+    # Antes: perfil SQLite anterior
+    FLASK_SQLITE_JOURNAL_MODE=DELETE FLASK_SQLITE_SYNCHRONOUS=FULL \\
+    FLASK_SQLITE_BUSY_TIMEOUT=0 gunicorn -w 4 -b 127.0.0.1:8000 app:app
+
+    # Después: perfil por defecto
+    gunicorn -w 4 -b 127.0.0.1:8000 app:app
+
+    # En otra terminal, para cada variante
+    locust -f locustfile.py --host http://127.0.0.1:8000 --headless \\
+           -u 50 -r 10 -t 2m --csv resultados_antes
+
+Las cuentas se toman de variables de entorno (valores por defecto entre
+paréntesis). Si no existen, se registran al empezar la prueba:
+
+    LOCUST_ADMIN_EMAIL     (admin@mueblesmetvil.com)
+    LOCUST_ADMIN_CLAVE     (admin123)
+    LOCUST_USUARIO         (cliente_locust)
+    LOCUST_USUARIO_CLAVE   (clave-locust)
+
+Hace falta al menos un proveedor y un producto con stock para que los
+clientes puedan crear compras.
+================================================================================
+"""
+
+import os
+import random
+import re
+
+import requests
+from locust import HttpUser, between, events, task
+
+ADMIN_EMAIL = os.environ.get('LOCUST_ADMIN_EMAIL', 'admin@mueblesmetvil.com')
+ADMIN_CLAVE = os.environ.get('LOCUST_ADMIN_CLAVE', 'admin123')
+USUARIO = os.environ.get('LOCUST_USUARIO', 'cliente_locust')
+USUARIO_CLAVE = os.environ.get('LOCUST_USUARIO_CLAVE', 'clave-locust')
+
+CATEGORIAS = ('sillas', 'mesas', 'camas', 'armarios', 'sofas', 'escritorios', 'estanterias')
+BUSQUEDAS = ('mesa', 'silla', 'sofá', 'cama', 'ropero', 'escritorio')
+
+_PROVEEDOR = re.compile(r'<option value="(\d+)">')
+_PRODUCTO = re.compile(r'<option value="(\d+)" data-precio="([\d.]+)"')
+_APROBAR = re.compile(r'/compras/aprobar/(\d+)')
+
+
+# ============================================================================
+# PREPARACIÓN
+# ============================================================================
+
+@events.test_start.add_listener
+def registrar_cuentas(environment, **kwargs):
+    """Registrar las cuentas de prueba (si ya existen, el registro se ignora)"""
+    if not environment.host:
+        return
+    with requests.Session() as sesion:
+        sesion.post(f'{environment.host}/registro_administrador', data={
+            'nombre': 'Administrador Locust', 'email': ADMIN_EMAIL,
+            'password': ADMIN_CLAVE, 'telefono': '000000000'})
+        sesion.post(f'{environment.host}/registro_usuario', data={
+            'nombre': 'Cliente Locust', 'username': USUARIO,
+            'password': USUARIO_CLAVE, 'rol': 'cliente'})
+
+
+class _ConSesion(HttpUser):
+    abstract = True
+    wait_time = between(1, 3)
+
+    tipo_usuario = None
+    credenciales = None
+
+    def on_start(self):
+        username, password = self.credenciales
+        with self.client.post('/login', name='/login', allow_redirects=False, catch_response=True,
+                              data={'username': username, 'password': password,
+                                    'tipo_usuario': self.tipo_usuario}) as respuesta:
+            if respuesta.status_code != 302 or '/login' in respuesta.headers.get('Location', ''):
+                respuesta.failure(f'No se pudo iniciar sesión como {username}')
+
+
+# ============================================================================
+# CLIENTES
+# ============================================================================
+
+class Cliente(_ConSesion):
+    weight = 4
+    tipo_usuario = 'usuario'
+    credenciales = (USUARIO, USUARIO_CLAVE)
+
+    @task(6)
+    def catalogo(self):
+        self.client.get('/productos/', name='/productos/')
+
+    @task(3)
+    def categoria(self):
+        self.client.get(f'/productos/categoria/{random.choice(CATEGORIAS)}',
+                        name='/productos/categoria/[categoria]')
+
+    @task(3)
+    def buscar(self):
+        self.client.get('/productos/buscar', params={'q': random.choice(BUSQUEDAS)},
+                        name='/productos/buscar')
+
+    @task(1)
+    def mis_compras(self):
+        self.client.get('/compras/', name='/compras/')
+
+    @task(1)
+    def solicitar_compra(self):
+        formulario = self.client.get('/compras/create', name='/compras/create [GET]')
+        productos = _PRODUCTO.findall(formulario.text)
+        proveedores = _PROVEEDOR.findall(formulario.text)
+        if not productos or not proveedores:
+            return
+        producto_id, precio = random.choice(productos)
+        self.client.post('/compras/create', name='/compras/create [POST]', data={
+            'proveedor_id': random.choice(proveedores), 'producto_id': producto_id,
+            'cantidad': random.randint(1, 3), 'precio_unitario': precio})
+
+
+# ============================================================================
+# ADMINISTRADORES
+# ============================================================================
+
+class Administrador(_ConSesion):
+    weight = 1
+    tipo_usuario = 'administrador'
+    credenciales = (ADMIN_EMAIL, ADMIN_CLAVE)
+
+    @task(3)
+    def ventas(self):
+        self.client.get('/ventas/', name='/ventas/')
+
+    @task(1)
+    def ventas_directas(self):
+        self.client.get('/ventas/directas', name='/ventas/directas')
+
+    @task(1)
+    def ventas_por_compras(self):
+        self.client.get('/ventas/por_compras', name='/ventas/por_compras')
+
+    @task(2)
+    def compras(self):
+        self.client.get('/compras/', name='/compras/')
+
+    @task(3)
+    def aprobar_pendiente(self):
+        respuesta = self.client.get('/compras/pendientes', name='/compras/pendientes')
+        pendientes = _APROBAR.findall(respuesta.text)
+        if pendientes:
+            self.client.post(f'/compras/aprobar/{random.choice(pendientes)}',
+                             name='/compras/aprobar/[id]',
+                             data={'comentarios': 'Aprobada por la prueba de carga'})
@@ -0,0 +1,128 @@
+"""
+================================================================================
+MIGRACIONES DEL ESQUEMA - SISTEMA DE VENTAS MUEBLERÍA
+================================================================================
+Cada archivo mNNNN_descripcion.py de este paquete es una migración con:
+
+    DESCRIPCION = 'Texto corto'
+    def aplicar(conexion): ...   # conexion: sqlalchemy Connection
+
+Las migraciones se aplican en orden de número, cada una en su propia
+transacción, y se registran en la tabla schema_migraciones para no repetirse.
+Deben ser idempotentes (CREATE ... IF NOT EXISTS, comprobar columnas antes
+de agregarlas) porque en SQLite algunas sentencias DDL no son transaccionales.
+
+Uso:
+    flask --app app migrar               # Aplicar las pendientes
+    flask --app app estado-migraciones   # Ver aplicadas y pendientes
+    flask --app app verificar-indices    # EXPLAIN QUERY PLAN de consultas críticas
+================================================================================
+"""
+
+import importlib
+import pkgutil
+import re
+import sys
+from datetime import datetime
+
+import click
+import sqlalchemy as sa
+
+from database import db
+
+# Registro de migraciones aplicadas (fuera de db.metadata: no es un modelo)
+_metadata = sa.MetaData()
+schema_migraciones = sa.Table(
+    'schema_migraciones', _metadata,
+    sa.Column('version', sa.String(10), primary_key=True),        # '0001', '0002', ...
+    sa.Column('descripcion', sa.String(200)),
+    sa.Column('aplicada_en', sa.DateTime, nullable=False),
+)
+
+_PATRON_MODULO = re.compile(r'^m(\d{4})_\w+$')
+
+
+def disponibles():
+    """
+    Migraciones del paquete ordenadas por versión
+
+    Returns:
+        list: Tuplas (version, modulo)
+    """
+    migraciones = []
+    for info in pkgutil.iter_modules(__path__):
+        coincidencia = _PATRON_MODULO.match(info.name)
+        if coincidencia:
+            migraciones.append((coincidencia.group(1), importlib.import_module(f'{__name__}.{info.name}')))
+    return sorted(migraciones, key=lambda m: m[0])
+
+
+def aplicadas(conexion):
+    """Versiones ya registradas en schema_migraciones"""
+    schema_migraciones.create(conexion, checkfirst=True)
+    return {fila.version for fila in conexion.execute(sa.select(schema_migraciones.c.version))}
+
+
+def pendientes():
+    """Migraciones que aún no se aplicaron a la base de datos principal"""
+    with db.engine.begin() as conexion:
+        hechas = aplicadas(conexion)
+    return [(version, modulo) for version, modulo in disponibles() if version not in hechas]
+
+
+def migrar():
+    """
+    Aplicar todas las migraciones pendientes
+
+    Returns:
+        list: Versiones aplicadas en esta ejecución
+    """
+    aplicadas_ahora = []
+    for version, modulo in pendientes():
+        with db.engine.begin() as conexion:
+            modulo.aplicar(conexion)
+            conexion.execute(schema_migraciones.insert().values(
+                version=version, descripcion=modulo.DESCRIPCION, aplicada_en=datetime.utcnow()))
+        aplicadas_ahora.append(version)
+    return aplicadas_ahora
+
+
+def init_app(app):
+    """Registrar los comandos CLI de migraciones"""
+
+    @app.cli.command('migrar')
+    def migrar_comando():
+        """Aplicar las migraciones de esquema pendientes"""
+        versiones = migrar()
+        if versiones:
+            print(f"Migraciones aplicadas: {', '.join(versiones)}")
+        else:
+            print("La base de datos ya está al día")
+
+    @app.cli.command('estado-migraciones')
+    def estado_migraciones():
+        """Listar las migraciones aplicadas y pendientes"""
+        with db.engine.begin() as conexion:
+            hechas = aplicadas(conexion)
+        for version, modulo in disponibles():
+            marca = 'aplicada ' if version in hechas else 'pendiente'
+            print(f"{version}  {marca}  {modulo.DESCRIPCION}")
+
+    @app.cli.command('verificar-indices')
+    def verificar_indices():
+        """Fallar si alguna consulta crítica recorre una tabla completa"""
+        from migraciones.verificacion import verificar
+
+        resultados = verificar()
+        if resultados is None:
+            print("EXPLAIN QUERY PLAN solo está disponible en SQLite; verificación omitida")
+            return
+        fallos = 0
+        for nombre, plan, correcto in resultados:
+            print(f"{'OK   ' if correcto else 'FALLA'} {nombre}")
+            for linea in plan:
+                print(f"        {linea}")
+            fallos += not correcto
+        if fallos:
+            click.echo(f"{fallos} consultas sin índice o con errores", err=True)
+            sys.exit(1)
@@ -0,0 +1,30 @@
+"""
+Esquema inicial
+
+Crea las tablas que falten (bases de datos creadas antes de los modelos de
+movimientos de stock, resumen diario o trabajos) y, en SQLite, la tabla
+FTS5 de búsqueda de productos con sus triggers.
+"""
+
+import sqlalchemy as sa
+
+from database import db
+
+DESCRIPCION = 'Tablas de los modelos e índice de búsqueda FTS5'
+
+
+def aplicar(conexion):
+    # Importar todos los modelos para que estén en db.metadata
+    import models.usuario_model, models.administrador_model, models.proveedor_model  # noqa: F401
+    import models.producto_model, models.compra_model, models.venta_model  # noqa: F401
+    import models.venta_resumen_model, models.movimiento_stock_model, models.trabajo_model  # noqa: F401
+    from models.producto_model import DDL_BUSQUEDA
+
+    db.metadata.create_all(conexion, checkfirst=True)
+
+    if conexion.dialect.name == 'sqlite':
+        existia = sa.inspect(conexion).has_table('productos_fts')
+        for sentencia in DDL_BUSQUEDA:
+            conexion.execute(sa.text(sentencia))
+        if not existia:
+            conexion.execute(sa.text("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')"))
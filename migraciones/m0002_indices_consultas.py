@@ -0,0 +1,34 @@
+"""
+Índices para las consultas más frecuentes
+
+- compras: listados por usuario y por estado ordenados por fecha
+- ventas: listados por tipo y por fecha, ventas del mes, por producto
+- productos: filtros por categoría
+- usuarios / administradores: login sin distinguir mayúsculas
+
+Los mismos índices están declarados en __table_args__ de cada modelo, así
+las bases de datos nuevas los reciben con create_all.
+"""
+
+import sqlalchemy as sa
+
+DESCRIPCION = 'Índices en claves foráneas, estado, tipo_venta, fecha y categoría'
+
+INDICES = [
+    ('ix_compras_usuario_fecha', 'compras', 'usuario_id, fecha'),
+    ('ix_compras_estado_fecha', 'compras', 'estado, fecha'),
+    ('ix_compras_producto_id', 'compras', 'producto_id'),
+    ('ix_compras_fecha', 'compras', 'fecha'),
+    ('ix_ventas_tipo_venta_fecha', 'ventas', 'tipo_venta, fecha'),
+    ('ix_ventas_fecha', 'ventas', 'fecha'),
+    ('ix_ventas_producto_id', 'ventas', 'producto_id'),
+    ('ix_ventas_compra_id', 'ventas', 'compra_id'),
+    ('ix_productos_categoria', 'productos', 'categoria'),
+    ('ix_usuarios_username_lower', 'usuarios', 'lower(username)'),
+    ('ix_administradores_email_lower', 'administradores', 'lower(email)'),
+]
+
+
+def aplicar(conexion):
+    for nombre, tabla, columnas in INDICES:
+        conexion.execute(sa.text(f'CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} ({columnas})'))
@@ -0,0 +1,32 @@
+"""
+Columna updated_at en productos, ventas y compras
+
+Marca de agua para las respuestas condicionales (ETag / Last-Modified, ver
+utils/condicional.py). SQLite no admite ADD COLUMN con un valor por defecto
+no constante, así que la columna se agrega vacía y se completa con la fecha
+de creación de cada fila (o la hora actual en productos, que no tiene fecha).
+
+Las bases de datos nuevas ya reciben la columna y su índice con create_all
+(m0001), por eso cada paso comprueba antes si hace falta.
+"""
+
+import sqlalchemy as sa
+
+DESCRIPCION = 'Columna updated_at e índice en productos, ventas y compras'
+
+TABLAS = [
+    ('productos', 'CURRENT_TIMESTAMP'),
+    ('ventas', 'fecha'),
+    ('compras', 'fecha'),
+]
+
+
+def aplicar(conexion):
+    inspector = sa.inspect(conexion)
+    tipo = sa.DateTime().compile(dialect=conexion.dialect)
+    for tabla, valor_inicial in TABLAS:
+        columnas = {columna['name'] for columna in inspector.get_columns(tabla)}
+        if 'updated_at' not in columnas:
+            conexion.execute(sa.text(f'ALTER TABLE {tabla} ADD COLUMN updated_at {tipo}'))
+            conexion.execute(sa.text(f'UPDATE {tabla} SET updated_at = COALESCE({valor_inicial}, CURRENT_TIMESTAMP)'))
+        conexion.execute(sa.text(f'CREATE INDEX IF NOT EXISTS ix_{tabla}_updated_at ON {tabla} (updated_at)'))
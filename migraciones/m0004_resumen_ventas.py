@@ -0,0 +1,17 @@
+"""
+Resumen diario de ventas a partir de las ventas existentes
+
+m0001 crea ventas_resumen_diario vacía, pero los totales, el mes actual y
+los reportes leen solo del resumen, y Venta.update/delete restan de la fila
+de su día. En una base con ventas anteriores al resumen los totales
+quedaban en 0 (o negativos al editar una venta vieja). Se recalcula la
+tabla completa una vez; desde aquí se mantiene de forma incremental.
+"""
+
+DESCRIPCION = 'Cálculo inicial del resumen diario de ventas'
+
+
+def aplicar(conexion):
+    from models.venta_resumen_model import VentaResumenDiario
+
+    VentaResumenDiario.reconstruir(conexion)
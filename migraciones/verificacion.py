@@ -0,0 +1,98 @@
+"""
+Verificación de índices con EXPLAIN QUERY PLAN (SQLite)
+
+Cada consulta crítica se obtiene ejecutando el método real del modelo y se
+pide el plan de cada sentencia que emitió. Una línea "SCAN <tabla>" sin "USING INDEX" significa que SQLite recorre
+la tabla completa, es decir, que falta un índice.
+"""
+
+import sqlalchemy as sa
+
+from database import db
+
+
+def consultas_criticas():
+    """
+    Métodos de consulta de los listados y reportes más usados
+
+    Cada consulta se obtiene ejecutando el método real del modelo, así el
+    plan corresponde exactamente al SQL que genera (filtros, orden, límite y
+    carga anticipada de relaciones).
+
+    Returns:
+        list: Tuplas (nombre, función sin argumentos que ejecuta la consulta)
+    """
+    from models.compra_model import Compra
+    from models.venta_model import Venta
+    from models.producto_model import Producto
+    from utils.condicional import marca_agua
+
+    return [
+        ('Compra.get_pagina (todas)', lambda: Compra.get_pagina()),
+        ('Compra.get_pagina (mis compras)', lambda: Compra.get_pagina(usuario_id=1)),
+        ('Compra.get_by_usuario', lambda: Compra.get_by_usuario(1)),
+        ('Compra.get_pendientes', lambda: Compra.get_pendientes()),
+        ('Compras de un producto (clave foránea)', lambda: Compra.query.filter_by(producto_id=1).first()),
+        ('Venta.get_pagina (todas)', lambda: Venta.get_pagina()),
+        ('Venta.get_pagina (directas)', lambda: Venta.get_pagina(tipo_venta='directa')),
+        ('Ventas de un producto (clave foránea)', lambda: Venta.query.filter_by(producto_id=1).first()),
+        ('Venta generada por una compra', lambda: Venta.query.filter_by(compra_id=1).first()),
+        ('Producto.get_pagina (por categoría)', lambda: Producto.get_pagina(categoria='sillas')),
+        ('Marca de agua de ventas (ETag)', lambda: marca_agua(Venta)),
+    ]
+
+
+def sentencias_emitidas(funcion):
+    """
+    Ejecutar una función y devolver las sentencias SQL que envió a la base
+
+    Returns:
+        list: Tuplas (sql, parámetros) en el orden en que se ejecutaron
+    """
+    sentencias = []
+
+    def registrar(conexion, cursor, sql, parametros, contexto, multiples):
+        sentencias.append((sql, parametros))
+
+    sa.event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        funcion()
+    finally:
+        sa.event.remove(db.engine, 'before_cursor_execute', registrar)
+    return sentencias
+
+
+def recorre_tabla(linea):
+    """True si la línea del plan es un recorrido completo de una tabla"""
+    return linea.startswith('SCAN ') and 'USING' not in linea
+
+
+def verificar():
+    """
+    Obtener el plan de cada consulta crítica
+
+    Un error al ejecutar una consulta (por ejemplo, una columna que falta
+    porque la base no está migrada) se informa como verificación fallida y
+    no interrumpe las demás.
+
+    Returns:
+        list: Tuplas (nombre, líneas del plan, sin recorridos completos), o
+              None si el motor no es SQLite
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return None
+
+    resultados = []
+    for nombre, consulta in consultas_criticas():
+        try:
+            plan = []
+            for sql, parametros in sentencias_emitidas(consulta):
+                filas = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', parametros)
+                plan.extend(fila[-1] for fila in filas)
+            resultados.append((nombre, plan, not any(recorre_tabla(linea) for linea in plan)))
+        except sa.exc.SQLAlchemyError as error:
+            resultados.append((nombre, [f'Error: {getattr(error, "orig", error)}'], False))
+        finally:
+            # Descartar los objetos cargados (y la transacción fallida, si la hubo)
+            db.session.rollback()
+    return resultados
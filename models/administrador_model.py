@@ -1,4 +1,5 @@
 from database import db
+from utils.seguridad import hash_password, verificar_password, es_hash
 
 class Administrador(db.Model):
     __tablename__ = 'administradores'
@@ -6,20 +7,36 @@ class Administrador(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False)
-    password = db.Column(db.String(100), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     telefono = db.Column(db.String(20))
-    super_admin = db.Column(db.Boolean, default=False)
+    super_admin = db.Column(db.Boolean, default=False, server_default=db.false())
+    
+    # Índice normalizado para buscar administradores sin distinguir mayúsculas
+    __table_args__ = (
+        db.Index('ix_administradores_email_lower', db.func.lower(email)),
+    )
     
     def __init__(self, nombre, email, password, telefono=None, super_admin=False):
         self.nombre = nombre
         self.email = email
-        self.password = password
+        self.set_password(password)
         self.telefono = telefono
         self.super_admin = super_admin
     
+    def set_password(self, password):
+        self.password = hash_password(password)
+    
+    def check_password(self, password):
+        if not verificar_password(self.password, password):
+            return False
+        # Actualizar contraseñas heredadas en texto plano a hash
+        if not es_hash(self.password):
+            self.set_password(password)
+        return True
+    
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()
     
     def update(self, nombre=None, email=None, password=None, telefono=None, super_admin=None):
         if nombre:
@@ -27,16 +44,16 @@ class Administrador(db.Model):
         if email:
             self.email = email
         if password:
-            self.password = password
+            self.set_password(password)
         if telefono:
             self.telefono = telefono
         if super_admin is not None:
             self.super_admin = super_admin
-        db.session.commit()
+        db.session.flush()
     
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
     
     @staticmethod
     def get_all():
@@ -46,6 +63,14 @@ class Administrador(db.Model):
     def get_by_id(id):
         return Administrador.query.get(id)
     
+    @staticmethod
+    def get_by_email(email):
+        # Sin distinguir mayúsculas; si hay registros heredados que solo
+        # difieren en mayúsculas, gana el que coincide exactamente
+        email = email.strip()
+        return Administrador.query.filter(db.func.lower(Administrador.email) == email.lower()) \
+            .order_by((Administrador.email == email).desc(), Administrador.id).first()
+    
     @staticmethod
     def get_super_admin():
         return Administrador.query.filter_by(super_admin=True).first()
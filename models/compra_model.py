@@ -1,5 +1,28 @@
 from database import db
 from datetime import datetime
+from sqlalchemy.orm import joinedload, selectinload
+from utils.paginacion import paginar, POR_PAGINA_DEFECTO
+from utils.exportacion import LOTE_CURSOR
+
+# Estrategias de carga anticipada para las relaciones usadas en los listados
+ESTRATEGIAS_CARGA = {
+    'joined': joinedload,      # Un solo SELECT con JOIN (ideal para muchos-a-uno)
+    'selectin': selectinload,  # Un SELECT adicional por relación con IN (...)
+}
+
+# Columnas de la exportación contable (CSV / XLSX)
+COLUMNAS_EXPORTACION = ['id', 'fecha', 'usuario_id', 'usuario', 'proveedor', 'producto_id', 'producto',
+                        'cantidad', 'precio_unitario', 'total', 'estado', 'aprobado_por',
+                        'fecha_aprobacion', 'comentarios']
+
+ESTADOS = ('pendiente', 'aprobada', 'rechazada')
+
+class CompraYaProcesadaError(Exception):
+    """La compra ya fue aprobada o rechazada"""
+    
+    def __init__(self, compra_id):
+        self.compra_id = compra_id
+        super().__init__(f'La compra #{compra_id} ya fue procesada')
 
 class Compra(db.Model):
     """
@@ -19,7 +42,9 @@ class Compra(db.Model):
     # ========================================================================
     
     id = db.Column(db.Integer, primary_key=True)                           # ID único de la compra
-    fecha = db.Column(db.DateTime, default=datetime.utcnow)                # Fecha de creación automática
+    fecha = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.current_timestamp())  # Fecha de creación automática
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=db.func.current_timestamp())  # Última modificación (ETag / Last-Modified)
     
     # ========================================================================
     # RELACIONES CON OTRAS TABLAS
@@ -41,11 +66,23 @@ class Compra(db.Model):
     # CONTROL DE ESTADO Y APROBACIÓN
     # ========================================================================
     
-    estado = db.Column(db.String(20), default='pendiente')                 # pendiente, aprobada, rechazada
+    estado = db.Column(db.String(20), default='pendiente', server_default='pendiente')  # pendiente, aprobada, rechazada
     aprobado_por = db.Column(db.Integer, db.ForeignKey('administradores.id'), nullable=True)  # Quien aprobó/rechazó
     fecha_aprobacion = db.Column(db.DateTime, nullable=True)               # Cuándo se aprobó/rechazó
     comentarios = db.Column(db.Text, nullable=True)                        # Comentarios del administrador
     
+    # ========================================================================
+    # ÍNDICES (ver migraciones/m0002_indices_consultas.py)
+    # ========================================================================
+    
+    __table_args__ = (
+        db.Index('ix_compras_usuario_fecha', 'usuario_id', 'fecha'),       # Mis compras, más recientes primero
+        db.Index('ix_compras_estado_fecha', 'estado', 'fecha'),            # Pendientes / aprobadas por fecha
+        db.Index('ix_compras_producto_id', 'producto_id'),                 # Compras de un producto
+        db.Index('ix_compras_fecha', 'fecha'),                             # Listado general por fecha
+        db.Index('ix_compras_updated_at', 'updated_at'),                   # Marca de agua para ETag / Last-Modified
+    )
+    
     # ========================================================================
     # DEFINICIÓN DE RELACIONES
     # ========================================================================
@@ -84,9 +121,11 @@ class Compra(db.Model):
         """
         Guardar compra en la base de datos
         Utilizado cuando se crea una nueva solicitud de compra
+        
+        Nota: No confirma; usar dentro de transaccion()
         """
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()
     
     def update(self, usuario_id=None, proveedor_id=None, producto_id=None, cantidad=None, 
                precio_unitario=None, estado=None, aprobado_por=None, comentarios=None):
@@ -134,7 +173,7 @@ class Compra(db.Model):
         if comentarios:
             self.comentarios = comentarios
             
-        db.session.commit()
+        db.session.flush()
     
     def delete(self):
         """
@@ -142,23 +181,347 @@ class Compra(db.Model):
         Solo se permite eliminar compras pendientes
         """
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
     
+    # ========================================================================
+    # PROCESO DE APROBACIÓN
+    # ========================================================================
+    
+    def _cerrar(self, estado, aprobado_por, comentarios):
+        """
+        Pasar la compra de 'pendiente' a 'aprobada' o 'rechazada'
+        
+        El cambio es un UPDATE condicional (WHERE estado = 'pendiente'), así
+        dos administradores nunca procesan la misma compra a la vez.
+        
+        Raises:
+            CompraYaProcesadaError: Si la compra ya no estaba pendiente
+        """
+        valores = {'estado': estado, 'aprobado_por': aprobado_por, 'fecha_aprobacion': datetime.utcnow()}
+        if comentarios:
+            valores['comentarios'] = comentarios
+        resultado = db.session.execute(
+            db.update(Compra)
+            .where(Compra.id == self.id, Compra.estado == 'pendiente')
+            .values(**valores)
+            .execution_options(synchronize_session='evaluate')
+        )
+        if resultado.rowcount != 1:
+            raise CompraYaProcesadaError(self.id)
+    
+    def aprobar(self, aprobado_por, comentarios=None):
+        """
+        Aprobar la compra y generar su venta
+        
+        Args:
+            aprobado_por (int): ID del administrador que aprueba
+            comentarios (str, optional): Comentarios del administrador
+            
+        Returns:
+            Venta: Venta generada (ya descontado el stock)
+            
+        Raises:
+            CompraYaProcesadaError: Si la compra ya fue procesada
+            StockInsuficienteError: Si no hay stock para la venta
+            
+        Nota: No confirma; la aprobación, la venta, el stock y el resumen
+        diario se confirman juntos en un solo commit con transaccion()
+        """
+        from models.venta_model import Venta
+        
+        self._cerrar('aprobada', aprobado_por, comentarios)
+        venta = Venta(
+            cliente=self.usuario.nombre if self.usuario else 'Cliente Desconocido',
+            producto_id=self.producto_id,
+            cantidad=self.cantidad,
+            precio_unitario=self.precio_unitario,
+            compra_id=self.id,                      # Relación con la compra
+            vendedor_id=aprobado_por,
+            tipo_venta='por_compra'
+        )
+        venta.save()
+        return venta
+    
+    def rechazar(self, aprobado_por, comentarios=None):
+        """
+        Rechazar la compra
+        
+        Raises:
+            CompraYaProcesadaError: Si la compra ya fue procesada
+            
+        Nota: No confirma; usar dentro de transaccion()
+        """
+        self._cerrar('rechazada', aprobado_por, comentarios)
+
+    @staticmethod
+    def procesar_lote(ids, accion, aprobado_por, comentarios=None):
+        """
+        Aprobar o rechazar varias compras en una sola transacción
+
+        Pasos:
+        1. Carga todas las compras con un solo SELECT
+        2. Las reclama con un UPDATE ... WHERE estado = 'pendiente' RETURNING id,
+           así las que otro administrador procesó a la vez quedan fuera
+        3. (aprobar) Descuenta el stock; las que no tienen stock vuelven a
+           'pendiente'
+        4. (aprobar) Inserta todas las ventas y movimientos de stock con un
+           INSERT cada uno y suma el resumen diario agrupado por producto
+
+        Args:
+            ids (list): IDs de las compras
+            accion (str): 'aprobar' o 'rechazar'
+            aprobado_por (int): ID del administrador
+            comentarios (str, optional): Comentarios para todas las compras
+
+        Returns:
+            list: Un dict por ID con 'compra_id', 'resultado' y 'venta_id'
+                  resultado: 'aprobada', 'rechazada', 'ya_procesada',
+                  'sin_stock' o 'no_encontrada'
+
+        Nota: No confirma; usar dentro de transaccion()
+        """
+        from models.venta_model import Venta
+        from models.movimiento_stock_model import MovimientoStock, StockInsuficienteError
+        from models.venta_resumen_model import VentaResumenDiario
+
+        estado = {'aprobar': 'aprobada', 'rechazar': 'rechazada'}[accion]
+        ids = list(dict.fromkeys(ids))  # Sin duplicados, conservando el orden
+        compras = {c.id: c for c in Compra._query().filter(Compra.id.in_(ids)).all()}
+
+        # Reclamar las pendientes (bloquea la escritura hasta el commit)
+        reclamadas = set()
+        pendientes = [i for i in ids if i in compras and compras[i].estado == 'pendiente']
+        if pendientes:
+            reclamadas = set(db.session.execute(
+                db.update(Compra)
+                .where(Compra.id.in_(pendientes), Compra.estado == 'pendiente')
+                .values(estado=estado)
+                .returning(Compra.id)
+                .execution_options(synchronize_session=False)
+            ).scalars())
+
+        resultados = {}
+        for compra_id in ids:
+            if compra_id not in compras:
+                resultados[compra_id] = 'no_encontrada'
+            elif compra_id not in reclamadas:
+                resultados[compra_id] = 'ya_procesada'
+            else:
+                resultados[compra_id] = estado
+
+        # Descontar stock con un UPDATE por producto; si no alcanza para todas
+        # se asigna compra por compra y las que no entran siguen pendientes
+        if accion == 'aprobar':
+            por_producto = {}
+            for compra_id in ids:
+                if resultados[compra_id] == 'aprobada':
+                    compra = compras[compra_id]
+                    por_producto.setdefault(compra.producto_id, []).append(compra)
+
+            for producto_id, grupo in por_producto.items():
+                try:
+                    MovimientoStock.actualizar_stock(producto_id, -sum(c.cantidad for c in grupo))
+                except StockInsuficienteError:
+                    for compra in grupo:
+                        try:
+                            MovimientoStock.actualizar_stock(producto_id, -compra.cantidad)
+                        except StockInsuficienteError:
+                            resultados[compra.id] = 'sin_stock'
+
+            sin_stock = [i for i in ids if resultados[i] == 'sin_stock']
+            if sin_stock:
+                db.session.execute(
+                    db.update(Compra).where(Compra.id.in_(sin_stock))
+                    .values(estado='pendiente')
+                    .execution_options(synchronize_session=False)
+                )
+
+        procesadas = [compras[i] for i in ids if resultados[i] == estado]
+        if procesadas:
+            valores = {'aprobado_por': aprobado_por, 'fecha_aprobacion': datetime.utcnow()}
+            if comentarios:
+                valores['comentarios'] = comentarios
+            db.session.execute(
+                db.update(Compra).where(Compra.id.in_([c.id for c in procesadas]))
+                .values(**valores)
+                .execution_options(synchronize_session=False)
+            )
+        for compra in compras.values():
+            db.session.expire(compra, ['estado', 'aprobado_por', 'fecha_aprobacion', 'comentarios'])
+
+        ventas = {}
+        if accion == 'aprobar' and procesadas:
+            # Un solo INSERT con todas las ventas (RETURNING trae ids y fechas)
+            filas = [{
+                'cliente': compra.usuario.nombre if compra.usuario else 'Cliente Desconocido',
+                'producto_id': compra.producto_id,
+                'cantidad': compra.cantidad,
+                'precio_unitario': compra.precio_unitario,
+                'total': compra.cantidad * compra.precio_unitario,
+                'compra_id': compra.id,
+                'vendedor_id': aprobado_por,
+                'tipo_venta': 'por_compra',
+            } for compra in procesadas]
+            for venta in db.session.execute(db.insert(Venta).returning(Venta), filas).scalars():
+                ventas[venta.compra_id] = venta
+
+            db.session.execute(db.insert(MovimientoStock), [{
+                'producto_id': v.producto_id, 'cambio': -v.cantidad, 'motivo': 'venta',
+                'venta_id': v.id, 'compra_id': v.compra_id,
+            } for v in ventas.values()])
+
+            acumulado = {}
+            for v in ventas.values():
+                clave = (v.fecha.date(), v.producto_id)
+                num, unidades, ingresos = acumulado.get(clave, (0, 0, 0))
+                acumulado[clave] = (num + 1, unidades + v.cantidad, ingresos + v.total)
+            for (dia, producto_id), (num, unidades, ingresos) in acumulado.items():
+                VentaResumenDiario.aplicar(datetime.combine(dia, datetime.min.time()), producto_id,
+                                           'por_compra', unidades, ingresos, ventas=num)
+
+        return [
+            {'compra_id': i, 'resultado': resultados[i],
+             'venta_id': ventas[i].id if i in ventas else None}
+            for i in ids
+        ]
+
     # ========================================================================
     # MÉTODOS DE CONSULTA ESTÁTICOS
     # ========================================================================
     
     @staticmethod
-    def get_all():
+    def _query(carga='joined'):
+        """
+        Construir la consulta base de compras con carga anticipada
+        
+        Args:
+            carga (str, optional): 'joined', 'selectin' o None para carga perezosa
+            
+        Returns:
+            Query: Consulta que trae usuario, proveedor y producto sin N+1
+        """
+        query = Compra.query
+        if carga:
+            estrategia = ESTRATEGIAS_CARGA[carga]
+            query = query.options(
+                estrategia(Compra.usuario),
+                estrategia(Compra.proveedor),
+                estrategia(Compra.producto),
+            )
+        return query
+    
+    @staticmethod
+    def get_all(carga='joined'):
         """
         Obtener todas las compras del sistema
         Utilizado por administradores para ver todo
         
+        Args:
+            carga (str, optional): Estrategia de carga de relaciones
+        
         Returns:
             list: Lista de todas las compras
         """
-        return Compra.query.all()
+        return Compra._query(carga).all()
     
+    @staticmethod
+    def get_pagina(cursor=None, por_pagina=POR_PAGINA_DEFECTO, usuario_id=None, estado=None, carga='joined'):
+        """
+        Obtener una página de compras, de la más reciente a la más antigua
+        
+        Args:
+            cursor (str, optional): Cursor (fecha|id) de la página anterior
+            por_pagina (int): Cantidad de compras por página
+            usuario_id (int, optional): Limitar a las compras de un usuario
+            estado (str, optional): Filtrar por estado
+            carga (str, optional): Estrategia de carga de relaciones
+            
+        Returns:
+            Pagina: Compras de la página solicitada
+        """
+        query = Compra._query(carga)
+        if usuario_id is not None:
+            query = query.filter_by(usuario_id=usuario_id)
+        if estado:
+            query = query.filter_by(estado=estado)
+        return paginar(query, [Compra.fecha, Compra.id], cursor, por_pagina, descendente=True)
+    
+    @staticmethod
+    def count_by_estado(usuario_id=None):
+        """
+        Contar compras por estado en una sola consulta GROUP BY
+        Utilizado por el panel, el listado y las estadísticas de compras
+        
+        Args:
+            usuario_id (int, optional): Limitar a las compras de un usuario
+            
+        Returns:
+            dict: Conteo por estado ('pendiente', 'aprobada', 'rechazada') y 'total'
+        """
+        query = db.session.query(Compra.estado, db.func.count(Compra.id))
+        if usuario_id is not None:
+            query = query.filter(Compra.usuario_id == usuario_id)
+        
+        conteo = {'pendiente': 0, 'aprobada': 0, 'rechazada': 0, 'total': 0}
+        for estado, cantidad in query.group_by(Compra.estado).all():
+            conteo[estado] = conteo.get(estado, 0) + cantidad
+            conteo['total'] += cantidad
+        return conteo
+    
+    @staticmethod
+    def get_ids_facturables(desde=None, hasta=None):
+        """
+        Obtener los IDs de las compras aprobadas en un rango de fechas
+        Utilizado por la exportación masiva de facturas
+
+        Args:
+            desde (datetime, optional): Inicio del rango (incluido)
+            hasta (datetime, optional): Fin del rango (excluido)
+
+        Returns:
+            list: IDs ordenados por fecha de la factura
+        """
+        fecha_factura = db.func.coalesce(Compra.fecha_aprobacion, Compra.fecha)
+        query = db.session.query(Compra.id).filter(Compra.estado == 'aprobada')
+        if desde:
+            query = query.filter(fecha_factura >= desde)
+        if hasta:
+            query = query.filter(fecha_factura < hasta)
+        return [id for (id,) in query.order_by(fecha_factura, Compra.id).all()]
+
+    @staticmethod
+    def filas_exportacion(desde=None, hasta=None, estado=None):
+        """
+        Compras para la exportación contable, leídas con un cursor por bloques
+
+        Args:
+            desde (datetime, optional): Inicio del rango de fecha de solicitud (incluido)
+            hasta (datetime, optional): Fin del rango (excluido)
+            estado (str, optional): 'pendiente', 'aprobada' o 'rechazada'
+
+        Returns:
+            Result: Tuplas en el orden de COLUMNAS_EXPORTACION, por fecha
+        """
+        from models.usuario_model import Usuario
+        from models.proveedor_model import Proveedor
+        from models.producto_model import Producto
+
+        consulta = db.select(
+            Compra.id, Compra.fecha, Compra.usuario_id, Usuario.nombre, Proveedor.nombre,
+            Compra.producto_id, Producto.nombre, Compra.cantidad, Compra.precio_unitario, Compra.total,
+            Compra.estado, Compra.aprobado_por, Compra.fecha_aprobacion, Compra.comentarios
+        ).outerjoin(Usuario, Compra.usuario_id == Usuario.id) \
+         .outerjoin(Proveedor, Compra.proveedor_id == Proveedor.id) \
+         .outerjoin(Producto, Compra.producto_id == Producto.id)
+        if desde:
+            consulta = consulta.where(Compra.fecha >= desde)
+        if hasta:
+            consulta = consulta.where(Compra.fecha < hasta)
+        if estado:
+            consulta = consulta.where(Compra.estado == estado)
+        consulta = consulta.order_by(Compra.fecha, Compra.id).execution_options(yield_per=LOTE_CURSOR)
+        return db.session.execute(consulta)
+
     @staticmethod
     def get_by_id(id):
         """
@@ -173,37 +536,44 @@ class Compra(db.Model):
         return Compra.query.get(id)
     
     @staticmethod
-    def get_by_usuario(usuario_id):
+    def get_by_usuario(usuario_id, carga='joined'):
         """
         Obtener compras de un usuario específico
         Utilizado para que usuarios vean solo sus compras
         
         Args:
             usuario_id (int): ID del usuario
+            carga (str, optional): Estrategia de carga de relaciones
             
         Returns:
             list: Lista de compras del usuario
         """
-        return Compra.query.filter_by(usuario_id=usuario_id).all()
+        return Compra._query(carga).filter_by(usuario_id=usuario_id).all()
     
     @staticmethod
-    def get_pendientes():
+    def get_pendientes(carga='joined'):
         """
         Obtener solo compras pendientes de aprobación
         Utilizado por administradores para ver qué necesita revisión
         
+        Args:
+            carga (str, optional): Estrategia de carga de relaciones
+        
         Returns:
             list: Lista de compras con estado 'pendiente'
         """
-        return Compra.query.filter_by(estado='pendiente').all()
+        return Compra._query(carga).filter_by(estado='pendiente').all()
     
     @staticmethod
-    def get_aprobadas():
+    def get_aprobadas(carga='joined'):
         """
         Obtener solo compras aprobadas
         Utilizado para estadísticas y reportes
         
+        Args:
+            carga (str, optional): Estrategia de carga de relaciones
+        
         Returns:
             list: Lista de compras con estado 'aprobada'
         """
-        return Compra.query.filter_by(estado='aprobada').all()
+        return Compra._query(carga).filter_by(estado='aprobada').all()
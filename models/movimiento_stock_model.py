@@ -0,0 +1,142 @@
+"""
+================================================================================
+MODELO DE MOVIMIENTOS DE STOCK - SISTEMA DE VENTAS MUEBLERÍA
+================================================================================
+Libro de movimientos de inventario: cada cambio en Producto.stock queda
+registrado con su motivo y la venta/compra que lo originó.
+
+El descuento de stock usa un UPDATE condicional:
+    UPDATE productos SET stock = stock - :n WHERE id = :id AND stock >= :n
+que la base de datos ejecuta de forma atómica. Si otra transacción vendió
+las últimas unidades, el UPDATE no afecta filas y se lanza
+StockInsuficienteError, sin lecturas previas que puedan quedar obsoletas.
+
+Motivos:
+- 'inicial': Stock con el que se creó el producto
+- 'venta': Salida por una venta (directa o por compra aprobada)
+- 'anulacion_venta': Devolución al eliminar una venta
+- 'ajuste_venta': Reversión/aplicación al editar una venta
+- 'ajuste_manual': Cambio de stock desde el formulario de productos
+- 'importacion': Stock fijado por una importación masiva de productos
+================================================================================
+"""
+
+from database import db
+from datetime import datetime
+from sqlalchemy.orm.util import identity_key
+from models.producto_model import Producto
+from utils import cache_catalogo
+
+
+class StockInsuficienteError(Exception):
+    """No hay unidades suficientes del producto para la operación"""
+
+    def __init__(self, producto_id, solicitado):
+        self.producto_id = producto_id
+        self.solicitado = solicitado
+        super().__init__(f'Stock insuficiente para el producto #{producto_id} '
+                         f'({solicitado} unidades solicitadas)')
+
+
+class MovimientoStock(db.Model):
+    """
+    Modelo de Movimiento de Stock - Una entrada o salida de inventario
+    """
+
+    __tablename__ = 'movimientos_stock'
+
+    # ========================================================================
+    # CAMPOS PRINCIPALES
+    # ========================================================================
+
+    id = db.Column(db.Integer, primary_key=True)                                       # ID único
+    fecha = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.current_timestamp())  # Cuándo ocurrió
+    producto_id = db.Column(db.Integer, db.ForeignKey('productos.id'), nullable=False, index=True)  # Producto afectado
+    cambio = db.Column(db.Integer, nullable=False)                                     # Unidades (+ entrada, - salida)
+    motivo = db.Column(db.String(30), nullable=False)                                  # Ver motivos arriba
+
+    # ========================================================================
+    # ORIGEN DEL MOVIMIENTO
+    # ========================================================================
+
+    venta_id = db.Column(db.Integer, nullable=True)                                    # Venta relacionada
+    compra_id = db.Column(db.Integer, nullable=True)                                   # Compra relacionada
+
+    def __init__(self, producto_id, cambio, motivo, venta_id=None, compra_id=None):
+        self.producto_id = producto_id
+        self.cambio = cambio
+        self.motivo = motivo
+        self.venta_id = venta_id
+        self.compra_id = compra_id
+
+    # ========================================================================
+    # OPERACIONES ATÓMICAS SOBRE EL STOCK
+    # ========================================================================
+
+    @staticmethod
+    def actualizar_stock(producto_id, cambio):
+        """
+        Modificar el stock de un producto sin registrar el movimiento
+
+        Usado por aplicar() y por los procesos en lote, que insertan los
+        movimientos todos juntos al final.
+
+        Raises:
+            StockInsuficienteError: Si el descuento dejaría el stock negativo
+        """
+        if not cambio:
+            return
+
+        stmt = db.update(Producto).where(Producto.id == producto_id) \
+            .values(stock=Producto.stock + cambio) \
+            .execution_options(synchronize_session=False)
+        if cambio < 0:
+            stmt = stmt.where(Producto.stock >= -cambio)
+
+        if db.session.execute(stmt).rowcount != 1:
+            raise StockInsuficienteError(producto_id, -cambio)
+        cache_catalogo.marcar_cambio()  # El stock se muestra en el catálogo
+
+        # Mantener coherente el objeto Producto si ya estaba cargado en la sesión
+        producto = db.session.identity_map.get(identity_key(Producto, producto_id))
+        if producto is not None:
+            db.session.expire(producto, ['stock'])
+
+    @staticmethod
+    def aplicar(producto_id, cambio, motivo, venta_id=None, compra_id=None):
+        """
+        Modificar el stock de un producto y registrar el movimiento
+
+        Args:
+            producto_id (int): Producto afectado
+            cambio (int): Unidades a sumar (positivo) o descontar (negativo)
+            motivo (str): Motivo del movimiento
+            venta_id (int, optional): Venta que lo origina
+            compra_id (int, optional): Compra que lo origina
+
+        Raises:
+            StockInsuficienteError: Si el descuento dejaría el stock negativo
+
+        Nota: No confirma la transacción; se ejecuta dentro de la operación
+        que lo llama (venta, aprobación) para que todo sea atómico
+        """
+        if not cambio:
+            return
+
+        MovimientoStock.actualizar_stock(producto_id, cambio)
+        db.session.add(MovimientoStock(producto_id, cambio, motivo, venta_id, compra_id))
+
+    # ========================================================================
+    # MÉTODOS DE CONSULTA
+    # ========================================================================
+
+    @staticmethod
+    def get_by_producto(producto_id, limite=100):
+        """
+        Últimos movimientos de un producto
+
+        Returns:
+            list: Movimientos del más reciente al más antiguo
+        """
+        return MovimientoStock.query.filter_by(producto_id=producto_id) \
+            .order_by(MovimientoStock.id.desc()).limit(limite).all()
@@ -11,10 +11,92 @@ Funcionalidades:
 - Categorización de productos
 - Control de inventario (stock)
 - Métodos de consulta optimizados
+- Búsqueda de texto completo (SQLite FTS5) con facetas
+- Importación y exportación masiva del catálogo (CSV / XLSX)
 ================================================================================
 """
 
-from database import db
+import re
+import threading
+from datetime import datetime
+from database import db, transaccion
+from sqlalchemy import table, column, text
+from werkzeug.utils import secure_filename
+from utils.paginacion import paginar, POR_PAGINA_DEFECTO, POR_PAGINA_MAX
+from utils import imagenes, cache_catalogo
+from utils.exportacion import LOTE_CURSOR
+
+# ============================================================================
+# ÍNDICE DE BÚSQUEDA DE TEXTO COMPLETO (SQLite FTS5)
+# ============================================================================
+
+# Tabla FTS5 de "contenido externo": solo guarda el índice invertido y lee
+# los textos de la tabla productos. Los triggers la mantienen sincronizada con
+# cualquier INSERT/UPDATE/DELETE (incluidos save/update/delete del modelo).
+# - remove_diacritics 2: "sofa" encuentra "Sofá" y viceversa
+# - prefix: índices adicionales para búsquedas por prefijo ("escri*")
+DDL_BUSQUEDA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+        nombre, descripcion, categoria,
+        content='productos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_ai AFTER INSERT ON productos BEGIN
+        INSERT INTO productos_fts(rowid, nombre, descripcion, categoria)
+        VALUES (new.id, new.nombre, new.descripcion, new.categoria);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_ad AFTER DELETE ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, nombre, descripcion, categoria)
+        VALUES ('delete', old.id, old.nombre, old.descripcion, old.categoria);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS productos_fts_au AFTER UPDATE OF nombre, descripcion, categoria ON productos BEGIN
+        INSERT INTO productos_fts(productos_fts, rowid, nombre, descripcion, categoria)
+        VALUES ('delete', old.id, old.nombre, old.descripcion, old.categoria);
+        INSERT INTO productos_fts(rowid, nombre, descripcion, categoria)
+        VALUES (new.id, new.nombre, new.descripcion, new.categoria);
+    END""",
+]
+
+# Referencia ligera a la tabla virtual (no forma parte de db.metadata)
+productos_fts = table('productos_fts', column('rowid'))
+
+# Pesos bm25 por columna: el nombre pesa más que la categoría y la descripción
+RANKING = text('bm25(productos_fts, 10.0, 2.0, 5.0)')
+
+# Rangos de precio para la faceta de precios: (etiqueta, mínimo, máximo)
+RANGOS_PRECIO = [
+    ('Menos de $200', None, 200),
+    ('$200 - $500', 200, 500),
+    ('$500 - $1.000', 500, 1000),
+    ('Más de $1.000', 1000, None),
+]
+
+_indice_listo = False
+_indice_lock = threading.Lock()
+
+def consulta_fts(texto):
+    """
+    Convertir el texto del usuario en una consulta FTS5 segura
+    
+    Cada palabra se busca como prefijo y todas deben aparecer:
+    'sofa cue' → '"sofa"* "cue"*'. Las comillas evitan que la sintaxis de
+    FTS5 (AND, OR, NEAR, paréntesis...) escrita por el usuario cause errores.
+    
+    Returns:
+        str: Consulta MATCH o '' si no hay palabras
+    """
+    palabras = re.findall(r'\w+', texto or '')
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+# ============================================================================
+# IMPORTACIÓN Y EXPORTACIÓN MASIVA
+# ============================================================================
+
+# Columnas de los archivos CSV/XLSX del catálogo (mismo orden al exportar)
+COLUMNAS_IMPORTACION = ['id', 'nombre', 'descripcion', 'precio', 'stock', 'categoria', 'imagen']
+
+LOTE_IN = 500  # Ids por cláusula IN (límite de parámetros de SQLite)
 
 class Producto(db.Model):
     """
@@ -40,9 +122,17 @@ class Producto(db.Model):
     nombre = db.Column(db.String(100), nullable=False)             # Nombre del producto
     descripcion = db.Column(db.Text)                               # Descripción detallada
     precio = db.Column(db.Float, nullable=False)                   # Precio de venta
-    stock = db.Column(db.Integer, default=0)                       # Cantidad en inventario
+    stock = db.Column(db.Integer, default=0, server_default=db.text('0'))  # Cantidad en inventario
     categoria = db.Column(db.String(50))                           # Categoría del producto
-    imagen = db.Column(db.String(200), default='placeholder.jpg')  # Archivo de imagen
+    imagen = db.Column(db.String(200), default='placeholder.jpg', server_default='placeholder.jpg')  # Archivo de imagen
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=db.func.current_timestamp())  # Última modificación (ETag / Last-Modified)
+    
+    # Índices para los filtros por categoría y la marca de agua de ETag
+    __table_args__ = (
+        db.Index('ix_productos_categoria', 'categoria'),
+        db.Index('ix_productos_updated_at', 'updated_at'),
+    )
     
     def __init__(self, nombre, descripcion, precio, stock=0, categoria=None, imagen='placeholder.jpg'):
         """
@@ -70,10 +160,16 @@ class Producto(db.Model):
     def save(self):
         """
         Guardar producto en la base de datos
-        Agrega el objeto a la sesión y confirma los cambios
+        Agrega el objeto a la sesión (se confirma con transaccion())
+        
+        El stock inicial queda registrado en el libro de movimientos
         """
+        from models.movimiento_stock_model import MovimientoStock
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()  # Asigna id
+        cache_catalogo.marcar_cambio()
+        if self.stock:
+            db.session.add(MovimientoStock(self.id, self.stock, 'inicial'))
     
     def update(self, nombre=None, descripcion=None, precio=None, stock=None, categoria=None, imagen=None):
         """
@@ -87,28 +183,34 @@ class Producto(db.Model):
             stock (int, optional): Nuevo stock
             categoria (str, optional): Nueva categoría
             imagen (str, optional): Nueva imagen
+            
+        El cambio de stock se aplica como diferencia atómica y se registra
+        en el libro de movimientos (ver MovimientoStock)
         """
+        from models.movimiento_stock_model import MovimientoStock
         if nombre:
             self.nombre = nombre
         if descripcion:
             self.descripcion = descripcion
         if precio:
             self.precio = precio
-        if stock is not None:  # Permitir stock = 0
-            self.stock = stock
+        if stock is not None and stock != self.stock:  # Permitir stock = 0
+            MovimientoStock.aplicar(self.id, stock - self.stock, 'ajuste_manual')
         if categoria:
             self.categoria = categoria
         if imagen:
             self.imagen = imagen
-        db.session.commit()
+        db.session.flush()
+        cache_catalogo.marcar_cambio()
     
     def delete(self):
         """
         Eliminar producto de la base de datos
-        Remueve el objeto de la sesión y confirma los cambios
+        Remueve el objeto de la sesión (se confirma con transaccion())
         """
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
+        cache_catalogo.marcar_cambio()
     
     # ========================================================================
     # MÉTODOS DE CONSULTA ESTÁTICOS
@@ -124,6 +226,24 @@ class Producto(db.Model):
         """
         return Producto.query.all()
     
+    @staticmethod
+    def get_pagina(cursor=None, por_pagina=POR_PAGINA_DEFECTO, categoria=None):
+        """
+        Obtener una página del catálogo ordenada por ID
+        
+        Args:
+            cursor (str, optional): ID del último producto de la página anterior
+            por_pagina (int): Cantidad de productos por página
+            categoria (str, optional): Limitar a una categoría (usa ix_productos_categoria)
+            
+        Returns:
+            Pagina: Productos de la página solicitada
+        """
+        query = Producto.query
+        if categoria:
+            query = query.filter(Producto.categoria == categoria)
+        return paginar(query, [Producto.id], cursor, por_pagina)
+    
     @staticmethod
     def get_by_id(id):
         """
@@ -150,22 +270,358 @@ class Producto(db.Model):
         """
         return Producto.query.filter_by(categoria=categoria).all()
     
+    # ========================================================================
+    # BÚSQUEDA DE TEXTO COMPLETO
+    # ========================================================================
+    
+    @staticmethod
+    def crear_indice_busqueda(reconstruir=False):
+        """
+        Crear la tabla FTS5 y sus triggers si no existen
+        
+        Args:
+            reconstruir (bool): Volver a indexar todos los productos
+            
+        Nota: Al crearse por primera vez se indexan los productos existentes.
+        No confirma; usar dentro de transaccion(). En otros motores
+        (PostgreSQL) no hace nada: la búsqueda usa ILIKE
+        """
+        if db.session.get_bind().dialect.name != 'sqlite':
+            return
+        existia = db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'productos_fts'"
+        )).first() is not None
+        for sentencia in DDL_BUSQUEDA:
+            db.session.execute(text(sentencia))
+        if reconstruir or not existia:
+            db.session.execute(text("INSERT INTO productos_fts(productos_fts) VALUES ('rebuild')"))
+    
+    @staticmethod
+    def _busqueda_fts():
+        """True si la base de datos soporta el índice FTS5 (SQLite)"""
+        global _indice_listo
+        if db.session.get_bind().dialect.name != 'sqlite':
+            return False
+        if not _indice_listo:
+            # Bases sin migrar: crear el índice en el primer uso
+            with _indice_lock:
+                if not _indice_listo:
+                    with transaccion():
+                        Producto.crear_indice_busqueda()
+                    _indice_listo = True
+        return True
+    
+    @staticmethod
+    def _query_busqueda(texto):
+        """
+        Consulta base de productos que coinciden con el texto
+        
+        Returns:
+            tuple: (query, usa_fts) o (None, False) si el texto no tiene palabras
+        """
+        consulta = consulta_fts(texto)
+        if not consulta:
+            return None, False
+        if Producto._busqueda_fts():
+            query = Producto.query.join(productos_fts, productos_fts.c.rowid == Producto.id) \
+                .filter(text('productos_fts MATCH :consulta').bindparams(consulta=consulta))
+            return query, True
+        
+        # Otros motores: LIKE por palabra (sin ranking ni acentos)
+        query = Producto.query
+        for palabra in re.findall(r'\w+', texto):
+            patron = f'%{palabra}%'
+            query = query.filter(db.or_(Producto.nombre.ilike(patron),
+                                        Producto.descripcion.ilike(patron),
+                                        Producto.categoria.ilike(patron)))
+        return query, False
+    
+    @staticmethod
+    def buscar(texto, categoria=None, precio_min=None, precio_max=None, solo_disponibles=False,
+               limite=POR_PAGINA_DEFECTO):
+        """
+        Buscar productos por texto, ordenados por relevancia
+        
+        Args:
+            texto (str): Palabras a buscar (prefijos, sin importar acentos)
+            categoria (str, optional): Filtrar por categoría
+            precio_min (float, optional): Precio mínimo
+            precio_max (float, optional): Precio máximo (excluido)
+            solo_disponibles (bool): Solo productos con stock
+            limite (int): Máximo de resultados
+            
+        Returns:
+            list: Productos encontrados, del más al menos relevante
+        """
+        query, usa_fts = Producto._query_busqueda(texto)
+        if query is None:
+            return []
+        if categoria:
+            query = query.filter(Producto.categoria == categoria)
+        if precio_min is not None:
+            query = query.filter(Producto.precio >= precio_min)
+        if precio_max is not None:
+            query = query.filter(Producto.precio < precio_max)
+        if solo_disponibles:
+            query = query.filter(Producto.stock > 0)
+        orden = RANKING if usa_fts else Producto.nombre
+        return query.order_by(orden, Producto.id).limit(min(limite, POR_PAGINA_MAX)).all()
+    
+    @staticmethod
+    def facetas(texto):
+        """
+        Conteos por categoría, rango de precio y disponibilidad para un texto
+        
+        Args:
+            texto (str): Palabras buscadas
+            
+        Returns:
+            dict: {'total', 'categorias': [(categoria, n)], 'precios': [(etiqueta, min, max, n)],
+                   'disponibles', 'agotados'}
+        """
+        query, _ = Producto._query_busqueda(texto)
+        if query is None:
+            return {'total': 0, 'categorias': [], 'precios': [], 'disponibles': 0, 'agotados': 0}
+        
+        # Todos los conteos en una sola consulta sobre las coincidencias
+        columnas = [
+            db.func.count(Producto.id),
+            db.func.coalesce(db.func.sum(db.case((Producto.stock > 0, 1), else_=0)), 0),
+        ]
+        for _, minimo, maximo in RANGOS_PRECIO:
+            condiciones = []
+            if minimo is not None:
+                condiciones.append(Producto.precio >= minimo)
+            if maximo is not None:
+                condiciones.append(Producto.precio < maximo)
+            columnas.append(db.func.coalesce(db.func.sum(db.case((db.and_(*condiciones), 1), else_=0)), 0))
+        fila = query.with_entities(*columnas).one()
+        total, disponibles = fila[0], fila[1]
+        
+        categorias = query.with_entities(Producto.categoria, db.func.count(Producto.id)) \
+            .group_by(Producto.categoria).order_by(db.func.count(Producto.id).desc()).all()
+        
+        return {
+            'total': total,
+            'categorias': categorias,
+            'precios': [(etiqueta, minimo, maximo, n)
+                        for (etiqueta, minimo, maximo), n in zip(RANGOS_PRECIO, fila[2:])],
+            'disponibles': disponibles,
+            'agotados': total - disponibles,
+        }
+
+    # ========================================================================
+    # IMPORTACIÓN Y EXPORTACIÓN MASIVA (CSV / XLSX)
+    # ========================================================================
+
+    @staticmethod
+    def desde_fila(fila):
+        """
+        Validar una fila de un archivo de importación
+
+        Args:
+            fila (dict): Encabezado → valor (ver COLUMNAS_IMPORTACION)
+
+        Returns:
+            dict: Registro listo para importar_lote(). Sin 'id' es un producto
+                  nuevo; con 'id' las celdas vacías conservan el valor actual
+
+        Raises:
+            ValueError: Con el motivo si la fila no es válida
+        """
+        def texto(clave, maximo):
+            valor = fila.get(clave)
+            valor = '' if valor is None else str(valor).strip()
+            if len(valor) > maximo:
+                raise ValueError(f"'{clave}' supera los {maximo} caracteres")
+            return valor
+
+        registro = {}
+        id_texto = texto('id', 20)
+        if id_texto:
+            try:
+                registro['id'] = int(float(id_texto))
+            except ValueError:
+                raise ValueError(f"id inválido: '{id_texto}'")
+        nuevo = 'id' not in registro
+
+        nombre = texto('nombre', 100)
+        if nombre:
+            registro['nombre'] = nombre
+        elif nuevo:
+            raise ValueError('falta el nombre')
+
+        precio = texto('precio', 20)
+        if precio:
+            try:
+                registro['precio'] = float(precio.replace(',', '.'))
+            except ValueError:
+                raise ValueError(f"precio inválido: '{precio}'")
+            if registro['precio'] < 0:
+                raise ValueError('el precio no puede ser negativo')
+        elif nuevo:
+            raise ValueError('falta el precio')
+
+        stock = texto('stock', 20)
+        if stock:
+            try:
+                registro['stock'] = int(float(stock))
+            except ValueError:
+                raise ValueError(f"stock inválido: '{stock}'")
+            if registro['stock'] < 0:
+                raise ValueError('el stock no puede ser negativo')
+        elif nuevo:
+            registro['stock'] = 0
+
+        for clave, maximo in (('descripcion', 10000), ('categoria', 50)):
+            valor = texto(clave, maximo)
+            if valor:
+                registro[clave] = valor.lower() if clave == 'categoria' else valor
+
+        # Solo se guarda el nombre del archivo: las variantes se generan después
+        imagen = secure_filename(texto('imagen', 200))
+        if imagen:
+            registro['imagen'] = imagen
+        elif nuevo:
+            registro['imagen'] = 'placeholder.jpg'
+        return registro
+
+    @staticmethod
+    def _adelantar_secuencia():
+        """
+        Llevar la secuencia de productos.id al mayor id de la tabla (solo
+        PostgreSQL; en SQLite el próximo id ya sale del máximo)
+
+        Un INSERT con id explícito no consume la secuencia. Nunca la retrocede.
+        """
+        if db.session.connection().dialect.name != 'postgresql':
+            return
+        db.session.execute(text(
+            "SELECT setval(pg_get_serial_sequence('productos', 'id'), GREATEST("
+            "(SELECT COALESCE(MAX(id), 1) FROM productos), "
+            "COALESCE(pg_sequence_last_value(pg_get_serial_sequence('productos', 'id')::regclass), 1)))"
+        ))
+
+    @staticmethod
+    def importar_lote(registros):
+        """
+        Insertar o actualizar un lote de productos con sentencias masivas
+
+        Args:
+            registros (list): Registros validados con desde_fila()
+
+        Returns:
+            tuple: (insertados, actualizados)
+
+        Proceso (una sentencia por paso, no una por producto):
+        1. Buscar cuáles de los 'id' recibidos ya existen
+        2. INSERT ... RETURNING de los nuevos (executemany)
+        3. UPDATE por clave primaria de los existentes; en SQLite esto toma el
+           bloqueo de escritura antes de leer el stock del paso 4
+        4. Fijar el stock y registrar las diferencias en movimientos_stock
+
+        Nota: Un 'id' que no existe se inserta con ese mismo id, así un
+        archivo exportado de otra instalación se puede volver a importar. En
+        PostgreSQL la secuencia de productos.id se adelanta después, para que
+        los productos creados luego no choquen con esos ids
+        """
+        from models.movimiento_stock_model import MovimientoStock
+
+        ids = [registro['id'] for registro in registros if 'id' in registro]
+        existentes = set()
+        for inicio in range(0, len(ids), LOTE_IN):
+            existentes.update(db.session.execute(
+                db.select(Producto.id).where(Producto.id.in_(ids[inicio:inicio + LOTE_IN]))).scalars())
+
+        nuevos = [registro for registro in registros if registro.get('id') not in existentes]
+        cambios = [registro for registro in registros if registro.get('id') in existentes]
+        movimientos = []
+
+        # Agrupar por columnas presentes: cada executemany necesita las mismas claves
+        grupos = {}
+        for registro in nuevos:
+            grupos.setdefault(tuple(sorted(registro)), []).append(registro)
+        for grupo in grupos.values():
+            creados = db.session.execute(db.insert(Producto).returning(Producto.id, Producto.stock), grupo)
+            movimientos.extend({'producto_id': id, 'cambio': stock, 'motivo': 'inicial'}
+                               for id, stock in creados if stock)
+        if any('id' in registro for registro in nuevos):
+            Producto._adelantar_secuencia()
+
+        if cambios:
+            ahora = datetime.utcnow()
+            db.session.execute(db.update(Producto), [
+                dict({clave: valor for clave, valor in registro.items() if clave != 'stock'}, updated_at=ahora)
+                for registro in cambios])
+
+            con_stock = {registro['id']: registro['stock'] for registro in cambios if 'stock' in registro}
+            actuales = {}
+            ids_stock = list(con_stock)
+            for inicio in range(0, len(ids_stock), LOTE_IN):
+                actuales.update(db.session.execute(
+                    db.select(Producto.id, Producto.stock)
+                    .where(Producto.id.in_(ids_stock[inicio:inicio + LOTE_IN]))).all())
+            ajustes = [{'id': id, 'stock': stock} for id, stock in con_stock.items() if stock != actuales[id]]
+            if ajustes:
+                db.session.execute(db.update(Producto), ajustes)
+                movimientos.extend({'producto_id': ajuste['id'], 'cambio': ajuste['stock'] - actuales[ajuste['id']],
+                                    'motivo': 'importacion'} for ajuste in ajustes)
+
+        if movimientos:
+            db.session.execute(db.insert(MovimientoStock), movimientos)
+        cache_catalogo.marcar_cambio()
+        return len(nuevos), len(cambios)
+
+    @staticmethod
+    def filas_exportacion():
+        """
+        Recorrer el catálogo para exportarlo, sin cargarlo entero en memoria
+
+        Returns:
+            Result: Tuplas en el orden de COLUMNAS_IMPORTACION, leídas en bloques
+                    de LOTE_CURSOR filas con un cursor del servidor
+        """
+        columnas = [getattr(Producto, nombre) for nombre in COLUMNAS_IMPORTACION]
+        consulta = db.select(*columnas).order_by(Producto.id) \
+            .execution_options(yield_per=LOTE_CURSOR)
+        return db.session.execute(consulta)
+
     # ========================================================================
     # MÉTODOS DE UTILIDAD
     # ========================================================================
     
-    def get_imagen_url(self):
+    def get_imagen_url(self, variante=None, formato='jpg'):
         """
-        Obtener URL completa de la imagen del producto
+        Obtener URL de la imagen del producto
+        
+        Args:
+            variante (str, optional): 'thumb', 'medium' o 'full'; None para la original
+            formato (str, optional): Extensión de la variante ('jpg', 'webp', 'avif')
         
         Returns:
             str: URL de la imagen o placeholder si no tiene imagen
             
         Lógica:
-        - Si tiene imagen personalizada: /static/images/productos/{imagen}
-        - Si no tiene imagen: /static/images/productos/placeholder.jpg
+        - Sin imagen personalizada: /static/images/productos/placeholder.jpg
+        - Con variantes generadas: /static/images/productos/variantes/{nombre}_{variante}.{formato}
+        - Variantes aún en proceso: /static/images/productos/{imagen} (original)
         """
-        if self.imagen and self.imagen != 'placeholder.jpg':
-            return f'/static/images/productos/{self.imagen}'
-        else:
+        if not self.imagen or self.imagen == 'placeholder.jpg':
             return f'/static/images/productos/placeholder.jpg'
+        if variante and imagenes.obtener_manifiesto(self.imagen):
+            return imagenes.url_variante(self.imagen, variante, formato)
+        return f'/static/images/productos/{self.imagen}'
+    
+    def get_imagen_srcset(self, formato='jpg'):
+        """
+        Obtener el atributo srcset con todas las variantes de un formato
+        
+        Args:
+            formato (str, optional): Extensión de las variantes
+            
+        Returns:
+            str: Lista "url ancho" separada por comas, o '' si no hay variantes
+        """
+        if not self.imagen or self.imagen == 'placeholder.jpg':
+            return ''
+        return imagenes.srcset(self.imagen, formato)
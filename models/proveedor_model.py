@@ -19,7 +19,7 @@ class Proveedor(db.Model):
     
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()
     
     def update(self, nombre=None, contacto=None, telefono=None, email=None, direccion=None):
         if nombre:
@@ -32,11 +32,11 @@ class Proveedor(db.Model):
             self.email = email
         if direccion:
             self.direccion = direccion
-        db.session.commit()
+        db.session.flush()
     
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
     
     @staticmethod
     def get_all():
@@ -0,0 +1,190 @@
+"""
+================================================================================
+MODELO DE TRABAJOS EN SEGUNDO PLANO - SISTEMA DE VENTAS MUEBLERÍA
+================================================================================
+Registra los trabajos pesados (reportes PDF, facturas) que se ejecutan fuera
+del hilo de la petición. La tabla funciona como cola y como historial: el
+navegador consulta el estado y descarga el archivo cuando está listo.
+
+Estados:
+- 'pendiente': En cola, aún no iniciado
+- 'en_proceso': Un proceso del pool lo está generando
+- 'completado': Archivo disponible para descarga
+- 'error': Falló la generación, murió el proceso que lo ejecutaba o superó
+  el tiempo máximo (ver campo error)
+
+Los trabajos terminados y sus archivos se eliminan pasado el tiempo de
+retención (ver utils.trabajos.limpiar).
+================================================================================
+"""
+
+import json
+import uuid
+from database import db
+from datetime import datetime
+
+ESTADOS_ACTIVOS = ('pendiente', 'en_proceso')
+
+
+class Trabajo(db.Model):
+    """
+    Modelo de Trabajo - Una tarea encolada en el ejecutor de segundo plano
+    """
+
+    __tablename__ = 'trabajos'
+
+    # ========================================================================
+    # CAMPOS PRINCIPALES
+    # ========================================================================
+
+    id = db.Column(db.String(32), primary_key=True)                        # Identificador público (uuid)
+    tipo = db.Column(db.String(30), nullable=False)                        # reporte_ventas, reporte_productos, factura
+    parametros = db.Column(db.Text)                                        # Parámetros en JSON
+    estado = db.Column(db.String(20), default='pendiente', server_default='pendiente')  # pendiente, en_proceso, completado, error
+    progreso = db.Column(db.Integer, default=0, server_default=db.text('0'))  # Porcentaje 0-100
+
+    # ========================================================================
+    # RESULTADO Y CONTROL
+    # ========================================================================
+
+    archivo = db.Column(db.String(255))                                    # Ruta del archivo generado
+    nombre_descarga = db.Column(db.String(100))                            # Nombre sugerido al descargar
+    error = db.Column(db.Text)                                             # Mensaje de error si falló
+    solicitado_por = db.Column(db.Integer)                                 # ID de quien lo pidió
+    tipo_solicitante = db.Column(db.String(20))                            # 'usuario' o 'administrador'
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.current_timestamp())  # Cuándo se encoló
+    fecha_fin = db.Column(db.DateTime, nullable=True)                      # Cuándo terminó
+
+    def __init__(self, tipo, parametros=None, nombre_descarga=None, solicitado_por=None, tipo_solicitante=None):
+        """
+        Constructor del trabajo
+
+        Args:
+            tipo (str): Tipo de trabajo registrado en utils.trabajos
+            parametros (dict, optional): Datos necesarios para ejecutarlo
+            nombre_descarga (str, optional): Nombre del archivo al descargar
+            solicitado_por (int, optional): ID del usuario/administrador
+            tipo_solicitante (str, optional): 'usuario' o 'administrador'
+        """
+        self.id = uuid.uuid4().hex
+        self.tipo = tipo
+        self.parametros = json.dumps(parametros or {})
+        self.nombre_descarga = nombre_descarga
+        self.solicitado_por = solicitado_por
+        self.tipo_solicitante = tipo_solicitante
+        self.estado = 'pendiente'
+        self.progreso = 0
+
+    # ========================================================================
+    # MÉTODOS DE PERSISTENCIA
+    # ========================================================================
+
+    def save(self):
+        db.session.add(self)
+        db.session.flush()
+
+    def update(self, estado=None, progreso=None, archivo=None, error=None):
+        """
+        Actualizar el avance del trabajo
+
+        Lógica especial:
+        - Al pasar a 'completado' o 'error' se registra la fecha de fin
+        """
+        if estado:
+            self.estado = estado
+            if estado in ['completado', 'error']:
+                self.fecha_fin = datetime.utcnow()
+        if progreso is not None:
+            self.progreso = progreso
+        if archivo:
+            self.archivo = archivo
+        if error:
+            self.error = error
+        db.session.flush()
+
+    def delete(self):
+        db.session.delete(self)
+        db.session.flush()
+
+    @staticmethod
+    def registrar_progreso(trabajo_id, progreso):
+        """
+        Guardar el avance en una conexión propia, confirmado de inmediato
+
+        Se usa durante la generación: la sesión tiene abierta la lectura por
+        lotes de los datos (yield_per) y un commit suyo la cortaría.
+        """
+        with db.engine.begin() as conexion:
+            conexion.execute(
+                db.update(Trabajo)
+                .where(Trabajo.id == trabajo_id, Trabajo.estado == 'en_proceso')
+                .values(progreso=progreso)
+            )
+
+    @staticmethod
+    def marcar_error(trabajo_id, mensaje):
+        """
+        Pasar a 'error' un trabajo que sigue activo
+
+        Returns:
+            bool: False si el trabajo ya había terminado
+
+        Nota: No confirma; usar dentro de transaccion()
+        """
+        resultado = db.session.execute(
+            db.update(Trabajo)
+            .where(Trabajo.id == trabajo_id, Trabajo.estado.in_(ESTADOS_ACTIVOS))
+            .values(estado='error', error=mensaje, fecha_fin=datetime.utcnow())
+        )
+        return resultado.rowcount > 0
+
+    @staticmethod
+    def marcar_abandonados(limite, mensaje):
+        """
+        Pasar a 'error' los trabajos activos encolados antes de limite
+
+        Returns:
+            int: Trabajos marcados
+
+        Nota: No confirma; usar dentro de transaccion()
+        """
+        resultado = db.session.execute(
+            db.update(Trabajo)
+            .where(Trabajo.estado.in_(ESTADOS_ACTIVOS), Trabajo.fecha_creacion < limite)
+            .values(estado='error', error=mensaje, fecha_fin=datetime.utcnow())
+        )
+        return resultado.rowcount
+
+    # ========================================================================
+    # MÉTODOS DE CONSULTA
+    # ========================================================================
+
+    @staticmethod
+    def get_by_id(id):
+        return Trabajo.query.get(id)
+
+    @staticmethod
+    def get_expirados(limite):
+        """Trabajos terminados (completados o con error) antes de limite"""
+        return Trabajo.query.filter(
+            Trabajo.estado.notin_(ESTADOS_ACTIVOS),
+            db.func.coalesce(Trabajo.fecha_fin, Trabajo.fecha_creacion) < limite
+        ).all()
+
+    def get_parametros(self):
+        return json.loads(self.parametros or '{}')
+
+    def puede_ver(self, user_id, tipo_usuario):
+        """Los administradores ven todo; cada usuario solo sus trabajos"""
+        if tipo_usuario == 'administrador':
+            return True
+        return self.tipo_solicitante == tipo_usuario and self.solicitado_por == user_id
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'estado': self.estado,
+            'progreso': self.progreso,
+            'error': self.error,
+        }
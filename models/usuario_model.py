@@ -1,4 +1,6 @@
 from database import db
+from utils.seguridad import hash_password, verificar_password, es_hash
+from utils.paginacion import paginar, POR_PAGINA_DEFECTO
 
 class Usuario(db.Model):
     __tablename__ = 'usuarios'
@@ -6,18 +8,34 @@ class Usuario(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(100), nullable=False)
     username = db.Column(db.String(50), unique=True, nullable=False)
-    password = db.Column(db.String(100), nullable=False)
+    password = db.Column(db.String(255), nullable=False)
     rol = db.Column(db.String(20), nullable=False)
     
+    # Índice normalizado para buscar usuarios sin distinguir mayúsculas
+    __table_args__ = (
+        db.Index('ix_usuarios_username_lower', db.func.lower(username)),
+    )
+    
     def __init__(self, nombre, username, password, rol):
         self.nombre = nombre
         self.username = username
-        self.password = password
+        self.set_password(password)
         self.rol = rol
     
+    def set_password(self, password):
+        self.password = hash_password(password)
+    
+    def check_password(self, password):
+        if not verificar_password(self.password, password):
+            return False
+        # Actualizar contraseñas heredadas en texto plano a hash
+        if not es_hash(self.password):
+            self.set_password(password)
+        return True
+    
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()
     
     def update(self, nombre=None, username=None, password=None, rol=None):
         if nombre:
@@ -25,19 +43,31 @@ class Usuario(db.Model):
         if username:
             self.username = username
         if password:
-            self.password = password
+            self.set_password(password)
         if rol:
             self.rol = rol
-        db.session.commit()
+        db.session.flush()
     
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
     
     @staticmethod
     def get_all():
         return Usuario.query.all()
     
+    @staticmethod
+    def get_pagina(cursor=None, por_pagina=POR_PAGINA_DEFECTO):
+        return paginar(Usuario.query, [Usuario.id], cursor, por_pagina)
+    
     @staticmethod
     def get_by_id(id):
         return Usuario.query.get(id)
+    
+    @staticmethod
+    def get_by_username(username):
+        # Sin distinguir mayúsculas; si hay registros heredados que solo
+        # difieren en mayúsculas, gana el que coincide exactamente
+        username = username.strip()
+        return Usuario.query.filter(db.func.lower(Usuario.username) == username.lower()) \
+            .order_by((Usuario.username == username).desc(), Usuario.id).first()
@@ -19,6 +19,16 @@ Características importantes:
 
 from database import db
 from datetime import datetime
+from sqlalchemy.orm import joinedload
+from utils.paginacion import paginar, POR_PAGINA_DEFECTO
+from models.venta_resumen_model import VentaResumenDiario
+from models.producto_model import Producto
+from models.movimiento_stock_model import MovimientoStock
+from utils.exportacion import LOTE_CURSOR
+
+# Columnas de la exportación contable (CSV / XLSX)
+COLUMNAS_EXPORTACION = ['id', 'fecha', 'cliente', 'producto_id', 'producto', 'cantidad',
+                        'precio_unitario', 'total', 'tipo_venta', 'compra_id', 'vendedor_id']
 
 class Venta(db.Model):
     """
@@ -40,7 +50,9 @@ class Venta(db.Model):
     # ========================================================================
     
     id = db.Column(db.Integer, primary_key=True)                           # ID único de la venta
-    fecha = db.Column(db.DateTime, default=datetime.utcnow)                # Fecha de creación automática
+    fecha = db.Column(db.DateTime, default=datetime.utcnow, server_default=db.func.current_timestamp())  # Fecha de creación automática
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow,
+                           server_default=db.func.current_timestamp())  # Última modificación (ETag / Last-Modified)
     cliente = db.Column(db.String(100), nullable=False)                    # Nombre del cliente
     
     # ========================================================================
@@ -58,7 +70,19 @@ class Venta(db.Model):
     
     compra_id = db.Column(db.Integer, db.ForeignKey('compras.id'), nullable=True)       # Compra relacionada (opcional)
     vendedor_id = db.Column(db.Integer, db.ForeignKey('administradores.id'), nullable=True)  # Quien vendió/aprobó
-    tipo_venta = db.Column(db.String(20), default='directa')               # 'directa' o 'por_compra'
+    tipo_venta = db.Column(db.String(20), default='directa', server_default='directa')  # 'directa' o 'por_compra'
+    
+    # ========================================================================
+    # ÍNDICES (ver migraciones/m0002_indices_consultas.py)
+    # ========================================================================
+    
+    __table_args__ = (
+        db.Index('ix_ventas_tipo_venta_fecha', 'tipo_venta', 'fecha'),     # Directas / por compra por fecha
+        db.Index('ix_ventas_fecha', 'fecha'),                              # Listado general y ventas del mes
+        db.Index('ix_ventas_updated_at', 'updated_at'),                    # Marca de agua para ETag / Last-Modified
+        db.Index('ix_ventas_producto_id', 'producto_id'),                  # Ventas de un producto
+        db.Index('ix_ventas_compra_id', 'compra_id'),                      # Venta generada por una compra
+    )
     
     # ========================================================================
     # DEFINICIÓN DE RELACIONES
@@ -99,9 +123,18 @@ class Venta(db.Model):
         """
         Guardar venta en la base de datos
         Utilizado tanto para ventas directas como automáticas
+        
+        El descuento de stock y el resumen diario se aplican en la misma
+        transacción que el INSERT de la venta (se confirma con transaccion())
+        
+        Raises:
+            StockInsuficienteError: Si no hay unidades suficientes
         """
         db.session.add(self)
-        db.session.commit()
+        db.session.flush()  # Asigna id y fecha por defecto
+        MovimientoStock.aplicar(self.producto_id, -self.cantidad, 'venta',
+                                venta_id=self.id, compra_id=self.compra_id)
+        self._aplicar_resumen(signo=1)
     
     def update(self, cliente=None, producto_id=None, cantidad=None, precio_unitario=None):
         """
@@ -115,7 +148,14 @@ class Venta(db.Model):
             
         Restricción: Solo se pueden editar ventas directas
         Las ventas por compra son inmutables una vez creadas
+        
+        Raises:
+            StockInsuficienteError: Si el nuevo producto/cantidad no tiene stock
         """
+        # Retirar del resumen y devolver al stock los valores anteriores
+        self._aplicar_resumen(signo=-1)
+        producto_anterior, cantidad_anterior = self.producto_id, self.cantidad
+        
         if cliente:
             self.cliente = cliente
         if producto_id:
@@ -128,16 +168,29 @@ class Venta(db.Model):
         # Recalcular total si cambió cantidad o precio
         if cantidad and precio_unitario:
             self.total = cantidad * precio_unitario
-            
-        db.session.commit()
+        
+        if (producto_anterior, cantidad_anterior) != (self.producto_id, self.cantidad):
+            MovimientoStock.aplicar(producto_anterior, cantidad_anterior, 'ajuste_venta', venta_id=self.id)
+            MovimientoStock.aplicar(self.producto_id, -self.cantidad, 'ajuste_venta', venta_id=self.id)
+        self._aplicar_resumen(signo=1)
+        db.session.flush()
     
     def delete(self):
         """
         Eliminar venta de la base de datos
         Restricción: Solo se pueden eliminar ventas directas
+        
+        Las unidades vendidas vuelven al stock del producto
         """
+        self._aplicar_resumen(signo=-1)
+        MovimientoStock.aplicar(self.producto_id, self.cantidad, 'anulacion_venta', venta_id=self.id)
         db.session.delete(self)
-        db.session.commit()
+        db.session.flush()
+    
+    def _aplicar_resumen(self, signo):
+        """Sumar (signo=1) o restar (signo=-1) esta venta del resumen diario"""
+        VentaResumenDiario.aplicar(self.fecha, self.producto_id, self.tipo_venta,
+                                   self.cantidad, self.total, signo)
     
     # ========================================================================
     # MÉTODOS DE CONSULTA ESTÁTICOS
@@ -166,7 +219,118 @@ class Venta(db.Model):
             Venta: Objeto venta o None si no existe
         """
         return Venta.query.get(id)
+
+    @staticmethod
+    def get_marca_agua(id):
+        """
+        Validador del detalle de una venta (ver utils/condicional.py)
+
+        Args:
+            id (int): ID de la venta
+
+        Returns:
+            tuple: updated_at de la venta, su producto y su compra, o None si
+                   la venta no existe
+        """
+        from models.compra_model import Compra
+        consulta = db.select(Venta.id, Venta.updated_at, Producto.updated_at, Compra.updated_at) \
+            .join(Producto, Venta.producto_id == Producto.id) \
+            .outerjoin(Compra, Venta.compra_id == Compra.id) \
+            .where(Venta.id == id)
+        fila = db.session.execute(consulta).one_or_none()
+        return tuple(fila) if fila is not None else None
+
+    @staticmethod
+    def get_pagina(cursor=None, por_pagina=POR_PAGINA_DEFECTO, tipo_venta=None):
+        """
+        Obtener una página de ventas, de la más reciente a la más antigua
+        
+        Args:
+            cursor (str, optional): Cursor (fecha|id) de la página anterior
+            por_pagina (int): Cantidad de ventas por página
+            tipo_venta (str, optional): Filtrar por 'directa' o 'por_compra'
+            
+        Returns:
+            Pagina: Ventas de la página con su producto ya cargado
+        """
+        query = Venta.query.options(joinedload(Venta.producto))
+        if tipo_venta:
+            query = query.filter_by(tipo_venta=tipo_venta)
+        return paginar(query, [Venta.fecha, Venta.id], cursor, por_pagina, descendente=True)
+    
+    @staticmethod
+    def stats():
+        """
+        Calcular cantidad e ingresos de ventas por tipo en una sola consulta
+        Utilizado por el listado de ventas y los reportes
+        
+        Returns:
+            dict: {'cantidad', 'ingresos', 'directa': {...}, 'por_compra': {...}}
+                  donde cada tipo tiene 'cantidad' e 'ingresos'
+        """
+        filas = VentaResumenDiario.por_tipo()
+        
+        resultado = {
+            'cantidad': 0,
+            'ingresos': 0.0,
+            'directa': {'cantidad': 0, 'ingresos': 0.0},
+            'por_compra': {'cantidad': 0, 'ingresos': 0.0},
+        }
+        for tipo_venta, cantidad, ingresos in filas:
+            cantidad, ingresos = cantidad or 0, ingresos or 0.0
+            resultado.setdefault(tipo_venta, {'cantidad': 0, 'ingresos': 0.0})
+            resultado[tipo_venta]['cantidad'] += cantidad
+            resultado[tipo_venta]['ingresos'] += ingresos
+            resultado['cantidad'] += cantidad
+            resultado['ingresos'] += ingresos
+        return resultado
     
+    @staticmethod
+    def iter_filas_reporte(tamano_lote=1000):
+        """
+        Recorrer las ventas para reportes sin crear objetos ORM
+        
+        Las filas se leen de la base de datos por lotes (yield_per), por lo
+        que la memoria usada no depende del número de ventas.
+        
+        Args:
+            tamano_lote (int): Filas leídas por cada viaje a la base de datos
+            
+        Returns:
+            Query: Iterable de tuplas (id, fecha, cliente, producto, cantidad,
+                   precio_unitario, total, tipo_venta, compra_id)
+        """
+        return db.session.query(
+            Venta.id, Venta.fecha, Venta.cliente, Producto.nombre, Venta.cantidad,
+            Venta.precio_unitario, Venta.total, Venta.tipo_venta, Venta.compra_id
+        ).outerjoin(Producto, Venta.producto_id == Producto.id).order_by(Venta.id).yield_per(tamano_lote)
+    
+    @staticmethod
+    def filas_exportacion(desde=None, hasta=None, tipo_venta=None):
+        """
+        Ventas para la exportación contable, leídas con un cursor por bloques
+
+        Args:
+            desde (datetime, optional): Inicio del rango (incluido)
+            hasta (datetime, optional): Fin del rango (excluido)
+            tipo_venta (str, optional): 'directa' o 'por_compra'
+
+        Returns:
+            Result: Tuplas en el orden de COLUMNAS_EXPORTACION, por fecha
+        """
+        consulta = db.select(
+            Venta.id, Venta.fecha, Venta.cliente, Venta.producto_id, Producto.nombre, Venta.cantidad,
+            Venta.precio_unitario, Venta.total, Venta.tipo_venta, Venta.compra_id, Venta.vendedor_id
+        ).outerjoin(Producto, Venta.producto_id == Producto.id)
+        if desde:
+            consulta = consulta.where(Venta.fecha >= desde)
+        if hasta:
+            consulta = consulta.where(Venta.fecha < hasta)
+        if tipo_venta:
+            consulta = consulta.where(Venta.tipo_venta == tipo_venta)
+        consulta = consulta.order_by(Venta.fecha, Venta.id).execution_options(yield_per=LOTE_CURSOR)
+        return db.session.execute(consulta)
+
     @staticmethod
     def get_ventas_directas():
         """
@@ -196,8 +360,7 @@ class Venta(db.Model):
         Returns:
             float: Suma total de todas las ventas o 0 si no hay ventas
         """
-        result = db.session.query(db.func.sum(Venta.total)).scalar()
-        return result or 0
+        return VentaResumenDiario.totales()['ingresos']
     
     @staticmethod
     def get_ventas_mes_actual():
@@ -212,3 +375,24 @@ class Venta(db.Model):
         # Calcular inicio del mes actual
         inicio_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         return Venta.query.filter(Venta.fecha >= inicio_mes).all()
+    
+    @staticmethod
+    def get_resumen_mes_actual():
+        """
+        Obtener totales del mes actual desde el resumen diario
+        
+        Returns:
+            dict: {'cantidad', 'unidades', 'ingresos'} del mes en curso
+        """
+        inicio_mes = datetime.now().replace(day=1).date()
+        return VentaResumenDiario.totales(desde=inicio_mes)
+    
+    @staticmethod
+    def get_totales_por_producto(desde=None, hasta=None):
+        """
+        Obtener ventas agrupadas por producto desde el resumen diario
+        
+        Returns:
+            list: Tuplas (producto_id, cantidad, unidades, ingresos)
+        """
+        return VentaResumenDiario.por_producto(desde, hasta)
@@ -0,0 +1,184 @@
+"""
+================================================================================
+MODELO DE RESUMEN DIARIO DE VENTAS - SISTEMA DE VENTAS MUEBLERÍA
+================================================================================
+Tabla materializada con los acumulados de ventas por día, producto y tipo de
+venta. Se mantiene de forma incremental en la misma transacción que
+Venta.save/update/delete, por lo que las consultas de totales, mes actual y
+ventas por producto recorren días (no ventas individuales).
+
+Para reconstruirla desde cero (por ejemplo tras una carga masiva):
+    flask --app app reconstruir-resumen-ventas
+================================================================================
+"""
+
+from database import db
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+class VentaResumenDiario(db.Model):
+    """
+    Acumulado de ventas de un producto en un día para un tipo de venta
+
+    Clave: (dia, producto_id, tipo_venta)
+    Medidas: número de ventas, unidades vendidas e ingresos
+    """
+
+    __tablename__ = 'ventas_resumen_diario'
+
+    dia = db.Column(db.Date, primary_key=True)                      # Día de la venta (UTC)
+    producto_id = db.Column(db.Integer, primary_key=True)           # Producto vendido
+    tipo_venta = db.Column(db.String(20), primary_key=True)         # 'directa' o 'por_compra'
+    num_ventas = db.Column(db.Integer, nullable=False, default=0, server_default=db.text('0'))  # Cantidad de ventas
+    unidades = db.Column(db.Integer, nullable=False, default=0, server_default=db.text('0'))  # Unidades vendidas
+    ingresos = db.Column(db.Float, nullable=False, default=0, server_default=db.text('0'))  # Suma de totales
+
+    # ========================================================================
+    # MANTENIMIENTO INCREMENTAL
+    # ========================================================================
+
+    @staticmethod
+    def aplicar(fecha, producto_id, tipo_venta, cantidad, total, signo=1, ventas=1):
+        """
+        Sumar (o restar) una venta al acumulado de su día
+
+        Args:
+            fecha (datetime): Fecha de la venta
+            producto_id (int): Producto vendido
+            tipo_venta (str): Tipo de venta
+            cantidad (int): Unidades de la venta
+            total (float): Total de la venta
+            signo (int): 1 para agregar la venta, -1 para descontarla
+            ventas (int): Número de ventas que suman cantidad y total (lotes)
+
+        Nota: No confirma la transacción; se ejecuta dentro de la de la venta
+        """
+        fecha = fecha or datetime.utcnow()
+        valores = {
+            'dia': fecha.date(),
+            'producto_id': producto_id,
+            'tipo_venta': tipo_venta or 'directa',
+            'num_ventas': signo * ventas,
+            'unidades': signo * (cantidad or 0),
+            'ingresos': signo * (total or 0),
+        }
+
+        # Upsert atómico: evita carreras entre transacciones concurrentes
+        dialecto = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialecto == 'postgresql' else sqlite.insert
+        stmt = insert(VentaResumenDiario).values(**valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['dia', 'producto_id', 'tipo_venta'],
+            set_={
+                'num_ventas': VentaResumenDiario.num_ventas + stmt.excluded.num_ventas,
+                'unidades': VentaResumenDiario.unidades + stmt.excluded.unidades,
+                'ingresos': VentaResumenDiario.ingresos + stmt.excluded.ingresos,
+            }
+        )
+        db.session.execute(stmt)
+
+    @staticmethod
+    def reconstruir(conexion=None):
+        """
+        Recalcular toda la tabla a partir de las ventas existentes
+        
+        Args:
+            conexion (Connection, optional): Conexión sobre la que ejecutar
+                                             (migraciones); por defecto la sesión
+        
+        Returns:
+            int: Número de filas generadas en el resumen
+            
+        Nota: No confirma; usar dentro de transaccion()
+        """
+        from models.venta_model import Venta
+
+        ejecutor = db.session if conexion is None else conexion
+        dia = db.func.date(Venta.fecha)
+        seleccion = db.select(
+            dia,
+            Venta.producto_id,
+            db.func.coalesce(Venta.tipo_venta, 'directa'),
+            db.func.count(Venta.id),
+            db.func.coalesce(db.func.sum(Venta.cantidad), 0),
+            db.func.coalesce(db.func.sum(Venta.total), 0),
+        ).group_by(dia, Venta.producto_id, Venta.tipo_venta)
+
+        ejecutor.execute(db.delete(VentaResumenDiario))
+        ejecutor.execute(
+            db.insert(VentaResumenDiario).from_select(
+                ['dia', 'producto_id', 'tipo_venta', 'num_ventas', 'unidades', 'ingresos'],
+                seleccion
+            )
+        )
+        if conexion is None:
+            db.session.flush()
+        return ejecutor.execute(db.select(db.func.count()).select_from(VentaResumenDiario)).scalar()
+
+    # ========================================================================
+    # CONSULTAS SOBRE EL RESUMEN
+    # ========================================================================
+
+    @staticmethod
+    def totales(desde=None, hasta=None):
+        """
+        Totales agregados en un rango de días
+
+        Args:
+            desde (date, optional): Primer día incluido
+            hasta (date, optional): Último día incluido
+
+        Returns:
+            dict: {'cantidad', 'unidades', 'ingresos'}
+        """
+        query = db.session.query(
+            db.func.coalesce(db.func.sum(VentaResumenDiario.num_ventas), 0),
+            db.func.coalesce(db.func.sum(VentaResumenDiario.unidades), 0),
+            db.func.coalesce(db.func.sum(VentaResumenDiario.ingresos), 0),
+        )
+        if desde:
+            query = query.filter(VentaResumenDiario.dia >= desde)
+        if hasta:
+            query = query.filter(VentaResumenDiario.dia <= hasta)
+        cantidad, unidades, ingresos = query.one()
+        return {'cantidad': cantidad, 'unidades': unidades, 'ingresos': ingresos}
+
+    @staticmethod
+    def por_tipo():
+        """
+        Cantidad e ingresos agrupados por tipo de venta
+
+        Returns:
+            list: Tuplas (tipo_venta, cantidad, ingresos)
+        """
+        return db.session.query(
+            VentaResumenDiario.tipo_venta,
+            db.func.sum(VentaResumenDiario.num_ventas),
+            db.func.sum(VentaResumenDiario.ingresos),
+        ).group_by(VentaResumenDiario.tipo_venta).all()
+
+    @staticmethod
+    def por_producto(desde=None, hasta=None):
+        """
+        Ventas agrupadas por producto, de mayor a menor ingreso
+
+        Args:
+            desde (date, optional): Primer día incluido
+            hasta (date, optional): Último día incluido
+
+        Returns:
+            list: Tuplas (producto_id, cantidad, unidades, ingresos)
+        """
+        ingresos = db.func.sum(VentaResumenDiario.ingresos)
+        query = db.session.query(
+            VentaResumenDiario.producto_id,
+            db.func.sum(VentaResumenDiario.num_ventas),
+            db.func.sum(VentaResumenDiario.unidades),
+            ingresos,
+        )
+        if desde:
+            query = query.filter(VentaResumenDiario.dia >= desde)
+        if hasta:
+            query = query.filter(VentaResumenDiario.dia <= hasta)
+        return query.group_by(VentaResumenDiario.producto_id).order_by(ingresos.desc()).all()
@@ -0,0 +1,91 @@
+"""
+Configuración común de las pruebas
+
+Las pruebas usan una base SQLite temporal (nunca instance/ventasmuebleria.db):
+DATABASE_URL se fija antes de importar app.py, que la lee al importarse.
+Cada prueba empieza con las tablas vacías.
+
+Ejecutar desde la raíz del proyecto:
+    python -m pytest -q
+"""
+
+import os
+import tempfile
+
+import pytest
+from flask import Flask
+
+_DIRECTORIO = tempfile.mkdtemp(prefix='pruebas_muebleria_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_DIRECTORIO, 'pruebas.db')
+os.environ.setdefault('FLASK_CATALOGO_CACHE_TIPO', 'simple')
+
+from app import app as aplicacion  # noqa: E402
+import database  # noqa: E402
+from database import db, transaccion  # noqa: E402
+import migraciones  # noqa: E402
+
+# Archivos generados (PDFs de trabajos, facturas) fuera de instance/ del proyecto
+aplicacion.instance_path = _DIRECTORIO
+
+with aplicacion.app_context():
+    db.create_all()
+    migraciones.migrar()
+
+
+@pytest.fixture
+def app():
+    """Aplicación con la base vacía"""
+    aplicacion.config['TESTING'] = True
+    with aplicacion.app_context():
+        with transaccion():
+            for tabla in reversed(db.metadata.sorted_tables):
+                db.session.execute(tabla.delete())
+    yield aplicacion
+    with aplicacion.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def cliente(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(app):
+    """Administrador creado en la base; devuelve su id"""
+    from models.administrador_model import Administrador
+
+    with app.app_context():
+        with transaccion():
+            administrador = Administrador('Admin Pruebas', 'admin@pruebas.local', 'clave-pruebas')
+            administrador.save()
+        return administrador.id
+
+@pytest.fixture
+def nueva_app(tmp_path):
+    """Fábrica de aplicaciones mínimas sobre database.init_app(); libera sus conexiones al terminar"""
+    creadas = []
+
+    def crear(uri, **config):
+        app = Flask(__name__, instance_path=str(tmp_path))
+        app.config['SQLALCHEMY_DATABASE_URI'] = uri
+        app.config.update(config)
+        database.init_app(app)
+        creadas.append(app)
+        return app
+
+    yield crear
+    for app in creadas:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+def iniciar_sesion(cliente, user_id, tipo='administrador'):
+    """Sesión ya autenticada en el cliente de pruebas"""
+    with cliente.session_transaction() as sesion:
+        sesion['user'] = 'pruebas'
+        sesion['user_id'] = user_id
+        sesion['tipo'] = tipo
+        sesion['super_admin'] = False
@@ -0,0 +1,194 @@
+"""
+Analítica con pandas (utils.analitica): ingresos agrupados, tiempos de
+aprobación de compras y resumen para las vistas. La agregación por bloques
+debe dar lo mismo que un único group-by sobre todas las ventas.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from database import db, transaccion
+from utils import analitica
+
+
+def _sembrar_ventas(admin):
+    """
+    Ventas de tres productos (dos categorías) en tres días, con y sin vendedor
+
+    Returns:
+        dict: nombre del producto → id
+    """
+    from models.producto_model import Producto
+    from models.venta_model import Venta
+
+    with transaccion():
+        productos = {}
+        for nombre, categoria, precio in (('Mesa', 'mesas', 100.0), ('Silla', 'sillas', 20.0),
+                                          ('Banco', 'sillas', 30.0)):
+            producto = Producto(nombre, f'{nombre} de prueba', precio, stock=100, categoria=categoria)
+            producto.save()
+            productos[nombre] = producto
+        filas = []
+        for numero in range(24):
+            producto = list(productos.values())[numero % 3]
+            cantidad = numero % 4 + 1
+            fecha = datetime(2024, 3, 1 + numero % 3, 10)
+            filas.append({
+                'fecha': fecha, 'updated_at': fecha, 'cliente': 'Cliente', 'producto_id': producto.id,
+                'cantidad': cantidad, 'precio_unitario': producto.precio, 'total': cantidad * producto.precio,
+                'tipo_venta': 'directa' if numero % 2 else 'por_compra',
+                'vendedor_id': admin if numero % 5 else None,
+            })
+        db.session.execute(db.insert(Venta), filas)
+    return {nombre: producto.id for nombre, producto in productos.items()}
+
+
+def _ventas_completas():
+    """Todas las ventas en un DataFrame, para comparar con un group-by en una pasada"""
+    from models.venta_model import Venta
+
+    consulta = db.select(Venta.fecha, Venta.producto_id, Venta.vendedor_id, Venta.tipo_venta,
+                         Venta.cantidad.label('unidades'), Venta.total.label('ingresos'))
+    ventas = pd.read_sql(consulta, db.session.connection(), parse_dates=['fecha'])
+    ventas['ventas'] = 1
+    return ventas
+
+
+# ============================================================================
+# INGRESOS
+# ============================================================================
+
+def test_ingresos_por_agrupacion(app, admin):
+    with app.app_context():
+        _sembrar_ventas(admin)
+        ventas = _ventas_completas()
+        totales, tablas = analitica.ingresos()
+
+        assert totales == {'ventas': 24, 'unidades': int(ventas['unidades'].sum()),
+                           'ingresos': pytest.approx(float(ventas['ingresos'].sum()))}
+        assert set(tablas) == set(analitica.AGRUPACIONES)
+
+        categorias = tablas['categoria']
+        assert list(categorias.index) == ['mesas', 'sillas']    # De mayor a menor ingreso
+        assert categorias['ventas'].to_dict() == {'mesas': 8, 'sillas': 16}
+        assert categorias['ingresos'].sum() == pytest.approx(totales['ingresos'])
+
+        assert set(tablas['producto'].index) == {'Mesa', 'Silla', 'Banco'}
+        assert list(tablas['dia'].index) == [pd.Timestamp(2024, 3, dia) for dia in (1, 2, 3)]
+        assert tablas['vendedor'].loc['Sin vendedor', 'ventas'] == 5    # numero = 0, 5, 10, 15, 20
+        assert tablas['vendedor'].loc['Admin Pruebas', 'ventas'] == 19
+        assert tablas['tipo_venta']['ventas'].to_dict() == {'directa': 12, 'por_compra': 12}
+
+
+def test_ingresos_filtra_por_rango_de_fechas(app, admin):
+    with app.app_context():
+        _sembrar_ventas(admin)
+        totales, tablas = analitica.ingresos(datetime(2024, 3, 2), datetime(2024, 3, 3), agrupaciones=('dia',))
+
+    assert totales['ventas'] == 8
+    assert set(tablas) == {'dia'}
+    assert list(tablas['dia'].index) == [pd.Timestamp(2024, 3, 2)]
+
+
+def test_agregacion_por_bloques_igual_a_una_pasada(app, admin, monkeypatch):
+    with app.app_context():
+        productos = _sembrar_ventas(admin)
+        ventas = _ventas_completas()
+        monkeypatch.setattr(analitica, 'LOTE_LECTURA', 5)    # 24 ventas → 5 bloques, el último incompleto
+        _, tablas = analitica.ingresos(agrupaciones=('producto', 'tipo_venta'))
+
+    medidas = analitica.MEDIDAS
+    nombres = {producto_id: nombre for nombre, producto_id in productos.items()}
+    una_pasada = ventas[medidas].groupby(ventas['producto_id'].map(nombres)).sum()
+    pd.testing.assert_frame_equal(tablas['producto'][medidas].sort_index(), una_pasada[medidas].sort_index(),
+                                  check_names=False, check_dtype=False)
+
+    una_pasada = ventas[medidas].groupby(ventas['tipo_venta']).sum()
+    pd.testing.assert_frame_equal(tablas['tipo_venta'][medidas].sort_index(), una_pasada.sort_index(),
+                                  check_names=False, check_dtype=False)
+
+
+def test_sumar_combina_grupos_de_distintos_bloques():
+    primero = pd.DataFrame({'ventas': [1, 2], 'ingresos': [10.0, 20.0]}, index=['a', 'b'])
+    segundo = pd.DataFrame({'ventas': [3, 4], 'ingresos': [30.0, 40.0]}, index=['b', 'c'])
+
+    assert analitica._sumar(None, primero) is primero
+    suma = analitica._sumar(primero, segundo)
+    assert suma.to_dict('index') == {'a': {'ventas': 1, 'ingresos': 10.0},
+                                     'b': {'ventas': 5, 'ingresos': 50.0},
+                                     'c': {'ventas': 4, 'ingresos': 40.0}}
+
+
+# ============================================================================
+# TIEMPO DE APROBACIÓN
+# ============================================================================
+
+def _sembrar_compras(admin, horas_por_estado):
+    from models.compra_model import Compra
+    from models.producto_model import Producto
+    from models.proveedor_model import Proveedor
+    from models.usuario_model import Usuario
+
+    with transaccion():
+        usuario = Usuario('Cliente', 'cliente_analitica', 'sin-uso', 'cliente')
+        usuario.save()
+        proveedor = Proveedor('Proveedor')
+        proveedor.save()
+        producto = Producto('Mesa', 'Mesa de prueba', 100.0, stock=10, categoria='mesas')
+        producto.save()
+        inicio = datetime(2024, 3, 1, 9)
+        for estado, horas in horas_por_estado.items():
+            for hora in horas:
+                compra = Compra(usuario.id, proveedor.id, producto.id, 1, 100.0)
+                compra.fecha = inicio
+                compra.estado = estado
+                if hora is not None:
+                    compra.fecha_aprobacion = inicio + timedelta(hours=hora)
+                    compra.aprobado_por = admin
+                compra.save()
+
+
+def test_latencia_aprobacion(app, admin):
+    with app.app_context():
+        _sembrar_compras(admin, {'aprobada': [0.5, 2, 2, 30, 200], 'pendiente': [None]})
+        latencia = analitica.latencia_aprobacion()
+
+    assert latencia['rechazada'] is None
+    aprobada = latencia['aprobada']
+    assert aprobada['cantidad'] == 5
+    assert aprobada['mediana'] == pytest.approx(2)
+    assert aprobada['media'] == pytest.approx((0.5 + 2 + 2 + 30 + 200) / 5)
+    histograma = dict(aprobada['histograma'])
+    assert list(histograma) == analitica.ETIQUETAS_LATENCIA
+    assert histograma == {'< 1 h': 1, '1-4 h': 2, '4-12 h': 0, '12-24 h': 0, '1-2 días': 1,
+                          '2-3 días': 0, '3-7 días': 0, '> 7 días': 1}
+
+
+# ============================================================================
+# RESUMEN
+# ============================================================================
+
+def test_resumen_solo_calcula_las_secciones_pedidas(app, admin):
+    with app.app_context():
+        _sembrar_ventas(admin)
+        datos = analitica.resumen(top=2, secciones=('totales', 'producto', 'dia'))
+
+    assert set(datos) == {'ventas', 'unidades', 'ingresos', 'ticket_promedio', 'por_producto', 'por_dia'}
+    assert datos['ticket_promedio'] == pytest.approx(datos['ingresos'] / 24)
+    assert len(datos['por_producto']) == 2
+    nombre, ventas, unidades, ingresos = datos['por_producto'][0]
+    assert isinstance(nombre, str) and type(ventas) is int and type(unidades) is int
+    assert ingresos >= datos['por_producto'][1][3]
+    assert [fila[0] for fila in datos['por_dia']] == [date(2024, 3, dia) for dia in (1, 2, 3)]
+
+
+def test_resumen_sin_ventas(app):
+    with app.app_context():
+        datos = analitica.resumen()
+
+    assert datos['ventas'] == 0
+    assert datos['ticket_promedio'] == 0.0
+    assert datos['por_categoria'] == []
+    assert datos['latencia'] == {'aprobada': None, 'rechazada': None}
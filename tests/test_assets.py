@@ -0,0 +1,73 @@
+"""
+Minificación de CSS y JS: no cambia el significado de selectores, cadenas,
+url(), template literals ni expresiones regulares
+"""
+
+import pytest
+
+from utils.assets import minificar_css, minificar_js
+
+
+@pytest.mark.parametrize('original, esperado', [
+    # Declaraciones: se quitan espacios, comentarios y el último ';'
+    ('/* tema */ .a { color : red ; margin: 0 auto; }', '.a{color:red;margin:0 auto}'),
+    ('.b > .c ,\n .d { width: calc(100% - 10px) }', '.b>.c,.d{width:calc(100% - 10px)}'),
+    # Selectores: el espacio antes de ':' es el combinador descendiente
+    ('.menu :hover { color: red }', '.menu :hover{color:red}'),
+    ('@media (min-width: 768px) { .nav :first-child { margin : 0 } }',
+     '@media (min-width:768px){.nav :first-child{margin:0}}'),
+    # Cadenas y url() se copian sin cambios
+    ('.x::before { content: "a : b ;  c" }', '.x::before{content:"a : b ;  c"}'),
+    ("a[title='uno,  dos'] { font-family: 'Open  Sans' }", "a[title='uno,  dos']{font-family:'Open  Sans'}"),
+    ('.y { background: url( "img/a b.png" ) no-repeat }', '.y{background:url( "img/a b.png" ) no-repeat}'),
+    ('.z { background: url(data:image/png;base64,AA==) }', '.z{background:url(data:image/png;base64,AA==)}'),
+    # Bloques de declaraciones dentro de reglas @
+    ('@font-face { font-family : x; src : url(a.woff) }', '@font-face{font-family:x;src:url(a.woff)}'),
+    ('@keyframes g { from { opacity : 0 } to { opacity: 1; } }', '@keyframes g{from{opacity:0}to{opacity:1}}'),
+])
+def test_minificar_css(original, esperado):
+    assert minificar_css(original) == esperado
+
+
+def test_minificar_js_respeta_template_literals():
+    original = (
+        'function tarjeta(producto) {\n'
+        '    // Plantilla de la tarjeta\n'
+        '    const html = `\n'
+        '        <div class="card">\n'
+        '            // no es un comentario\n'
+        '\n'
+        '            <h5>${producto.nombre} / ${`${producto.stock} u.`}</h5>\n'
+        '        </div>   \n'
+        '    `;   \n'
+        '\n'
+        '    return html;\n'
+        '}\n'
+    )
+
+    assert minificar_js(original) == (
+        'function tarjeta(producto) {\n'
+        'const html = `\n'
+        '        <div class="card">\n'
+        '            // no es un comentario\n'
+        '\n'
+        '            <h5>${producto.nombre} / ${`${producto.stock} u.`}</h5>\n'
+        '        </div>   \n'
+        '    `;\n'
+        'return html;\n'
+        '}'
+    )
+
+
+@pytest.mark.parametrize('original, esperado', [
+    # Cadena continuada con barra invertida: la segunda línea es parte de la cadena
+    ("var s = 'uno \\\n    dos';", "var s = 'uno \\\n    dos';"),
+    # Comillas y barras dentro de una expresión regular o de una cadena
+    ("  var r = /'[/\"]/g;\n  // fin", "var r = /'[/\"]/g;"),
+    ('  var u = "http://x";\n  y = a / b;', 'var u = "http://x";\ny = a / b;'),
+    # Comentario de bloque: sus líneas no se eliminan aunque empiecen con //
+    ('/* uno\n   // dos */\nx();', '/* uno\n   // dos */\nx();'),
+    ('a();\r\n\r\n    // nota\r\n    b();', 'a();\nb();'),
+])
+def test_minificar_js(original, esperado):
+    assert minificar_js(original) == esperado
@@ -0,0 +1,54 @@
+"""
+Caché de la grilla del catálogo: la clave no depende de argumentos ajenos
+a la paginación
+"""
+
+from conftest import iniciar_sesion
+from database import transaccion
+
+
+def _crear_productos(cantidad):
+    from models.producto_model import Producto
+
+    with transaccion():
+        for numero in range(cantidad):
+            Producto(f'Silla {numero}', 'Silla de prueba', 100.0, stock=1, categoria='sillas').save()
+
+
+def test_argumentos_ajenos_no_crean_entradas(app, cliente, admin, monkeypatch):
+    from utils import cache_catalogo
+
+    with app.app_context():
+        _crear_productos(3)
+    iniciar_sesion(cliente, admin)
+
+    generados = []
+    original = cache_catalogo.fragmento
+
+    def contar(partes, generar, ttl=None):
+        def generar_y_contar():
+            generados.append(partes)
+            return generar()
+        return original(partes, generar_y_contar, ttl)
+
+    monkeypatch.setattr(cache_catalogo, 'fragmento', contar)
+
+    for url in ['/productos/', '/productos/?x=1', '/productos/?x=2&cursor=basura', '/productos/?por_pagina=abc']:
+        assert cliente.get(url).status_code == 200
+    assert len(generados) == 1
+
+    cliente.get('/productos/?por_pagina=2')
+    cliente.get('/productos/categoria/sillas?y=3')
+    assert len(generados) == 3
+
+
+def test_enlaces_de_paginacion_sin_argumentos_ajenos(app, cliente, admin):
+    with app.app_context():
+        _crear_productos(3)
+    iniciar_sesion(cliente, admin)
+
+    html = cliente.get('/productos/?por_pagina=2&utm=campana').get_data(as_text=True)
+
+    assert 'cursor=' in html
+    assert 'por_pagina=2' in html
+    assert 'utm' not in html
@@ -0,0 +1,96 @@
+"""
+Listados de compras sin consultas N+1: la cantidad de sentencias SQL por
+página no crece con la cantidad de compras, usuarios, proveedores o productos
+"""
+
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from conftest import iniciar_sesion
+from database import db, transaccion
+
+# Sentencias esperadas por página (listado, conteos y marca de agua de
+# condicional); el límite deja margen para cambios menores en la vista
+MAXIMO_SENTENCIAS = 8
+
+
+def _sembrar_compras(desde, hasta):
+    """
+    Cada compra con su propio usuario, proveedor y producto
+
+    Returns:
+        int: id del primer usuario creado
+    """
+    from models.compra_model import Compra
+    from models.producto_model import Producto
+    from models.proveedor_model import Proveedor
+    from models.usuario_model import Usuario
+
+    with transaccion():
+        # Hash fijo: generar un scrypt por usuario haría lenta la prueba
+        db.session.execute(db.insert(Usuario), [
+            {'nombre': f'Usuario {numero}', 'username': f'usuario{numero}', 'password': 'sin-uso', 'rol': 'cliente'}
+            for numero in range(desde, hasta)
+        ])
+        usuarios = db.session.scalars(
+            db.select(Usuario.id).where(Usuario.username.in_([f'usuario{numero}' for numero in range(desde, hasta)]))
+        ).all()
+        for usuario_id in usuarios:
+            proveedor = Proveedor(f'Proveedor {usuario_id}')
+            proveedor.save()
+            producto = Producto(f'Mesa {usuario_id}', 'Mesa de prueba', 100.0, stock=10, categoria='mesas')
+            producto.save()
+            for estado in ('pendiente', 'aprobada'):
+                compra = Compra(usuario_id, proveedor.id, producto.id, 1, 100.0)
+                compra.estado = estado
+                compra.save()
+    return min(usuarios)
+
+
+@contextmanager
+def _contar_sentencias():
+    sentencias = []
+
+    def registrar(conexion, cursor, sql, parametros, contexto, multiples):
+        sentencias.append(sql)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield sentencias
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+
+def _sentencias(app, cliente, url):
+    with app.app_context(), _contar_sentencias() as sentencias:
+        respuesta = cliente.get(url)
+    assert respuesta.status_code == 200
+    return len(sentencias)
+
+
+@pytest.mark.parametrize('url, tipo', [
+    ('/compras/', 'administrador'),
+    ('/compras/', 'usuario'),
+    ('/compras/pendientes', 'administrador'),
+    ('/reportes/compras', 'administrador'),
+])
+def test_listados_sin_n_mas_1(app, cliente, admin, url, tipo):
+    from models.compra_model import Compra
+
+    with app.app_context():
+        usuario_id = _sembrar_compras(0, 1)
+    iniciar_sesion(cliente, usuario_id if tipo == 'usuario' else admin, tipo)
+    pocas = _sentencias(app, cliente, url)
+
+    with app.app_context():
+        _sembrar_compras(1, 15)
+        if tipo == 'usuario':
+            # El usuario solo ve las suyas: pasarle compras con otros proveedores y productos
+            with transaccion():
+                db.session.execute(db.update(Compra).values(usuario_id=usuario_id))
+    muchas = _sentencias(app, cliente, url)
+
+    assert muchas == pocas
+    assert muchas <= MAXIMO_SENTENCIAS
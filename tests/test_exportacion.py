@@ -0,0 +1,68 @@
+"""
+Exportación CSV/XLSX sin inyección de fórmulas: los textos que una planilla
+evaluaría salen con un apóstrofo delante, y la importación lo quita
+"""
+
+import csv
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+from utils import exportacion
+
+COLUMNAS = ['nombre', 'descripcion', 'precio']
+FILAS = [
+    ('=HYPERLINK("http://ejemplo.test","x")', '+1+1', -5.0),
+    ('@SUM(A1:A2)', '-2', 10.0),
+    ('\tTabulado', 'Sillón', 0),
+    ('Mesa', 'Correo a ventas@muebleria.test', 1.5),
+]
+ESPERADAS = [
+    ['\'=HYPERLINK("http://ejemplo.test","x")', "'+1+1", -5.0],
+    ["'@SUM(A1:A2)", "'-2", 10.0],
+    ["'\tTabulado", 'Sillón', 0],
+    ['Mesa', 'Correo a ventas@muebleria.test', 1.5],
+]
+
+
+@pytest.mark.parametrize('inicio', exportacion.INICIO_FORMULA)
+def test_texto_que_empieza_como_formula(inicio):
+    assert exportacion._texto_seguro(inicio + 'cmd') == "'" + inicio + 'cmd'
+    assert exportacion._sin_apostrofo("'" + inicio + 'cmd') == inicio + 'cmd'
+
+
+def test_valores_que_no_son_formulas_no_cambian():
+    for valor in ('Mesa', "'comillas", '', -3, 2.5, None):
+        assert exportacion._texto_seguro(valor) == valor
+        assert exportacion._sin_apostrofo(valor) == valor
+
+
+def test_csv_neutraliza_formulas():
+    contenido = ''.join(exportacion._generar_csv(COLUMNAS, FILAS)).lstrip('\ufeff')
+
+    filas = list(csv.reader(io.StringIO(contenido, newline='')))
+    assert filas[0] == COLUMNAS
+    assert filas[1:] == [[str(valor) for valor in fila] for fila in ESPERADAS]
+
+
+def test_xlsx_neutraliza_formulas():
+    contenido = b''.join(exportacion._generar_xlsx(COLUMNAS, FILAS, 'Productos'))
+
+    hoja = load_workbook(io.BytesIO(contenido)).active
+    filas = list(hoja.iter_rows(min_row=2))
+    assert [[celda.value for celda in fila] for fila in filas] == ESPERADAS
+    # Ninguna celda quedó guardada como fórmula; los números siguen siendo números
+    assert all(celda.data_type != 'f' for fila in filas for celda in fila)
+    assert filas[0][2].data_type == 'n'
+
+
+@pytest.mark.parametrize('formato', ['csv', 'xlsx'])
+def test_importar_lo_exportado_recupera_el_texto(formato):
+    if formato == 'csv':
+        contenido = ''.join(exportacion._generar_csv(COLUMNAS, FILAS)).encode('utf-8')
+    else:
+        contenido = b''.join(exportacion._generar_xlsx(COLUMNAS, FILAS, 'Productos'))
+
+    filas = list(exportacion.leer_filas(io.BytesIO(contenido), formato))
+    assert [(fila['nombre'], fila['descripcion']) for fila in filas] == [fila[:2] for fila in FILAS]
@@ -0,0 +1,53 @@
+"""
+Exportación de facturas en ZIP: rango de fechas con el mismo formato y
+validación que las demás exportaciones
+"""
+
+import io
+import zipfile
+from datetime import datetime
+
+from conftest import iniciar_sesion
+from database import transaccion
+
+
+def _compras_aprobadas(admin, *fechas):
+    from models.compra_model import Compra
+    from models.producto_model import Producto
+    from models.proveedor_model import Proveedor
+    from models.usuario_model import Usuario
+
+    with transaccion():
+        usuario = Usuario('Cliente', 'cliente_facturas', 'clave-pruebas', 'cliente')
+        usuario.save()
+        proveedor = Proveedor('Proveedor')
+        proveedor.save()
+        producto = Producto('Mesa', 'Mesa de prueba', 100.0, stock=10, categoria='mesas')
+        producto.save()
+        for fecha in fechas:
+            compra = Compra(usuario.id, proveedor.id, producto.id, 1, 100.0)
+            compra.save()
+            compra.estado, compra.aprobado_por, compra.fecha_aprobacion = 'aprobada', admin, fecha
+
+
+def test_rango_incluye_el_ultimo_dia(app, cliente, admin):
+    with app.app_context():
+        _compras_aprobadas(admin, datetime(2025, 3, 1, 9), datetime(2025, 3, 31, 23, 30), datetime(2025, 4, 1, 8))
+    iniciar_sesion(cliente, admin)
+
+    respuesta = cliente.get('/compras/facturas/exportar?desde=2025-03-01&hasta=2025-03-31')
+
+    assert respuesta.status_code == 200
+    assert 'facturas_20250301_20250331.zip' in respuesta.headers['Content-Disposition']
+    with zipfile.ZipFile(io.BytesIO(respuesta.data)) as archivo:
+        assert len(archivo.namelist()) == 2
+
+
+def test_fecha_invalida(app, cliente, admin):
+    iniciar_sesion(cliente, admin)
+
+    respuesta = cliente.get('/compras/facturas/exportar?desde=01/03/2025')
+
+    assert respuesta.status_code == 302
+    with cliente.session_transaction() as sesion:
+        assert ('error', 'Las fechas deben tener el formato AAAA-MM-DD') in sesion['_flashes']
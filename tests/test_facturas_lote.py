@@ -0,0 +1,77 @@
+"""
+Exportación masiva de facturas con el pool de procesos: si un proceso hijo
+muere a mitad de la exportación, las facturas en vuelo se reenvían a un pool
+nuevo y el ZIP sale completo
+
+Los procesos hijos importan este módulo para ejecutar _morir_una_vez: no
+debe importar conftest a nivel de módulo (fijaría otra DATABASE_URL en el
+hijo).
+"""
+
+import io
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+
+from database import transaccion
+from utils.facturas_lote import _renderizar_factura
+
+
+def _marca(pid_web):
+    return os.path.join(tempfile.gettempdir(), f'factura_lote_muere_{pid_web}')
+
+
+def _morir_una_vez(compra_id):
+    """En el proceso hijo: el primero que llega muere sin responder; el resto genera la factura"""
+    try:
+        os.close(os.open(_marca(os.getppid()), os.O_CREAT | os.O_EXCL))
+    except FileExistsError:
+        return _renderizar_factura(compra_id)
+    os._exit(1)
+
+
+def _compras_aprobadas(admin, cantidad):
+    from models.compra_model import Compra
+    from models.producto_model import Producto
+    from models.proveedor_model import Proveedor
+    from models.usuario_model import Usuario
+
+    with transaccion():
+        usuario = Usuario('Cliente', 'cliente_lote', 'clave-pruebas', 'cliente')
+        usuario.save()
+        proveedor = Proveedor('Proveedor')
+        proveedor.save()
+        producto = Producto('Mesa', 'Mesa de prueba', 100.0, stock=10, categoria='mesas')
+        producto.save()
+        for _ in range(cantidad):
+            compra = Compra(usuario.id, proveedor.id, producto.id, 1, 100.0)
+            compra.save()
+            compra.estado, compra.aprobado_por, compra.fecha_aprobacion = 'aprobada', admin, datetime(2025, 3, 1)
+
+
+def test_proceso_hijo_que_muere_no_pierde_facturas(app, cliente, admin, monkeypatch):
+    from conftest import iniciar_sesion
+    from utils import facturas_lote, trabajos
+
+    with app.app_context():
+        _compras_aprobadas(admin, 6)
+        pool_anterior = trabajos.obtener_pool()
+    iniciar_sesion(cliente, admin)
+    monkeypatch.setattr(facturas_lote, '_renderizar_factura', _morir_una_vez)
+
+    try:
+        respuesta = cliente.get('/compras/facturas/exportar')
+        assert respuesta.status_code == 200
+        with zipfile.ZipFile(io.BytesIO(respuesta.data)) as archivo:
+            nombres = archivo.namelist()
+            assert 'errores.txt' not in nombres, archivo.read('errores.txt').decode()
+            assert len(nombres) == 6
+            assert all(archivo.read(nombre).startswith(b'%PDF') for nombre in nombres)
+        assert os.path.exists(_marca(os.getpid()))    # Un hijo murió de verdad
+    finally:
+        if os.path.exists(_marca(os.getpid())):
+            os.remove(_marca(os.getpid()))
+
+    with app.app_context():
+        assert trabajos.obtener_pool() is not pool_anterior
@@ -0,0 +1,87 @@
+"""
+Inicio de sesión: la cuenta inexistente cuesta lo mismo que una contraseña
+incorrecta y, entre registros heredados que solo difieren en mayúsculas, se
+usa el que coincide exactamente
+"""
+
+import pytest
+
+from database import db, transaccion
+from utils import seguridad
+
+
+@pytest.fixture
+def verificaciones(monkeypatch):
+    """Hashes contra los que se verificó una contraseña"""
+    llamadas = []
+    original = seguridad.check_password_hash
+
+    def registrar(guardado, password):
+        llamadas.append(guardado)
+        return original(guardado, password)
+
+    monkeypatch.setattr(seguridad, 'check_password_hash', registrar)
+    return llamadas
+
+
+@pytest.mark.parametrize('tipo, cuenta', [('usuario', 'nadie'), ('administrador', 'nadie@pruebas.local')])
+def test_cuenta_inexistente_verifica_un_hash(app, cliente, verificaciones, tipo, cuenta):
+    respuesta = cliente.post('/login', data={'username': cuenta, 'password': 'clave', 'tipo_usuario': tipo})
+
+    assert respuesta.status_code == 200
+    assert b'Credenciales incorrectas' in respuesta.data
+    assert verificaciones == [seguridad._hash_ficticio()]
+    assert seguridad._hash_ficticio().startswith(seguridad.METODOS_HASH)
+
+
+def test_contrasena_incorrecta_verifica_el_hash_de_la_cuenta(app, cliente, admin, verificaciones):
+    from models.administrador_model import Administrador
+
+    respuesta = cliente.post('/login', data={'username': 'admin@pruebas.local', 'password': 'otra',
+                                             'tipo_usuario': 'administrador'})
+
+    assert b'Credenciales incorrectas' in respuesta.data
+    with app.app_context():
+        assert verificaciones == [Administrador.get_by_id(admin).password]
+
+
+def _usuarios_que_difieren_en_mayusculas():
+    from models.usuario_model import Usuario
+
+    # Registros anteriores al índice lower(username): el UNIQUE distingue mayúsculas
+    with transaccion():
+        db.session.execute(db.insert(Usuario), [
+            {'nombre': nombre, 'username': nombre, 'password': seguridad.hash_password(f'clave-{nombre}'),
+             'rol': 'cliente'}
+            for nombre in ('Ana', 'ana')
+        ])
+    return {usuario.username: usuario.id for usuario in Usuario.get_all()}
+
+
+def test_busqueda_prefiere_la_coincidencia_exacta(app):
+    from models.administrador_model import Administrador
+    from models.usuario_model import Usuario
+
+    with app.app_context():
+        ids = _usuarios_que_difieren_en_mayusculas()
+        assert Usuario.get_by_username('ana').id == ids['ana']
+        assert Usuario.get_by_username(' Ana ').id == ids['Ana']
+        # Sin coincidencia exacta: siempre el más antiguo
+        assert Usuario.get_by_username('ANA').id == min(ids.values())
+
+        with transaccion():
+            for email in ('Admin@Pruebas.local', 'admin@pruebas.local'):
+                Administrador('Admin', email, 'clave').save()
+        assert Administrador.get_by_email('admin@pruebas.local').email == 'admin@pruebas.local'
+        assert Administrador.get_by_email('Admin@Pruebas.local').email == 'Admin@Pruebas.local'
+
+
+def test_login_con_usuarios_que_difieren_en_mayusculas(app, cliente):
+    with app.app_context():
+        ids = _usuarios_que_difieren_en_mayusculas()
+
+    respuesta = cliente.post('/login', data={'username': 'ana', 'password': 'clave-ana', 'tipo_usuario': 'usuario'})
+
+    assert respuesta.status_code == 302
+    with cliente.session_transaction() as sesion:
+        assert sesion['user_id'] == ids['ana']
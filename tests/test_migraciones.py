@@ -0,0 +1,45 @@
+"""
+Migraciones sobre una base existente: el resumen diario de ventas se
+calcula a partir de las ventas que ya había
+"""
+
+from datetime import datetime
+
+import migraciones
+from database import db, transaccion
+
+
+def test_migrar_calcula_el_resumen_de_ventas_existentes(nueva_app, tmp_path):
+    from models.producto_model import Producto
+    from models.venta_model import Venta
+
+    app = nueva_app('sqlite:///' + str(tmp_path / 'existente.db'))
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        with transaccion():
+            producto = Producto('Mesa', 'Mesa de prueba', 60.0, stock=5, categoria='mesas')
+            producto.save()
+            # Ventas cargadas antes de que existiera el resumen (sin pasar por Venta.save)
+            fecha = datetime(2024, 5, 10, 12)
+            db.session.execute(db.insert(Venta), [
+                {'fecha': fecha, 'updated_at': fecha, 'cliente': 'Cliente', 'producto_id': producto.id,
+                 'cantidad': 2, 'precio_unitario': 60.0, 'total': 120.0, 'tipo_venta': 'directa'},
+                {'fecha': fecha, 'updated_at': fecha, 'cliente': 'Cliente', 'producto_id': producto.id,
+                 'cantidad': 1, 'precio_unitario': 60.0, 'total': 60.0, 'tipo_venta': 'por_compra'},
+            ])
+        assert Venta.get_total_ventas() == 0
+
+        assert '0004' in migraciones.migrar()
+
+        stats = Venta.stats()
+        assert stats['cantidad'] == 2
+        assert stats['ingresos'] == 180.0
+        assert stats['directa'] == {'cantidad': 1, 'ingresos': 120.0}
+        assert Venta.get_total_ventas() == 180.0
+
+        # Eliminar una venta anterior a la migración descuenta de una fila existente
+        with transaccion():
+            Venta.query.filter_by(tipo_venta='directa').one().delete()
+        assert Venta.get_total_ventas() == 60.0
+        assert Venta.stats()['cantidad'] == 1
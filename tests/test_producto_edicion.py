@@ -0,0 +1,53 @@
+"""
+Edición de productos: el ajuste de stock pasa por el libro de movimientos
+"""
+
+from conftest import iniciar_sesion
+from database import db, transaccion
+
+
+def _crear_producto(stock):
+    from models.producto_model import Producto
+
+    with transaccion():
+        producto = Producto('Mesa', 'Mesa de prueba', 250.0, stock=stock, categoria='mesas')
+        producto.save()
+    return producto.id
+
+
+def _formulario(stock):
+    return {'nombre': 'Mesa', 'descripcion': 'Mesa de prueba', 'precio': '250',
+            'stock': str(stock), 'categoria': 'mesas'}
+
+
+def test_stock_negativo_no_falla_y_no_cambia_el_producto(app, cliente, admin):
+    from models.producto_model import Producto
+
+    with app.app_context():
+        producto_id = _crear_producto(5)
+    iniciar_sesion(cliente, admin)
+
+    respuesta = cliente.post(f'/productos/edit/{producto_id}', data=_formulario(-3))
+
+    assert respuesta.status_code == 200
+    with cliente.session_transaction() as sesion:
+        assert ('error', 'El stock no puede ser negativo') in sesion['_flashes']
+    with app.app_context():
+        assert db.session.get(Producto, producto_id).stock == 5
+
+
+def test_ajuste_de_stock_queda_en_el_libro(app, cliente, admin):
+    from models.movimiento_stock_model import MovimientoStock
+    from models.producto_model import Producto
+
+    with app.app_context():
+        producto_id = _crear_producto(5)
+    iniciar_sesion(cliente, admin)
+
+    respuesta = cliente.post(f'/productos/edit/{producto_id}', data=_formulario(2))
+
+    assert respuesta.status_code == 302
+    with app.app_context():
+        assert db.session.get(Producto, producto_id).stock == 2
+        cambios = [movimiento.cambio for movimiento in MovimientoStock.get_by_producto(producto_id)]
+        assert sorted(cambios) == [-3, 5]
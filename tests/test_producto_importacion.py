@@ -0,0 +1,52 @@
+"""
+Importación masiva de productos: los ids explícitos de un archivo exportado
+no chocan con los productos que se crean después
+
+La prueba contra un PostgreSQL real (secuencia de productos.id) solo corre
+si TEST_POSTGRES_URL apunta a un servidor disponible.
+"""
+
+import os
+
+import pytest
+
+from database import db, transaccion
+
+
+def _importar_y_crear(ids_importados):
+    """Importar productos con esos ids y crear uno nuevo; devuelve el id del nuevo"""
+    from models.producto_model import Producto
+
+    with transaccion():
+        Producto.importar_lote([
+            {'id': id, 'nombre': f'Importado {id}', 'precio': 10.0, 'stock': 1} for id in ids_importados
+        ])
+    with transaccion():
+        producto = Producto('Mesa', 'Creada después de importar', 100.0)
+        producto.save()
+    return producto.id
+
+
+def test_producto_nuevo_despues_de_importar_con_ids(app):
+    with app.app_context():
+        assert _importar_y_crear([500, 40]) == 501
+
+
+@pytest.mark.skipif(not os.environ.get('TEST_POSTGRES_URL'),
+                    reason='TEST_POSTGRES_URL no apunta a un servidor PostgreSQL')
+def test_postgresql_adelanta_la_secuencia(nueva_app):
+    from models.producto_model import Producto
+
+    app = nueva_app(os.environ['TEST_POSTGRES_URL'])
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        try:
+            primero = _importar_y_crear([500])
+            assert primero == 501
+            # Un id menor no hace retroceder la secuencia
+            assert _importar_y_crear([10]) == primero + 1
+            assert Producto.get_by_id(10).nombre == 'Importado 10'
+        finally:
+            db.session.rollback()
+            db.drop_all(bind_key=None)
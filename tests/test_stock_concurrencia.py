@@ -0,0 +1,88 @@
+"""
+Prueba de estrés del descuento atómico de stock (libro de movimientos)
+
+Muchos hilos aprueban a la vez compras del mismo producto, con más unidades
+pedidas que las disponibles y cada compra aprobada por dos hilos. Al final:
+el stock nunca es negativo, se vende exactamente lo que había, cada compra
+genera a lo sumo una venta y el libro de movimientos cuadra con el stock.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from database import db, transaccion, con_reintentos
+
+STOCK_INICIAL = 30
+COMPRAS = 60
+HILOS = 12
+
+
+def _preparar(admin_id):
+    from models.compra_model import Compra
+    from models.producto_model import Producto
+    from models.proveedor_model import Proveedor
+    from models.usuario_model import Usuario
+
+    with transaccion():
+        producto = Producto('Silla de prueba', 'Prueba de estrés', 100.0, stock=STOCK_INICIAL)
+        producto.save()
+        usuario = Usuario('Cliente', 'cliente_estres', 'clave', 'cliente')
+        usuario.save()
+        proveedor = Proveedor('Proveedor')
+        proveedor.save()
+        compras = [Compra(usuario.id, proveedor.id, producto.id, 1, 100.0) for _ in range(COMPRAS)]
+        for compra in compras:
+            compra.save()
+    return producto.id, [compra.id for compra in compras]
+
+
+def _aprobar(app, compra_id, admin_id):
+    """Lo mismo que compra_controller.aprobar, en un hilo con su propia sesión"""
+    from models.compra_model import Compra, CompraYaProcesadaError
+    from models.movimiento_stock_model import StockInsuficienteError
+
+    with app.app_context():
+        try:
+            compra = Compra.get_by_id(compra_id)
+
+            def aprobar_compra():
+                with transaccion():
+                    return compra.aprobar(admin_id)
+
+            con_reintentos(aprobar_compra, intentos=20)
+            return 'aprobada'
+        except StockInsuficienteError:
+            return 'sin_stock'
+        except CompraYaProcesadaError:
+            return 'ya_procesada'
+        finally:
+            db.session.remove()
+
+
+def test_aprobaciones_concurrentes_no_venden_de_mas(app, admin):
+    from models.compra_model import Compra
+    from models.movimiento_stock_model import MovimientoStock
+    from models.producto_model import Producto
+    from models.venta_model import Venta
+
+    with app.app_context():
+        producto_id, compras = _preparar(admin)
+
+    # Cada compra se intenta aprobar dos veces (doble clic / dos administradores)
+    tareas = compras + compras
+    with ThreadPoolExecutor(max_workers=HILOS) as ejecutor:
+        resultados = list(ejecutor.map(lambda compra_id: _aprobar(app, compra_id, admin), tareas))
+
+    with app.app_context():
+        stock = db.session.get(Producto, producto_id).stock
+        ventas = Venta.query.filter_by(producto_id=producto_id).count()
+        aprobadas = Compra.query.filter_by(estado='aprobada').count()
+        ventas_por_compra = db.session.execute(
+            db.select(Venta.compra_id).group_by(Venta.compra_id).having(db.func.count() > 1)).all()
+        libro = db.session.execute(
+            db.select(db.func.sum(MovimientoStock.cambio)).where(MovimientoStock.producto_id == producto_id)).scalar()
+
+    assert resultados.count('aprobada') == STOCK_INICIAL
+    assert stock == 0
+    assert ventas == aprobadas == STOCK_INICIAL
+    assert ventas_por_compra == []
+    assert libro == stock
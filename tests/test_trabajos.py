@@ -0,0 +1,183 @@
+"""
+Trabajos en segundo plano: avance por etapas, recuperación cuando muere un
+proceso hijo y limpieza de trabajos vencidos
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+
+from database import db, transaccion
+
+
+def _crear_trabajo(tipo='reporte_ventas', **campos):
+    from models.trabajo_model import Trabajo
+
+    trabajo = Trabajo(tipo, nombre_descarga='reporte.pdf')
+    for campo, valor in campos.items():
+        setattr(trabajo, campo, valor)
+    with transaccion():
+        trabajo.save()
+    return trabajo.id
+
+
+def _sembrar_ventas(cantidad):
+    from models.producto_model import Producto
+    from models.venta_model import Venta
+    from models.venta_resumen_model import VentaResumenDiario
+
+    with transaccion():
+        producto = Producto('Mesa', 'Mesa de prueba', 10.0, stock=0, categoria='mesas')
+        producto.save()
+        fecha = datetime(2025, 1, 1)
+        db.session.execute(db.insert(Venta), [
+            {'fecha': fecha, 'updated_at': fecha, 'cliente': 'Cliente', 'producto_id': producto.id,
+             'cantidad': 1, 'precio_unitario': 10.0, 'total': 10.0, 'tipo_venta': 'directa'}
+            for _ in range(cantidad)
+        ])
+        VentaResumenDiario.reconstruir()
+
+
+def test_reporte_informa_avance_por_etapas(app, monkeypatch):
+    from models.trabajo_model import Trabajo
+    from utils import trabajos
+
+    with app.app_context():
+        _sembrar_ventas(5000)
+        trabajo_id = _crear_trabajo()
+
+    avances = []
+    original = Trabajo.registrar_progreso
+
+    def registrar(trabajo_id, progreso):
+        avances.append(progreso)
+        original(trabajo_id, progreso)
+
+    monkeypatch.setattr(Trabajo, 'registrar_progreso', staticmethod(registrar))
+    trabajos.ejecutar_trabajo(trabajo_id)
+
+    with app.app_context():
+        trabajo = Trabajo.get_by_id(trabajo_id)
+        assert trabajo.estado == 'completado'
+        assert trabajo.progreso == 100
+        assert os.path.exists(trabajo.archivo)
+    assert len(avances) >= 4
+    assert avances == sorted(avances)
+    assert trabajos.PROGRESO_INICIO < avances[0] and avances[-1] <= trabajos.PROGRESO_FIN
+
+
+def test_proceso_hijo_que_muere_marca_el_trabajo_con_error(app):
+    from models.trabajo_model import Trabajo
+    from utils import trabajos
+
+    with app.app_context():
+        trabajo_id = _crear_trabajo()
+        # Los callbacks corren después de despertar a quien espera el futuro
+        terminado = threading.Event()
+
+        def al_terminar(futuro):
+            trabajos._al_terminar(app, 'reporte_ventas', trabajo_id, futuro)
+            terminado.set()
+
+        futuro = trabajos.enviar(os._exit, 1)
+        futuro.add_done_callback(al_terminar)
+        assert terminado.wait(timeout=60)
+        assert futuro.exception() is not None
+
+        db.session.expire_all()
+        trabajo = Trabajo.get_by_id(trabajo_id)
+        assert trabajo.estado == 'error'
+        assert 'terminó inesperadamente' in trabajo.error
+
+        # El siguiente envío usa un pool nuevo
+        assert trabajos.enviar(abs, -7).result(timeout=60) == 7
+
+
+def test_limpiar_da_por_perdidos_los_colgados_y_borra_los_vencidos(app):
+    from models.trabajo_model import Trabajo
+    from utils import trabajos
+
+    antiguo = datetime.utcnow() - timedelta(days=3)
+    with app.app_context():
+        directorio = trabajos.directorio_trabajos(app)
+        ruta_vencida = os.path.join(directorio, 'vencido.pdf')
+        ruta_reciente = os.path.join(directorio, 'reciente.pdf')
+        for ruta in (ruta_vencida, ruta_reciente):
+            with open(ruta, 'wb') as archivo:
+                archivo.write(b'%PDF')
+
+        colgado = _crear_trabajo(fecha_creacion=antiguo)
+        vencido = _crear_trabajo(estado='completado', fecha_creacion=antiguo, fecha_fin=antiguo,
+                                 archivo=ruta_vencida)
+        reciente = _crear_trabajo(estado='completado', fecha_fin=datetime.utcnow(), archivo=ruta_reciente)
+
+        resultado = trabajos.limpiar(app)
+
+        db.session.expire_all()
+        assert resultado['abandonados'] == 1
+        assert resultado['eliminados'] == 1
+        assert Trabajo.get_by_id(colgado).estado == 'error'
+        assert Trabajo.get_by_id(vencido) is None
+        assert Trabajo.get_by_id(reciente).estado == 'completado'
+        assert not os.path.exists(ruta_vencida)
+        assert os.path.exists(ruta_reciente)
+        os.remove(ruta_reciente)
+
+
+def test_reporte_encolado_se_genera_en_el_pool(app, cliente, admin):
+    import time
+    from conftest import iniciar_sesion
+
+    with app.app_context():
+        _sembrar_ventas(200)
+    iniciar_sesion(cliente, admin)
+
+    respuesta = cliente.post('/trabajos/reportes/ventas')
+    assert respuesta.status_code == 202
+    url_estado = respuesta.get_json()['url_estado']
+
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        estado = cliente.get(url_estado).get_json()
+        if estado['estado'] in ('completado', 'error'):
+            break
+        time.sleep(0.2)
+
+    assert estado['estado'] == 'completado', estado
+    descarga = cliente.get(respuesta.get_json()['url_descarga'])
+    assert descarga.status_code == 200
+    assert descarga.data.startswith(b'%PDF')
+
+
+def test_reportes_solo_se_encolan_por_post(app, cliente, admin, monkeypatch):
+    from concurrent.futures import Future
+    from conftest import iniciar_sesion
+    from models.trabajo_model import Trabajo
+    from utils import trabajos
+
+    enviados = []
+
+    def enviar(funcion, *args):
+        enviados.append(args)
+        return Future()  # Nunca termina: la prueba solo mira el encolado
+
+    monkeypatch.setattr(trabajos, 'enviar', enviar)
+    iniciar_sesion(cliente, admin)
+
+    # Precarga de enlaces, recargas o volver atrás no crean trabajos
+    for url in ('/reportes/ventas', '/reportes/productos'):
+        assert cliente.get(url).status_code == 405
+    with app.app_context():
+        assert Trabajo.query.count() == 0
+
+    respuesta = cliente.post('/reportes/ventas')
+    assert respuesta.status_code == 302
+    with app.app_context():
+        trabajo = Trabajo.query.one()
+    assert respuesta.headers['Location'].endswith(f'/trabajos/{trabajo.id}')
+    assert enviados == [(trabajo.id,)]
+
+    # La página de reportes muestra formularios POST en lugar de enlaces
+    html = cliente.get('/reportes/').get_data(as_text=True)
+    assert 'action="/reportes/ventas" method="POST"' in html
+    assert 'action="/reportes/productos" method="POST"' in html
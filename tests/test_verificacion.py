@@ -0,0 +1,39 @@
+"""
+flask verificar-indices: planes de las consultas reales de los modelos y
+errores informados por verificación en una base sin migrar
+"""
+
+from sqlalchemy import text
+
+from database import db
+from migraciones.verificacion import verificar
+
+
+def test_base_migrada_sin_recorridos_completos(app):
+    with app.app_context():
+        resultados = verificar()
+
+    assert resultados
+    for nombre, plan, correcto in resultados:
+        assert plan, nombre
+        assert correcto, (nombre, plan)
+
+
+def test_base_sin_migrar_informa_cada_fallo(nueva_app, tmp_path):
+    app = nueva_app('sqlite:///' + str(tmp_path / 'antigua.db'))
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        # Esquema anterior a m0003: compras sin updated_at
+        db.session.execute(text('DROP INDEX ix_compras_updated_at'))
+        db.session.execute(text('ALTER TABLE compras DROP COLUMN updated_at'))
+        db.session.commit()
+
+        resultados = {nombre: (plan, correcto) for nombre, plan, correcto in verificar()}
+
+    plan, correcto = resultados['Compra.get_pendientes']
+    assert not correcto
+    assert 'updated_at' in plan[0]
+    # Las demás verificaciones se siguen ejecutando
+    assert resultados['Venta.get_pagina (todas)'][1]
+    assert resultados['Producto.get_pagina (por categoría)'][1]
@@ -0,0 +1,260 @@
+"""
+================================================================================
+ANALÍTICA DE VENTAS Y COMPRAS (pandas / NumPy)
+================================================================================
+Lee las ventas y compras por columnas con pandas.read_sql (sin crear
+objetos ORM ni tuplas por fila en Python) y calcula con group-by
+vectorizados:
+
+- Ingresos por producto, categoría, día, vendedor y tipo de venta
+- Productos más vendidos (top N)
+- Distribución del tiempo de aprobación/rechazo de las compras
+
+Memoria acotada: las filas llegan en bloques de LOTE_LECTURA (cursor del
+servidor) y cada bloque se agrega y se descarta; solo se acumula una fila
+por grupo. De las compras se conservan únicamente las horas de aprobación
+(float32, para los percentiles).
+
+Cada llamador pide solo las secciones que usa (ver SECCIONES). Los nombres
+de productos y vendedores no viajan en cada fila: se leen una vez de sus
+tablas (pocas filas) y se asocian por id al final.
+
+Las consultas respetan el enrutamiento de la sesión: dentro de una vista
+@solo_lectura se leen de la réplica.
+
+Uso:
+    from utils import analitica
+    datos = analitica.resumen(desde, hasta, secciones=('categoria', 'producto'))
+================================================================================
+"""
+
+import numpy as np
+import pandas as pd
+
+from database import db
+
+LOTE_LECTURA = 50_000    # Filas por bloque del cursor (memoria intermedia por bloque)
+TOP_PRODUCTOS = 10
+
+# Límites (en horas) del histograma de tiempo de aprobación
+LIMITES_LATENCIA = [0, 1, 4, 12, 24, 48, 72, 168, np.inf]
+ETIQUETAS_LATENCIA = ['< 1 h', '1-4 h', '4-12 h', '12-24 h', '1-2 días', '2-3 días', '3-7 días', '> 7 días']
+
+AGRUPACIONES = ('producto', 'categoria', 'dia', 'vendedor', 'tipo_venta')
+SECCIONES = ('totales',) + AGRUPACIONES + ('latencia',)
+
+MEDIDAS = ['ventas', 'unidades', 'ingresos']
+
+
+# ============================================================================
+# LECTURA POR BLOQUES
+# ============================================================================
+
+def _bloques(consulta, **opciones):
+    """Recorrer el resultado de una consulta en DataFrames de LOTE_LECTURA filas"""
+    consulta = consulta.execution_options(stream_results=True)
+    conexion = db.session.connection(bind_arguments={'clause': consulta})
+    yield from pd.read_sql(consulta, conexion, chunksize=LOTE_LECTURA, **opciones)
+
+
+def _filtrar_fechas(consulta, columna, desde, hasta):
+    if desde:
+        consulta = consulta.where(columna >= desde)
+    if hasta:
+        consulta = consulta.where(columna < hasta)
+    return consulta
+
+
+def _leer_tabla(consulta):
+    """Resultado completo de una consulta chica (dimensiones) en un DataFrame"""
+    bloques = list(_bloques(consulta))
+    if not bloques:
+        return pd.DataFrame(columns=list(consulta.selected_columns.keys()))
+    return pd.concat(bloques, ignore_index=True)
+
+
+def cargar_productos():
+    """Productos (id → nombre, categoría); tabla chica, se lee completa"""
+    from models.producto_model import Producto
+
+    productos = _leer_tabla(db.select(Producto.id, Producto.nombre, Producto.categoria))
+    productos['categoria'] = productos['categoria'].fillna('sin categoría')
+    return productos.set_index('id')
+
+
+def cargar_vendedores():
+    """Administradores (id → nombre) que registran ventas"""
+    from models.administrador_model import Administrador
+
+    vendedores = _leer_tabla(db.select(Administrador.id, Administrador.nombre))
+    return vendedores.set_index('id')['nombre']
+
+
+# ============================================================================
+# INGRESOS (AGREGACIÓN POR BLOQUES)
+# ============================================================================
+
+# Columna por la que se agrupa cada bloque; producto y vendedor quedan por id
+# y se traducen a nombres una sola vez, al final (vendedor 0 = sin vendedor)
+_CLAVES = {
+    'producto': lambda bloque, productos: bloque['producto_id'],
+    'categoria': lambda bloque, productos: bloque['producto_id'].map(productos['categoria']).fillna('sin categoría'),
+    'dia': lambda bloque, productos: bloque['fecha'].dt.normalize(),
+    'vendedor': lambda bloque, productos: bloque['vendedor_id'].fillna(0).astype('int64'),
+    'tipo_venta': lambda bloque, productos: bloque['tipo_venta'].fillna('directa'),
+}
+
+
+def _sumar(acumulado, parcial):
+    """Combinar los totales por grupo de un bloque con los anteriores"""
+    if acumulado is None:
+        return parcial
+    return acumulado.add(parcial, fill_value=0)
+
+
+def _ordenar(tabla):
+    return tabla.astype({'ventas': 'int64', 'unidades': 'int64'}).sort_values('ingresos', ascending=False)
+
+
+def ingresos(desde=None, hasta=None, agrupaciones=AGRUPACIONES):
+    """
+    Totales y ventas agrupadas por las dimensiones pedidas, en una pasada
+
+    Args:
+        desde (datetime, optional): Inicio del rango (incluido)
+        hasta (datetime, optional): Fin del rango (excluido)
+        agrupaciones (iterable): Subconjunto de AGRUPACIONES a calcular
+
+    Returns:
+        tuple: (totales, tablas) donde totales es un dict con 'ventas',
+               'unidades' e 'ingresos', y tablas un dict agrupación →
+               DataFrame (índice = valor de la dimensión; columnas ventas,
+               unidades, ingresos; de mayor a menor ingreso, 'dia' por fecha)
+    """
+    from models.venta_model import Venta
+
+    agrupaciones = [a for a in AGRUPACIONES if a in agrupaciones]
+    productos = cargar_productos() if {'producto', 'categoria'} & set(agrupaciones) else None
+    vendedores = cargar_vendedores() if 'vendedor' in agrupaciones else None
+
+    consulta = db.select(Venta.fecha, Venta.producto_id, Venta.vendedor_id, Venta.tipo_venta,
+                         Venta.cantidad.label('unidades'), Venta.total.label('ingresos'))
+    consulta = _filtrar_fechas(consulta, Venta.fecha, desde, hasta)
+
+    totales = {'ventas': 0, 'unidades': 0, 'ingresos': 0.0}
+    acumulados = dict.fromkeys(agrupaciones)
+    for bloque in _bloques(consulta, parse_dates=['fecha']):
+        bloque['ventas'] = 1
+        totales['ventas'] += len(bloque)
+        totales['unidades'] += int(bloque['unidades'].sum())
+        totales['ingresos'] += float(bloque['ingresos'].sum())
+
+        for agrupacion in agrupaciones:
+            parcial = bloque[MEDIDAS].groupby(_CLAVES[agrupacion](bloque, productos).to_numpy(), sort=False).sum()
+            acumulados[agrupacion] = _sumar(acumulados[agrupacion], parcial)
+
+    tablas = {}
+    for agrupacion, tabla in acumulados.items():
+        if tabla is None:
+            tabla = pd.DataFrame({medida: pd.Series(dtype='float64') for medida in MEDIDAS})
+        if agrupacion == 'producto':
+            # Productos homónimos o eliminados quedan en una sola fila
+            tabla.index = tabla.index.map(productos['nombre']).fillna('Producto eliminado')
+            tabla = tabla.groupby(level=0, sort=False).sum()
+        elif agrupacion == 'vendedor':
+            tabla.index = tabla.index.map(vendedores).fillna('Sin vendedor')
+            tabla = tabla.groupby(level=0, sort=False).sum()
+        tabla = _ordenar(tabla)
+        tablas[agrupacion] = tabla.sort_index() if agrupacion == 'dia' else tabla
+    return totales, tablas
+
+
+# ============================================================================
+# TIEMPO DE APROBACIÓN DE COMPRAS
+# ============================================================================
+
+def latencia_aprobacion(desde=None, hasta=None):
+    """
+    Distribución del tiempo entre la solicitud y la aprobación/rechazo
+
+    Args:
+        desde (datetime, optional): Inicio del rango (incluido)
+        hasta (datetime, optional): Fin del rango (excluido)
+
+    Returns:
+        dict: Por estado ('aprobada', 'rechazada'): cantidad, media, mediana,
+              p90 y p99 en horas, e histograma [(etiqueta, cantidad)]; None
+              si no hay compras en ese estado
+    """
+    from models.compra_model import Compra
+
+    estados = ('aprobada', 'rechazada')
+    consulta = db.select(Compra.fecha, Compra.fecha_aprobacion, Compra.estado) \
+        .where(Compra.fecha_aprobacion.is_not(None), Compra.estado.in_(estados))
+    consulta = _filtrar_fechas(consulta, Compra.fecha, desde, hasta)
+
+    horas = {estado: [] for estado in estados}
+    for bloque in _bloques(consulta, parse_dates=['fecha', 'fecha_aprobacion']):
+        diferencia = (bloque['fecha_aprobacion'] - bloque['fecha']).dt.total_seconds().to_numpy() / 3600
+        diferencia = np.clip(diferencia, 0, None).astype(np.float32)
+        estado_bloque = bloque['estado'].to_numpy()
+        for estado in estados:
+            horas[estado].append(diferencia[estado_bloque == estado])
+
+    resultado = {}
+    for estado in estados:
+        valores = np.concatenate(horas[estado]) if horas[estado] else np.empty(0, dtype=np.float32)
+        if valores.size == 0:
+            resultado[estado] = None
+            continue
+        p50, p90, p99 = np.percentile(valores, [50, 90, 99])
+        conteos, _ = np.histogram(valores, bins=LIMITES_LATENCIA)
+        resultado[estado] = {
+            'cantidad': int(valores.size),
+            'media': float(valores.mean(dtype=np.float64)),
+            'mediana': float(p50),
+            'p90': float(p90),
+            'p99': float(p99),
+            'histograma': list(zip(ETIQUETAS_LATENCIA, conteos.tolist())),
+        }
+    return resultado
+
+
+# ============================================================================
+# RESUMEN PARA VISTAS
+# ============================================================================
+
+def _filas(tabla):
+    """DataFrame agrupado → lista de tuplas (clave, ventas, unidades, ingresos) con tipos nativos"""
+    return [(clave.date() if isinstance(clave, pd.Timestamp) else clave, int(ventas), int(unidades), float(ingresos))
+            for clave, ventas, unidades, ingresos in tabla[MEDIDAS].itertuples()]
+
+
+def resumen(desde=None, hasta=None, top=TOP_PRODUCTOS, secciones=SECCIONES):
+    """
+    Indicadores de ventas y compras de un período
+
+    Args:
+        desde (datetime, optional): Inicio del rango (incluido)
+        hasta (datetime, optional): Fin del rango (excluido)
+        top (int): Cantidad de productos del ranking
+        secciones (iterable): Subconjunto de SECCIONES a calcular
+
+    Returns:
+        dict: Según las secciones pedidas: 'ventas', 'unidades', 'ingresos' y
+              'ticket_promedio' ('totales'); una lista de tuplas (clave,
+              ventas, unidades, ingresos) por agrupación en 'por_<agrupación>'
+              ('por_producto' limitada a top); 'latencia' de compras
+    """
+    datos = {}
+    agrupaciones = [a for a in AGRUPACIONES if a in secciones]
+    if 'totales' in secciones or agrupaciones:
+        totales, tablas = ingresos(desde, hasta, agrupaciones)
+        if 'totales' in secciones:
+            datos.update(totales)
+            datos['ticket_promedio'] = totales['ingresos'] / totales['ventas'] if totales['ventas'] else 0.0
+        for agrupacion, tabla in tablas.items():
+            datos[f'por_{agrupacion}'] = _filas(tabla.head(top) if agrupacion == 'producto' else tabla)
+    if 'latencia' in secciones:
+        datos['latencia'] = latencia_aprobacion(desde, hasta)
+    return datos
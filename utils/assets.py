@@ -0,0 +1,373 @@
+"""
+================================================================================
+PIPELINE DE ARCHIVOS ESTÁTICOS (CSS / JS)
+================================================================================
+Prepara las hojas de estilo y scripts de static/ para servirse con caché de
+larga duración:
+
+1. Minifica cada archivo
+2. Agrega al nombre un hash del contenido (styles.css → styles.3f2a9c1b7d0e.css)
+3. Genera versiones precomprimidas .gz y .br junto a cada archivo
+4. Guarda en static/dist/manifest.json la relación nombre original → final
+
+Las plantillas usan asset_url('css/styles.css'); la ruta /assets/ sirve el
+archivo con Cache-Control inmutable y elige .br o .gz según Accept-Encoding.
+Como el nombre cambia con el contenido, un cambio en el CSS genera una URL
+nueva y el navegador nunca usa una versión vieja.
+
+Reconstrucción manual:
+    flask --app app construir-assets
+================================================================================
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+
+import brotli
+from flask import request, send_file, url_for, abort
+from werkzeug.security import safe_join
+
+DIRECTORIO_STATIC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+DIRECTORIO_DIST = os.path.join(DIRECTORIO_STATIC, 'dist')
+RUTA_MANIFIESTO = os.path.join(DIRECTORIO_DIST, 'manifest.json')
+
+# Carpetas de static/ que pasan por el pipeline y sus extensiones
+ORIGENES = {
+    'css': '.css',
+    'js': '.js',
+}
+
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'  # Un año
+
+_manifiesto = None
+_manifiesto_lock = threading.Lock()
+
+
+# ============================================================================
+# MINIFICACIÓN
+# ============================================================================
+
+# Comentario, cadena o url() (se copian tal cual), espacio, símbolo o texto
+_TOKEN_CSS = re.compile(r"""
+    (?P<comentario>/\*.*?\*/)
+  | (?P<literal>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'
+               |url\(\s*(?:"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|[^)]*?)\s*\))
+  | (?P<espacio>\s+)
+  | (?P<simbolo>[{}:;,>])
+  | (?P<texto>[^\s{}:;,>"'/]+|.)
+""", re.S | re.I | re.X)
+
+SIMBOLOS_CSS = '{}:;,>'
+
+# Reglas @ cuyo bloque contiene otras reglas (selectores), no declaraciones
+REGLAS_CONTENEDORAS = ('@media', '@supports', '@container', '@layer', '@scope', '@document',
+                       '@-moz-document', '@keyframes', '@-webkit-keyframes')
+
+
+def minificar_css(texto):
+    """
+    Quitar comentarios y espacios innecesarios de una hoja de estilos
+
+    Las cadenas y los url() se copian sin cambios. El espacio antes de ':'
+    solo se quita dentro de un bloque de declaraciones: en un selector separa
+    el descendiente de la pseudo-clase (".menu :hover" no es ".menu:hover").
+    """
+    salida = []
+    bloques = []        # Por cada '{' abierto: True si contiene declaraciones
+    preludio = ''       # Selector o regla @ desde el último '{', '}' o ';'
+    espacio = False     # Hubo espacio antes del token actual
+
+    for token in _TOKEN_CSS.finditer(texto):
+        tipo, valor = token.lastgroup, token.group()
+        if tipo == 'comentario':
+            continue
+        if tipo == 'espacio':
+            espacio = bool(salida)
+            continue
+
+        anterior = salida[-1] if salida else ''
+        if tipo == 'simbolo':
+            en_declaraciones = bool(bloques) and bloques[-1]
+            if espacio and valor == ':' and not en_declaraciones and anterior not in SIMBOLOS_CSS:
+                salida.append(' ')
+            if valor == '{':
+                bloques.append(not preludio.strip().lower().startswith(REGLAS_CONTENEDORAS))
+            elif valor == '}':
+                if bloques:
+                    bloques.pop()
+                if anterior == ';':
+                    salida.pop()
+            preludio = '' if valor in '{};' else preludio + valor
+        else:
+            if espacio and anterior not in SIMBOLOS_CSS:
+                salida.append(' ')
+                preludio += ' '
+            preludio += valor
+        salida.append(valor)
+        espacio = False
+
+    return ''.join(salida)
+
+
+# Comentario, cadena, inicio de template literal, espacio, barra (división o
+# inicio de una expresión regular), palabra u otro carácter
+_TOKEN_JS = re.compile(r"""
+    (?P<comentario>//[^\n]*|/\*.*?\*/)
+  | (?P<literal>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<template>`)
+  | (?P<espacio>\s+)
+  | (?P<barra>/)
+  | (?P<palabra>[\w$]+)
+  | (?P<otro>.)
+""", re.S | re.X)
+
+# Expresión regular literal: clases [...] y escapes pueden contener '/'
+_REGEX_JS = re.compile(r"/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*")
+
+# Después de estos símbolos o palabras una '/' abre una expresión regular;
+# en otro caso (identificador, número, ')' o ']') es una división
+_ANTES_DE_REGEX = '(,=:[!&|?{};+-*%<>~^'
+_PALABRAS_ANTES_DE_REGEX = ('return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                            'throw', 'case', 'do', 'else', 'yield', 'await')
+
+
+def _fin_template(texto, posicion):
+    """Posición siguiente al ` que cierra el template literal (posicion: después del ` inicial)"""
+    while posicion < len(texto):
+        if texto[posicion] == '\\':
+            posicion += 2
+        elif texto[posicion] == '`':
+            return posicion + 1
+        elif texto.startswith('${', posicion):
+            posicion = _recorrer_js(texto, posicion + 2, set(), en_expresion=True)
+        else:
+            posicion += 1
+    return posicion
+
+
+def _recorrer_js(texto, posicion, protegidos, en_expresion=False):
+    """
+    Recorrer código JavaScript y anotar en protegidos las posiciones de los
+    saltos de línea que están dentro de una cadena, un template literal, una
+    expresión regular o un comentario de bloque
+
+    Returns:
+        int: Posición final; con en_expresion, la siguiente a la '}' que
+             cierra el ${...} de un template literal
+    """
+    llaves, previo = 0, ''
+    while posicion < len(texto):
+        token = _TOKEN_JS.match(texto, posicion)
+        tipo, fin = token.lastgroup, token.end()
+        if tipo == 'template':
+            tipo, fin = 'literal', _fin_template(texto, fin)
+        elif tipo == 'barra' and (not previo or previo[-1] in _ANTES_DE_REGEX or previo in _PALABRAS_ANTES_DE_REGEX):
+            expresion = _REGEX_JS.match(texto, posicion)
+            if expresion:
+                tipo, fin = 'literal', expresion.end()
+        elif en_expresion and tipo == 'otro' and token.group() in '{}':
+            if token.group() == '}' and not llaves:
+                return fin
+            llaves += 1 if token.group() == '{' else -1
+
+        valor = texto[posicion:fin]
+        if tipo == 'literal' or (tipo == 'comentario' and valor.startswith('/*')):
+            protegidos.update(posicion + indice for indice, caracter in enumerate(valor) if caracter == '\n')
+        if tipo not in ('espacio', 'comentario'):
+            previo = valor
+        posicion = fin
+    return posicion
+
+
+def minificar_js(texto):
+    """
+    Minificación conservadora de JavaScript
+
+    Quita sangrías, espacios finales, líneas vacías y comentarios de línea
+    completa, solo fuera de cadenas, template literals, expresiones regulares
+    y comentarios de bloque: una línea que empieza (o termina) dentro de uno
+    de ellos conserva su principio (o su final) tal cual.
+    """
+    texto = texto.replace('\r\n', '\n')
+    protegidos = set()
+    _recorrer_js(texto, 0, protegidos)
+    lineas = []
+    inicio = 0
+    for linea in texto.split('\n'):
+        fin = inicio + len(linea)
+        empieza, termina = inicio - 1 not in protegidos, fin not in protegidos
+        if empieza:
+            linea = linea.lstrip()
+        if termina:
+            linea = linea.rstrip()
+        if not (empieza and termina and (not linea or linea.startswith('//'))):
+            lineas.append(linea)
+        inicio = fin + 1
+    return '\n'.join(lineas)
+
+
+MINIFICADORES = {
+    '.css': minificar_css,
+    '.js': minificar_js,
+}
+
+
+# ============================================================================
+# CONSTRUCCIÓN
+# ============================================================================
+
+def _fuentes():
+    """Rutas relativas (a static/) de todos los archivos a procesar"""
+    for carpeta, extension in ORIGENES.items():
+        directorio = os.path.join(DIRECTORIO_STATIC, carpeta)
+        if not os.path.isdir(directorio):
+            continue
+        for nombre in sorted(os.listdir(directorio)):
+            if nombre.endswith(extension):
+                yield f'{carpeta}/{nombre}'
+
+
+def _escribir(ruta, contenido):
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, ruta)
+
+
+def construir():
+    """
+    Generar todos los archivos de static/dist y su manifiesto
+
+    Returns:
+        dict: Manifiesto {ruta original: ruta con hash}
+    """
+    global _manifiesto
+
+    manifiesto = {}
+    for fuente in _fuentes():
+        base, extension = os.path.splitext(fuente)
+        with open(os.path.join(DIRECTORIO_STATIC, fuente), encoding='utf-8') as archivo:
+            contenido = MINIFICADORES[extension](archivo.read()).encode('utf-8')
+
+        huella = hashlib.sha256(contenido).hexdigest()[:12]
+        destino_relativo = f'{base}.{huella}{extension}'
+        destino = os.path.join(DIRECTORIO_DIST, destino_relativo)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+        _escribir(destino, contenido)
+        _escribir(destino + '.gz', gzip.compress(contenido, compresslevel=9, mtime=0))
+        _escribir(destino + '.br', brotli.compress(contenido, quality=11))
+        manifiesto[fuente] = destino_relativo
+
+    _escribir(RUTA_MANIFIESTO, json.dumps(manifiesto, indent=2, sort_keys=True).encode('utf-8'))
+    with _manifiesto_lock:
+        _manifiesto = manifiesto
+    _limpiar(manifiesto)
+    return manifiesto
+
+
+def _limpiar(manifiesto):
+    """Borrar versiones anteriores que ya no están en el manifiesto"""
+    vigentes = {os.path.join(DIRECTORIO_DIST, destino) for destino in manifiesto.values()}
+    for carpeta in ORIGENES:
+        directorio = os.path.join(DIRECTORIO_DIST, carpeta)
+        if not os.path.isdir(directorio):
+            continue
+        for nombre in os.listdir(directorio):
+            ruta = os.path.join(directorio, nombre)
+            if ruta.endswith('.tmp') or ruta.removesuffix('.gz').removesuffix('.br') in vigentes:
+                continue
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+
+def _desactualizado():
+    """True si falta el manifiesto o alguna fuente es más reciente"""
+    if not os.path.exists(RUTA_MANIFIESTO):
+        return True
+    generado = os.path.getmtime(RUTA_MANIFIESTO)
+    return any(os.path.getmtime(os.path.join(DIRECTORIO_STATIC, fuente)) > generado
+               for fuente in _fuentes())
+
+
+def obtener_manifiesto():
+    """Leer (una sola vez) el manifiesto de static/dist"""
+    global _manifiesto
+    if _manifiesto is None:
+        with _manifiesto_lock:
+            if _manifiesto is None:
+                try:
+                    with open(RUTA_MANIFIESTO, encoding='utf-8') as archivo:
+                        _manifiesto = json.load(archivo)
+                except (OSError, ValueError):
+                    _manifiesto = {}
+    return _manifiesto
+
+
+# ============================================================================
+# INTEGRACIÓN CON FLASK
+# ============================================================================
+
+def asset_url(ruta):
+    """
+    URL de un archivo estático con su nombre con hash
+
+    Args:
+        ruta (str): Ruta relativa a static/ (ej. 'css/styles.css')
+
+    Returns:
+        str: /assets/css/styles.<hash>.css, o la URL normal de static/ si el
+             archivo no pasa por el pipeline
+    """
+    destino = obtener_manifiesto().get(ruta)
+    if destino is None:
+        return url_for('static', filename=ruta)
+    return url_for('servir_asset', filename=destino)
+
+
+def servir_asset(filename):
+    """Servir un archivo de static/dist con la mejor codificación aceptada"""
+    ruta = safe_join(DIRECTORIO_DIST, filename)
+    if ruta is None or not os.path.isfile(ruta):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    codificacion = None
+    for candidata, extension in (('br', '.br'), ('gzip', '.gz')):
+        if candidata in request.accept_encodings and os.path.isfile(ruta + extension):
+            ruta, codificacion = ruta + extension, candidata
+            break
+
+    respuesta = send_file(ruta, mimetype=mimetype, conditional=True, etag=True)
+    respuesta.headers['Cache-Control'] = CACHE_INMUTABLE
+    respuesta.vary.add('Accept-Encoding')
+    if codificacion:
+        respuesta.headers['Content-Encoding'] = codificacion
+    return respuesta
+
+
+def init_app(app):
+    """
+    Registrar la ruta /assets/, el helper de plantillas y el comando CLI
+
+    Si las fuentes cambiaron desde la última construcción (o nunca se
+    construyó), se reconstruye static/dist al iniciar.
+    """
+    app.add_url_rule('/assets/<path:filename>', 'servir_asset', servir_asset)
+    app.add_template_global(asset_url, 'asset_url')
+
+    @app.cli.command('construir-assets')
+    def construir_assets():
+        """Minificar, versionar y comprimir los archivos CSS y JS"""
+        manifiesto = construir()
+        print(f'Assets construidos: {len(manifiesto)} archivos en static/dist')
+
+    if _desactualizado():
+        construir()
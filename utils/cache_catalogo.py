@@ -0,0 +1,124 @@
+"""
+================================================================================
+CACHÉ DE FRAGMENTOS DEL CATÁLOGO
+================================================================================
+Guarda el HTML ya renderizado de la grilla de productos (catálogo completo y
+listados por categoría). Un acierto de caché no consulta la base de datos ni
+ejecuta Jinja para la grilla.
+
+Invalidación por versión:
+- Cada clave incluye el número de versión del catálogo
+- Producto.save/update/delete y cualquier cambio de stock marcan la sesión;
+  al confirmar (after_commit) se incrementa la versión
+- Las claves viejas dejan de usarse y expiran solas (CATALOGO_CACHE_TTL)
+
+Backends (CATALOGO_CACHE_TIPO):
+- 'filesystem': instance/cache_catalogo, compartido por todos los procesos
+  del servidor (opción por defecto, necesaria con varios workers)
+- 'simple': en memoria del proceso (un solo proceso / desarrollo)
+- 'null': desactiva la caché
+================================================================================
+"""
+
+import os
+import time
+
+from cachelib import FileSystemCache, NullCache, SimpleCache
+from markupsafe import Markup
+from sqlalchemy import event
+
+from database import db, SesionEnrutada
+
+CLAVE_VERSION = 'catalogo:version'
+TTL_DEFECTO = 3600          # Segundos que vive un fragmento (red de seguridad)
+MAX_FRAGMENTOS = 1000       # Entradas antes de que cachelib empiece a podar
+
+_cache = NullCache()
+_ttl = TTL_DEFECTO
+
+
+def _crear_cache(app):
+    tipo = app.config['CATALOGO_CACHE_TIPO']
+    if tipo == 'filesystem':
+        directorio = os.path.join(app.instance_path, 'cache_catalogo')
+        return FileSystemCache(directorio, threshold=MAX_FRAGMENTOS, default_timeout=0)
+    if tipo == 'simple':
+        return SimpleCache(threshold=MAX_FRAGMENTOS, default_timeout=0)
+    if tipo == 'null':
+        return NullCache()
+    raise ValueError(f'CATALOGO_CACHE_TIPO desconocido: {tipo}')
+
+
+# ============================================================================
+# VERSIÓN DEL CATÁLOGO
+# ============================================================================
+
+def version():
+    """Versión actual del catálogo (se crea si la caché está vacía)"""
+    actual = _cache.get(CLAVE_VERSION)
+    if actual is None:
+        # Partir de la hora actual: nunca coincide con fragmentos anteriores
+        _cache.add(CLAVE_VERSION, int(time.time() * 1000))
+        actual = _cache.get(CLAVE_VERSION)
+    return actual
+
+
+def invalidar():
+    """Incrementar la versión: todos los fragmentos guardados quedan obsoletos"""
+    version()  # Si la clave se perdió, inc() volvería a empezar desde 1
+    _cache.inc(CLAVE_VERSION)
+
+
+def marcar_cambio():
+    """
+    Registrar que la transacción actual modifica productos o stock
+
+    La versión se incrementa recién cuando la transacción se confirma, así un
+    rollback no invalida la caché y ningún lector la regenera con datos sin
+    confirmar.
+    """
+    db.session.info['catalogo_modificado'] = True
+
+
+@event.listens_for(SesionEnrutada, 'after_commit')
+def _despues_de_confirmar(sesion):
+    if sesion.info.pop('catalogo_modificado', False):
+        invalidar()
+
+
+@event.listens_for(SesionEnrutada, 'after_soft_rollback')
+def _despues_de_deshacer(sesion, transaccion_anterior):
+    sesion.info.pop('catalogo_modificado', None)
+
+
+# ============================================================================
+# FRAGMENTOS
+# ============================================================================
+
+def fragmento(partes, generar, ttl=None):
+    """
+    Obtener un fragmento HTML de la caché o generarlo y guardarlo
+
+    Args:
+        partes (tuple): Lo que distingue al fragmento (rol, categoría, cursor...)
+        generar (callable): Función sin argumentos que devuelve el HTML
+        ttl (int, optional): Segundos de vida (por defecto CATALOGO_CACHE_TTL)
+
+    Returns:
+        Markup: HTML listo para insertar en una plantilla
+    """
+    clave = 'catalogo:{}:{}'.format(version(), ':'.join('' if p is None else str(p) for p in partes))
+    html = _cache.get(clave)
+    if html is None:
+        html = str(generar())
+        _cache.set(clave, html, timeout=ttl if ttl is not None else _ttl)
+    return Markup(html)
+
+
+def init_app(app):
+    """Crear el backend de caché según la configuración"""
+    global _cache, _ttl
+    app.config.setdefault('CATALOGO_CACHE_TIPO', 'filesystem')
+    app.config.setdefault('CATALOGO_CACHE_TTL', TTL_DEFECTO)
+    _cache = _crear_cache(app)
+    _ttl = int(app.config['CATALOGO_CACHE_TTL'])
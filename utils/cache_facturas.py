@@ -0,0 +1,154 @@
+"""
+================================================================================
+CACHÉ EN DISCO DE FACTURAS PDF
+================================================================================
+Una factura de una compra aprobada no cambia, así que se genera una sola vez
+y se guarda en instance/facturas/.
+
+- Clave: ID de la compra + hash de los campos que aparecen en la factura.
+  Si alguno cambia (por ejemplo los comentarios), la clave cambia y la
+  versión anterior se descarta.
+- Expulsión LRU por tamaño: cada acierto actualiza la fecha de modificación
+  del archivo y, al superar FACTURAS_CACHE_MAX_BYTES, se borran primero los
+  archivos usados hace más tiempo.
+================================================================================
+"""
+
+import glob
+import hashlib
+import json
+import os
+import uuid
+
+from flask import current_app
+
+MAX_BYTES_DEFECTO = 200 * 1024 * 1024  # 200 MB
+
+
+def directorio_cache(app=None):
+    """Carpeta de la caché de facturas"""
+    app = app or current_app
+    directorio = os.path.join(app.instance_path, 'facturas')
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def huella_factura(compra):
+    """
+    Calcular el hash de los datos que aparecen en la factura
+
+    Args:
+        compra (Compra): Compra aprobada
+
+    Returns:
+        str: Hash SHA-256 en hexadecimal (se usa también como ETag)
+    """
+    fecha = compra.fecha_aprobacion or compra.fecha
+    campos = {
+        'id': compra.id,
+        'fecha': fecha.isoformat() if fecha else None,
+        'cliente': compra.usuario.nombre if compra.usuario else None,
+        'estado': compra.estado,
+        'venta': compra.venta[0].id if compra.venta else None,
+        'producto': compra.producto.nombre if compra.producto else None,
+        'cantidad': compra.cantidad,
+        'precio_unitario': compra.precio_unitario,
+        'total': compra.total,
+        'comentarios': compra.comentarios,
+    }
+    contenido = json.dumps(campos, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _ruta(directorio, compra_id, huella):
+    return os.path.join(directorio, f'factura_{compra_id}_{huella[:16]}.pdf')
+
+
+def obtener(compra):
+    """
+    Buscar la factura en la caché
+
+    Returns:
+        tuple: (ruta, huella) si está en caché, o (None, huella) si no
+    """
+    huella = huella_factura(compra)
+    ruta = _ruta(directorio_cache(), compra.id, huella)
+    if not os.path.exists(ruta):
+        return None, huella
+    try:
+        os.utime(ruta)  # Marcar como usada recientemente (LRU)
+    except OSError:
+        pass
+    return ruta, huella
+
+
+def guardar(compra, contenido, huella=None):
+    """
+    Guardar una factura generada en la caché
+
+    Args:
+        compra (Compra): Compra de la factura
+        contenido (bytes): PDF generado
+        huella (str, optional): Hash ya calculado de la compra
+
+    Returns:
+        str: Ruta del archivo en caché
+    """
+    directorio = directorio_cache()
+    huella = huella or huella_factura(compra)
+    ruta = _ruta(directorio, compra.id, huella)
+
+    # Escritura atómica: otro proceso nunca ve un archivo a medias
+    temporal = f'{ruta}.{uuid.uuid4().hex}.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, ruta)
+
+    # Descartar versiones anteriores de la misma factura
+    for anterior in glob.glob(os.path.join(directorio, f'factura_{compra.id}_*.pdf')):
+        if anterior != ruta:
+            _borrar(anterior)
+
+    _expulsar(directorio, current_app.config.get('FACTURAS_CACHE_MAX_BYTES', MAX_BYTES_DEFECTO))
+    return ruta
+
+
+def obtener_o_generar(compra):
+    """
+    Devolver la factura desde la caché, generándola si no existe
+
+    Returns:
+        tuple: (ruta, huella)
+    """
+    from utils.pdf_generator import generar_factura_compra
+
+    ruta, huella = obtener(compra)
+    if ruta is None:
+        ruta = guardar(compra, generar_factura_compra(compra).getvalue(), huella)
+    return ruta, huella
+
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+def _expulsar(directorio, max_bytes):
+    """Borrar las facturas menos usadas hasta quedar bajo el límite"""
+    archivos = []
+    total = 0
+    for ruta in glob.glob(os.path.join(directorio, 'factura_*.pdf')):
+        try:
+            info = os.stat(ruta)
+        except OSError:
+            continue
+        archivos.append((info.st_mtime, info.st_size, ruta))
+        total += info.st_size
+
+    for _, tamano, ruta in sorted(archivos):
+        if total <= max_bytes:
+            break
+        _borrar(ruta)
+        total -= tamano
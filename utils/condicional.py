@@ -0,0 +1,167 @@
+"""
+================================================================================
+GET CONDICIONAL (ETag / Last-Modified)
+================================================================================
+Los listados y el detalle de venta se vuelven a pedir muy seguido (admins que
+refrescan compras y ventas). Con el decorador @condicional la vista calcula
+primero un validador barato y, si el navegador ya tiene esa versión
+(If-None-Match / If-Modified-Since), responde 304 sin ejecutar la vista: ni
+las consultas del listado ni Jinja.
+
+El validador de cada vista devuelve una tupla de valores que cambian cuando
+cambia la página, normalmente marcas de agua de tablas:
+
+    (filas, max(id), max(updated_at))
+
+- max(updated_at) cambia con cada INSERT/UPDATE (onupdate del modelo)
+- filas cambia con cada DELETE
+- las dos se resuelven con los índices ix_<tabla>_updated_at
+
+El ETag combina además el usuario y rol de la sesión (las páginas cambian
+según quién las ve) y la versión de las plantillas/CSS desplegados.
+
+Limitaciones:
+- Solo productos, ventas y compras tienen updated_at: renombrar un proveedor
+  o un usuario no invalida los listados que muestran su nombre
+- Los mensajes flash pendientes entran en el ETag: uno nuevo fuerza una
+  respuesta completa, pero uno que queda sin consumir no impide el 304
+================================================================================
+"""
+
+import functools
+import hashlib
+import os
+from datetime import datetime
+
+from flask import request, session, make_response, current_app
+from werkzeug.http import is_resource_modified
+
+from database import db
+from utils import metricas
+from utils.assets import RUTA_MANIFIESTO
+
+MAX_TAMANOS = 5000  # ETags cuyo tamaño se recuerda para estimar el ahorro
+
+_version_despliegue = ''
+_tamanos = {}  # ETag → bytes del último cuerpo completo enviado con él
+
+
+# ============================================================================
+# VALIDADORES
+# ============================================================================
+
+def marca_agua(modelo):
+    """
+    Marca de agua de la tabla de un modelo con columna updated_at
+
+    Returns:
+        tuple: (filas, max(id), max(updated_at))
+    """
+    consulta = db.select(db.func.count(), db.func.max(modelo.id), db.func.max(modelo.updated_at))
+    return tuple(db.session.execute(consulta).one())
+
+
+def _calcular_etag(partes):
+    # Los mensajes flash pendientes forman parte de la página: si aparece uno
+    # nuevo cambia el ETag y la vista se vuelve a generar para mostrarlo
+    contenido = repr((_version_despliegue, session.get('user_id'), session.get('tipo'),
+                      session.get('_flashes'), partes))
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+
+def _ultima_modificacion(partes):
+    fechas = [valor for valor in partes if isinstance(valor, datetime)]
+    return max(fechas) if fechas else None
+
+
+def _agregar_cabeceras(respuesta, etag, ultima_modificacion):
+    respuesta.set_etag(etag, weak=True)
+    if ultima_modificacion is not None:
+        respuesta.last_modified = ultima_modificacion
+    # Siempre revalidar: la página depende de la sesión y de datos que cambian
+    respuesta.cache_control.private = True
+    respuesta.cache_control.no_cache = True
+    respuesta.vary.add('Cookie')
+
+
+# ============================================================================
+# DECORADOR
+# ============================================================================
+
+def condicional(validador):
+    """
+    Responder 304 sin ejecutar la vista si el cliente ya tiene la versión actual
+
+    Args:
+        validador (callable): Recibe los argumentos de la ruta y devuelve una
+            tupla que identifica la versión de la página, o None para atender
+            la petición sin validación (ej. registro inexistente)
+
+    Uso:
+        @venta_bp.route("/")
+        @admin_required
+        @solo_lectura
+        @condicional(lambda: marca_agua(Venta) + marca_agua(Producto))
+        def index(): ...
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return vista(*args, **kwargs)
+
+            partes = validador(**kwargs)
+            if partes is None:
+                return vista(*args, **kwargs)
+
+            etag = _calcular_etag(partes)
+            ultima = _ultima_modificacion(partes)
+            if not is_resource_modified(request.environ, etag=etag, last_modified=ultima):
+                respuesta = current_app.response_class(status=304)
+                _agregar_cabeceras(respuesta, etag, ultima)
+                metricas.registrar_no_modificada(request.endpoint, _tamanos.get(etag, 0))
+                return respuesta
+
+            respuesta = make_response(vista(*args, **kwargs))
+            if respuesta.status_code == 200 and not respuesta.is_streamed:
+                _agregar_cabeceras(respuesta, etag, ultima)
+                if len(_tamanos) >= MAX_TAMANOS:
+                    _tamanos.clear()
+                _tamanos[etag] = respuesta.content_length or len(respuesta.get_data())
+            return respuesta
+        return envoltura
+    return decorador
+
+
+# ============================================================================
+# INTEGRACIÓN CON FLASK
+# ============================================================================
+
+def _calcular_version_despliegue(app):
+    """
+    Huella del contenido de las plantillas y del manifiesto de assets
+
+    Se usa el contenido (no la fecha de modificación) para que todos los
+    workers y servidores de un mismo despliegue generen los mismos ETag.
+    """
+    huella = hashlib.sha1()
+    rutas = []
+    for raiz, _, archivos in os.walk(os.path.join(app.root_path, app.template_folder)):
+        rutas.extend(os.path.join(raiz, nombre) for nombre in archivos)
+    rutas.append(RUTA_MANIFIESTO)
+    for ruta in sorted(rutas):
+        try:
+            with open(ruta, 'rb') as archivo:
+                huella.update(archivo.read())
+        except OSError:
+            continue
+    return huella.hexdigest()[:12]
+
+
+def init_app(app):
+    """
+    Calcular la versión de despliegue que forma parte de todos los ETag
+    (llamar después de assets.init_app, que puede reconstruir el manifiesto)
+    """
+    global _version_despliegue
+    _version_despliegue = _calcular_version_despliegue(app)
@@ -0,0 +1,220 @@
+"""
+================================================================================
+IMPORTACIÓN Y EXPORTACIÓN DE TABLAS (CSV / XLSX)
+================================================================================
+Lectura y escritura por streaming, con memoria constante sin importar la
+cantidad de filas:
+
+- Lectura: csv.reader sobre el archivo subido, u openpyxl en modo
+  read_only (no carga la hoja completa)
+- Escritura CSV: se envía al cliente cada BLOQUE_CSV filas, la descarga
+  empieza de inmediato
+- Escritura XLSX: openpyxl en modo write_only (las filas van a un archivo
+  temporal, no a memoria). Un XLSX es un ZIP y su índice se escribe al
+  final, así que el envío empieza cuando el libro está completo
+
+Las filas a exportar llegan como un iterable de tuplas (normalmente una
+consulta con yield_per), en el orden de las columnas.
+================================================================================
+"""
+
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+from flask import Response, stream_with_context
+from openpyxl import Workbook, load_workbook
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+BLOQUE_CSV = 500              # Filas por fragmento enviado al cliente
+LOTE_CURSOR = 1000            # Filas por bloque del cursor (yield_per) al exportar
+BLOQUE_ARCHIVO = 64 * 1024    # Bytes por fragmento al enviar un XLSX
+
+# Un texto que empieza con alguno de estos caracteres se exporta con un
+# apóstrofo delante para que Excel/LibreOffice no lo evalúen como fórmula
+# (inyección de fórmulas); al importar se quita
+INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ArchivoInvalidoError(Exception):
+    """El archivo subido no es un CSV/XLSX legible o no tiene encabezados"""
+
+
+# ============================================================================
+# LECTURA
+# ============================================================================
+
+def rango_fechas(args):
+    """
+    Leer los filtros 'desde' y 'hasta' (AAAA-MM-DD) de la query string
+
+    Returns:
+        tuple: (desde, hasta) como datetime; 'hasta' es exclusivo (el día
+               indicado se incluye completo). None si no se indicó
+
+    Raises:
+        ValueError: Si alguna fecha no tiene el formato AAAA-MM-DD
+    """
+    desde = datetime.strptime(args['desde'], '%Y-%m-%d') if args.get('desde') else None
+    hasta = datetime.strptime(args['hasta'], '%Y-%m-%d') + timedelta(days=1) if args.get('hasta') else None
+    return desde, hasta
+
+
+def formato_de(nombre_archivo):
+    """
+    Formato según la extensión del archivo
+
+    Returns:
+        str: 'csv', 'xlsx' o None si no es un formato soportado
+    """
+    extension = os.path.splitext(nombre_archivo or '')[1].lower().lstrip('.')
+    return extension if extension in FORMATOS else None
+
+
+def _normalizar_encabezado(valor):
+    return str(valor or '').strip().lower()
+
+
+def _sin_apostrofo(valor):
+    """Quitar el apóstrofo que agrega la exportación delante de una posible fórmula"""
+    if isinstance(valor, str) and valor[:1] == "'" and valor[1:2] in INICIO_FORMULA:
+        return valor[1:]
+    return valor
+
+
+def _leer_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    lector = csv.reader(texto, dialecto)
+    encabezados = [_normalizar_encabezado(valor) for valor in next(lector, [])]
+    if not any(encabezados):
+        raise ArchivoInvalidoError('El archivo no tiene fila de encabezados')
+    for fila in lector:
+        if any(fila):
+            yield dict(zip(encabezados, map(_sin_apostrofo, fila)))
+
+
+def _leer_xlsx(archivo):
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except Exception as e:
+        raise ArchivoInvalidoError(f'No se pudo abrir el libro: {e}')
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = [_normalizar_encabezado(valor) for valor in next(filas, ())]
+        if not any(encabezados):
+            raise ArchivoInvalidoError('La hoja no tiene fila de encabezados')
+        for fila in filas:
+            if any(valor is not None and valor != '' for valor in fila):
+                yield dict(zip(encabezados, map(_sin_apostrofo, fila)))
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, formato):
+    """
+    Recorrer las filas de un CSV o XLSX como diccionarios
+
+    Args:
+        archivo: Archivo binario (ej. request.files['archivo'].stream)
+        formato (str): 'csv' o 'xlsx'
+
+    Yields:
+        dict: Encabezado (en minúsculas) → valor de la celda
+
+    Raises:
+        ArchivoInvalidoError: Si el archivo no se puede leer
+    """
+    if formato == 'csv':
+        return _leer_csv(archivo)
+    if formato == 'xlsx':
+        return _leer_xlsx(archivo)
+    raise ArchivoInvalidoError(f'Formato no soportado: {formato}')
+
+
+# ============================================================================
+# ESCRITURA
+# ============================================================================
+
+def _texto_seguro(valor):
+    """Anteponer un apóstrofo a los textos que una planilla tomaría como fórmula"""
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def _celda(valor):
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return '' if valor is None else _texto_seguro(valor)
+
+
+def _generar_csv(columnas, filas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write('\ufeff')  # BOM: Excel abre el archivo como UTF-8
+    escritor.writerow(columnas)
+    for numero, fila in enumerate(filas, start=1):
+        escritor.writerow([_celda(valor) for valor in fila])
+        if numero % BLOQUE_CSV == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _generar_xlsx(columnas, filas, titulo):
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(title=titulo[:31])
+    hoja.append(columnas)
+    for fila in filas:
+        hoja.append([_texto_seguro(valor) for valor in fila])
+
+    with tempfile.TemporaryFile() as temporal:
+        libro.save(temporal)
+        temporal.seek(0)
+        while True:
+            bloque = temporal.read(BLOQUE_ARCHIVO)
+            if not bloque:
+                break
+            yield bloque
+
+
+def respuesta_descarga(formato, nombre, columnas, filas, titulo='Datos'):
+    """
+    Respuesta que envía las filas como archivo descargable
+
+    Args:
+        formato (str): 'csv' o 'xlsx'
+        nombre (str): Nombre del archivo sin extensión
+        columnas (list): Encabezados
+        filas (iterable): Tuplas con los valores, en el orden de las columnas
+        titulo (str): Nombre de la hoja (solo XLSX)
+
+    Returns:
+        Response: Descarga en streaming (la consulta se recorre al enviarla)
+    """
+    if formato == 'xlsx':
+        generador = _generar_xlsx(columnas, filas, titulo)
+    else:
+        formato = 'csv'
+        generador = _generar_csv(columnas, filas)
+
+    return Response(
+        stream_with_context(generador),
+        mimetype=FORMATOS[formato],
+        headers={'Content-Disposition': f'attachment; filename={nombre}.{formato}'}
+    )
@@ -0,0 +1,174 @@
+"""
+================================================================================
+EXPORTACIÓN MASIVA DE FACTURAS
+================================================================================
+Genera las facturas de muchas compras en paralelo (pool de procesos de
+utils.trabajos) y las entrega como un único ZIP que se transmite mientras se
+construye.
+
+- Los procesos hijos generan cada factura con cache_facturas.obtener_o_generar
+  y devuelven solo la ruta del archivo, no su contenido.
+- Como máximo hay VENTANA_POR_WORKER facturas en vuelo por proceso; el ZIP se
+  escribe en orden y cada factura se copia por bloques, así que en memoria
+  nunca hay más que unos pocos bloques de PDF.
+- Si un proceso hijo muere, las facturas en vuelo se reenvían a un pool
+  nuevo; una factura que sigue fallando queda en errores.txt.
+================================================================================
+"""
+
+import os
+import zipfile
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app
+
+from utils import trabajos
+
+VENTANA_POR_WORKER = 2          # Facturas enviadas al pool por cada proceso
+TAMANO_BLOQUE = 64 * 1024       # Bytes copiados al ZIP en cada escritura
+REENVIOS_POOL_ROTO = 2          # Reenvíos de una factura si muere un proceso hijo
+
+
+class _SalidaZip:
+    """
+    Destino de escritura no posicionable para ZipFile
+
+    ZipFile escribe aquí y el generador vacía lo acumulado después de cada
+    bloque. Al no tener seek(), ZipFile usa descriptores de datos y nunca
+    vuelve atrás en el archivo.
+    """
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def _renderizar_factura(compra_id):
+    """
+    Punto de entrada en el proceso hijo: asegura la factura en la caché
+
+    Returns:
+        str: Ruta de la factura en la caché de disco
+    """
+    from app import app
+    from models.compra_model import Compra
+    from utils import cache_facturas
+
+    with app.app_context():
+        compra = Compra.get_by_id(compra_id)
+        if compra is None or compra.estado != 'aprobada':
+            raise ValueError(f'La compra #{compra_id} no tiene factura')
+        ruta, _ = cache_facturas.obtener_o_generar(compra)
+        return ruta
+
+
+def _fallo_por_pool_roto(futuro):
+    return futuro.done() and not futuro.cancelled() and isinstance(futuro.exception(), BrokenProcessPool)
+
+
+def _resultados_en_orden(compra_ids):
+    """
+    Enviar las facturas al pool con una ventana acotada
+
+    Si un proceso hijo muere, el pool queda inutilizable y todas las facturas
+    en vuelo fallan con BrokenProcessPool: se reenvían (hasta
+    REENVIOS_POOL_ROTO veces cada una) a un pool nuevo.
+
+    Yields:
+        tuple: (compra_id, ruta, error) en el mismo orden de compra_ids
+    """
+    ventana = max(1, current_app.config.get('TRABAJOS_MAX_WORKERS', trabajos.MAX_WORKERS_DEFECTO)) * VENTANA_POR_WORKER
+    pendientes = deque()
+    ids = iter(compra_ids)
+
+    def enviar(compra_id, reenvios=REENVIOS_POOL_ROTO):
+        # trabajos.enviar reemplaza el pool si ya estaba roto
+        return compra_id, trabajos.enviar(_renderizar_factura, compra_id), reenvios
+
+    for compra_id in ids:
+        pendientes.append(enviar(compra_id))
+        if len(pendientes) >= ventana:
+            break
+
+    while pendientes:
+        compra_id, futuro, reenvios = pendientes.popleft()
+        # Mantener la ventana llena mientras se espera la siguiente factura
+        siguiente = next(ids, None)
+        if siguiente is not None:
+            pendientes.append(enviar(siguiente))
+        try:
+            yield compra_id, futuro.result(), None
+        except BrokenProcessPool:
+            if not reenvios:
+                yield compra_id, None, 'El proceso que generaba la factura terminó inesperadamente'
+                continue
+            # Reenviar esta factura y las que fallaron con ella, sin cambiar el orden
+            pendientes.appendleft((compra_id, futuro, reenvios))
+            pendientes = deque(
+                enviar(pendiente_id, restantes - 1) if _fallo_por_pool_roto(pendiente) else (pendiente_id, pendiente, restantes)
+                for pendiente_id, pendiente, restantes in pendientes
+            )
+        except Exception as e:
+            yield compra_id, None, str(e)
+
+
+def generar_zip(compra_ids):
+    """
+    Generar el ZIP de facturas por partes (para una respuesta en streaming)
+
+    Args:
+        compra_ids (list): IDs de compras aprobadas
+
+    Yields:
+        bytes: Fragmentos consecutivos del archivo ZIP
+    """
+    salida = _SalidaZip()
+    errores = []
+
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_STORED) as archivo_zip:
+        for compra_id, ruta, error in _resultados_en_orden(compra_ids):
+            if error:
+                errores.append(f'Compra #{compra_id}: {error}')
+                continue
+            try:
+                with open(ruta, 'rb') as origen, \
+                        archivo_zip.open(f'factura_compra_{compra_id}.pdf', 'w') as destino:
+                    for bloque in iter(lambda: origen.read(TAMANO_BLOQUE), b''):
+                        destino.write(bloque)
+                        yield salida.vaciar()
+            except OSError as e:
+                # La caché pudo expulsar el archivo entre la generación y la lectura
+                errores.append(f'Compra #{compra_id}: {e}')
+            yield salida.vaciar()
+
+        if errores:
+            archivo_zip.writestr('errores.txt', '\n'.join(errores))
+
+    yield salida.vaciar()
+
+
+def nombre_archivo(desde=None, hasta=None):
+    """Nombre sugerido para la descarga del ZIP"""
+    partes = ['facturas']
+    if desde:
+        partes.append(desde.strftime('%Y%m%d'))
+    if hasta:
+        partes.append(hasta.strftime('%Y%m%d'))
+    return '_'.join(partes) + '.zip'
@@ -0,0 +1,252 @@
+"""
+================================================================================
+PROCESAMIENTO DE IMÁGENES DE PRODUCTOS
+================================================================================
+Genera, a partir de la imagen original subida, versiones redimensionadas para
+cada contexto del catálogo y en formatos modernos:
+
+- Variantes: 'thumb' (tarjetas), 'medium' (detalle) y 'full' (ancho máximo)
+- Formatos: JPEG como respaldo universal, WebP y AVIF (si Pillow lo soporta)
+
+El trabajo se hace en el pool de procesos de utils.trabajos para no bloquear
+la petición de subida. Mientras no existan las variantes se sirve la imagen
+original.
+
+Estructura en disco:
+    static/images/productos/<imagen original>
+    static/images/productos/variantes/<nombre>_<variante>.<ext>
+    static/images/productos/variantes/<nombre>.json   (manifiesto)
+================================================================================
+"""
+
+import json
+import os
+import threading
+import uuid
+
+from PIL import Image, ImageOps, features
+
+from utils import trabajos, cache_catalogo
+
+DIRECTORIO_BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_PRODUCTOS = os.path.join(DIRECTORIO_BASE, 'static', 'images', 'productos')
+DIRECTORIO_VARIANTES = os.path.join(DIRECTORIO_PRODUCTOS, 'variantes')
+URL_PRODUCTOS = '/static/images/productos'
+
+# Lado mayor (en píxeles) de cada variante; nunca se amplía una imagen
+VARIANTES = {
+    'thumb': 400,
+    'medium': 800,
+    'full': 1600,
+}
+
+# Formato → (formato de Pillow, opciones de guardado)
+FORMATOS = {
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+}
+if features.check('avif'):
+    FORMATOS['avif'] = ('AVIF', {'quality': 60})
+
+# Límite de píxeles para rechazar "bombas de descompresión"
+Image.MAX_IMAGE_PIXELS = 40_000_000
+
+# Manifiestos ya leídos (solo se guardan los existentes)
+_manifiestos = {}
+_manifiestos_lock = threading.Lock()
+
+
+def _nombre_base(imagen):
+    return os.path.splitext(imagen)[0]
+
+
+def _ruta_manifiesto(imagen):
+    return os.path.join(DIRECTORIO_VARIANTES, f'{_nombre_base(imagen)}.json')
+
+
+def validar_imagen(archivo):
+    """
+    Verificar que el archivo subido sea realmente una imagen legible
+
+    Args:
+        archivo (FileStorage): Archivo recibido en la petición
+
+    Returns:
+        bool: True si Pillow reconoce la imagen y no excede el límite de píxeles
+    """
+    try:
+        with Image.open(archivo.stream) as imagen:
+            imagen.verify()
+        return True
+    except Exception:
+        return False
+    finally:
+        archivo.stream.seek(0)
+
+
+def _guardar(imagen, ruta, formato, opciones):
+    """Escritura atómica para no servir nunca un archivo a medias"""
+    temporal = f'{ruta}.{uuid.uuid4().hex}.tmp'
+    imagen.save(temporal, formato, **opciones)
+    os.replace(temporal, ruta)
+
+
+def procesar_imagen(imagen):
+    """
+    Generar todas las variantes de una imagen (se ejecuta en el pool)
+
+    Args:
+        imagen (str): Nombre del archivo original en DIRECTORIO_PRODUCTOS
+
+    Returns:
+        dict: Manifiesto {'formatos': [...], 'variantes': {variante: ancho}}
+    """
+    os.makedirs(DIRECTORIO_VARIANTES, exist_ok=True)
+    base = _nombre_base(imagen)
+    manifiesto = {'formatos': list(FORMATOS), 'variantes': {}}
+
+    with Image.open(os.path.join(DIRECTORIO_PRODUCTOS, imagen)) as original:
+        original = ImageOps.exif_transpose(original)
+
+        # JPEG no admite transparencia: componer sobre fondo blanco
+        if original.mode in ('RGBA', 'LA', 'P'):
+            original = original.convert('RGBA')
+            fondo = Image.new('RGB', original.size, (255, 255, 255))
+            fondo.paste(original, mask=original.getchannel('A'))
+            original = fondo
+        elif original.mode != 'RGB':
+            original = original.convert('RGB')
+
+        for variante, lado in VARIANTES.items():
+            copia = original.copy()
+            copia.thumbnail((lado, lado), Image.LANCZOS)
+            for extension, (formato, opciones) in FORMATOS.items():
+                _guardar(copia, os.path.join(DIRECTORIO_VARIANTES, f'{base}_{variante}.{extension}'),
+                         formato, opciones)
+            manifiesto['variantes'][variante] = copia.width
+
+    # El manifiesto se escribe al final: su existencia indica variantes listas
+    temporal = f'{_ruta_manifiesto(imagen)}.{uuid.uuid4().hex}.tmp'
+    with open(temporal, 'w') as archivo:
+        json.dump(manifiesto, archivo)
+    os.replace(temporal, _ruta_manifiesto(imagen))
+    return manifiesto
+
+
+def encolar_procesamiento(imagen):
+    """
+    Enviar la generación de variantes al pool de procesos
+
+    Args:
+        imagen (str): Nombre del archivo original recién guardado
+
+    Al terminar se invalida el catálogo en caché para que las tarjetas ya
+    usen las variantes nuevas.
+    """
+    futuro = trabajos.enviar(procesar_imagen, imagen)
+    futuro.add_done_callback(lambda _: cache_catalogo.invalidar())
+
+
+def procesar_imagenes(nombres):
+    """
+    Generar las variantes de varias imágenes en un solo trabajo del pool
+
+    Una imagen ilegible no detiene a las demás.
+
+    Returns:
+        int: Cantidad de imágenes procesadas
+    """
+    procesadas = 0
+    for imagen in nombres:
+        try:
+            procesar_imagen(imagen)
+            procesadas += 1
+        except Exception:
+            continue
+    return procesadas
+
+
+def encolar_faltantes(nombres):
+    """
+    Generar en segundo plano las variantes que aún no existen
+
+    Usado por la importación masiva: solo se guardan los nombres de archivo y
+    mientras tanto el catálogo sirve la imagen original. Las imágenes que
+    todavía no están en DIRECTORIO_PRODUCTOS se ignoran.
+
+    Args:
+        nombres (iterable): Nombres de archivo de imágenes originales
+
+    Returns:
+        tuple: (encoladas, inexistentes)
+    """
+    pendientes, inexistentes = [], 0
+    for imagen in sorted(set(nombres) - {'placeholder.jpg'}):
+        if not os.path.exists(os.path.join(DIRECTORIO_PRODUCTOS, imagen)):
+            inexistentes += 1
+        elif not os.path.exists(_ruta_manifiesto(imagen)):
+            pendientes.append(imagen)
+    if pendientes:
+        futuro = trabajos.enviar(procesar_imagenes, pendientes)
+        futuro.add_done_callback(lambda _: cache_catalogo.invalidar())
+    return len(pendientes), inexistentes
+
+
+def obtener_manifiesto(imagen):
+    """
+    Leer el manifiesto de variantes de una imagen
+
+    Returns:
+        dict: Manifiesto o None si las variantes aún no existen
+    """
+    manifiesto = _manifiestos.get(imagen)
+    if manifiesto is not None:
+        return manifiesto
+    try:
+        with open(_ruta_manifiesto(imagen)) as archivo:
+            manifiesto = json.load(archivo)
+    except (OSError, ValueError):
+        return None
+    with _manifiestos_lock:
+        _manifiestos[imagen] = manifiesto
+    return manifiesto
+
+
+def url_variante(imagen, variante, extension='jpg'):
+    return f'{URL_PRODUCTOS}/variantes/{_nombre_base(imagen)}_{variante}.{extension}'
+
+
+def srcset(imagen, extension='jpg'):
+    """
+    Construir el atributo srcset con todas las variantes de un formato
+
+    Returns:
+        str: "url 400w, url 800w, ..." o '' si no hay variantes
+    """
+    manifiesto = obtener_manifiesto(imagen)
+    if not manifiesto or extension not in manifiesto['formatos']:
+        return ''
+    return ', '.join(
+        f'{url_variante(imagen, variante, extension)} {ancho}w'
+        for variante, ancho in manifiesto['variantes'].items()
+    )
+
+
+def eliminar_imagen(imagen):
+    """
+    Borrar la imagen original y todas sus variantes
+
+    Args:
+        imagen (str): Nombre del archivo original
+    """
+    base = _nombre_base(imagen)
+    rutas = [os.path.join(DIRECTORIO_PRODUCTOS, imagen), _ruta_manifiesto(imagen)]
+    for variante in VARIANTES:
+        for extension in FORMATOS:
+            rutas.append(os.path.join(DIRECTORIO_VARIANTES, f'{base}_{variante}.{extension}'))
+
+    with _manifiestos_lock:
+        _manifiestos.pop(imagen, None)
+    for ruta in rutas:
+        if os.path.exists(ruta):
+            os.remove(ruta)
@@ -0,0 +1,297 @@
+"""
+================================================================================
+MÉTRICAS POR RUTA Y PERFILADO BAJO DEMANDA
+================================================================================
+Middleware opcional (METRICAS_HABILITADAS = True) que mide, por endpoint:
+
+- Tiempo total de la petición (histograma)
+- Número de consultas SQL y tiempo en la base de datos (eventos de SQLAlchemy)
+- Tiempo de renderizado de plantillas (señales de Flask)
+- Respuestas 304 y bytes ahorrados por el GET condicional (utils/condicional.py)
+
+y, por tipo de trabajo, el tiempo de generación de los PDFs en el pool de
+procesos (utils/trabajos.py).
+
+Los valores se exponen en formato de texto de Prometheus en /metrics. Si se
+configura METRICAS_TOKEN, la ruta exige "Authorization: Bearer <token>".
+
+Perfilado: con PERFILADO_HABILITADO = True, un administrador puede agregar
+?perfil=1 a cualquier URL y recibe el informe de cProfile de esa petición en
+lugar de la página (también se guarda el .prof en instance/perfiles/ para
+abrirlo con snakeviz o pstats).
+
+Nota: Los contadores son por proceso; con varios workers de gunicorn cada
+uno expone los suyos y Prometheus los suma por instancia.
+================================================================================
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict
+
+from flask import g, request, session, has_request_context, current_app, Response, abort
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+
+from database import db
+
+PREFIJO = 'muebleria'
+
+# Límites (en segundos) de los histogramas de duración
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Límites del histograma de consultas SQL por petición (detecta N+1)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+FILAS_PERFIL = 40  # Funciones que muestra el informe de cProfile
+
+_lock = threading.Lock()
+
+
+# ============================================================================
+# REGISTRO EN MEMORIA
+# ============================================================================
+
+class Histograma:
+    """Histograma acumulativo al estilo Prometheus"""
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.conteos = [0] * len(limites)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                self.conteos[i] += 1
+        self.suma += valor
+        self.total += 1
+
+
+_peticiones = defaultdict(int)                                   # (endpoint, método, estado) → n
+_duraciones = defaultdict(lambda: Histograma(BUCKETS_SEGUNDOS))  # endpoint → histograma
+_consultas = defaultdict(lambda: Histograma(BUCKETS_CONSULTAS))  # endpoint → consultas por petición
+_sql_segundos = defaultdict(float)                               # endpoint → tiempo en SQL
+_plantillas_segundos = defaultdict(float)                        # endpoint → tiempo renderizando
+_pdf = defaultdict(lambda: Histograma(BUCKETS_SEGUNDOS))         # tipo de trabajo → histograma
+_no_modificadas = defaultdict(int)                               # endpoint → respuestas 304
+_bytes_ahorrados = defaultdict(int)                              # endpoint → cuerpos no enviados
+
+
+def registrar_pdf(tipo, segundos):
+    """Registrar la duración de la generación de un PDF (trabajo en segundo plano)"""
+    with _lock:
+        _pdf[tipo].observar(segundos)
+
+
+def registrar_no_modificada(endpoint, bytes_ahorrados):
+    """Registrar una respuesta 304 y el tamaño del cuerpo que no hizo falta enviar"""
+    with _lock:
+        _no_modificadas[endpoint] += 1
+        _bytes_ahorrados[endpoint] += bytes_ahorrados
+
+
+def reiniciar():
+    """Borrar todas las métricas acumuladas"""
+    with _lock:
+        for registro in (_peticiones, _duraciones, _consultas, _sql_segundos, _plantillas_segundos, _pdf,
+                          _no_modificadas, _bytes_ahorrados):
+            registro.clear()
+
+
+# ============================================================================
+# MEDICIÓN DE CADA PETICIÓN
+# ============================================================================
+
+def _medicion():
+    """Medición de la petición actual, o None fuera de una petición medida"""
+    if has_request_context():
+        return g.get('_metricas')
+    return None
+
+
+def _antes_de_sql(conexion, cursor, sentencia, parametros, contexto, executemany):
+    if _medicion() is not None:
+        conexion.info.setdefault('_inicio_sql', []).append(time.perf_counter())
+
+
+def _despues_de_sql(conexion, cursor, sentencia, parametros, contexto, executemany):
+    medicion = _medicion()
+    inicios = conexion.info.get('_inicio_sql')
+    if medicion is not None and inicios:
+        medicion['sql_n'] += 1
+        medicion['sql_s'] += time.perf_counter() - inicios.pop()
+
+
+def _antes_de_plantilla(app, template, context, **extra):
+    medicion = _medicion()
+    if medicion is not None:
+        medicion['plantillas_inicio'].append(time.perf_counter())
+
+
+def _plantilla_renderizada(app, template, context, **extra):
+    medicion = _medicion()
+    if medicion is not None and medicion['plantillas_inicio']:
+        medicion['plantillas_s'] += time.perf_counter() - medicion['plantillas_inicio'].pop()
+
+
+def _iniciar_peticion():
+    g._metricas = {'inicio': time.perf_counter(), 'sql_n': 0, 'sql_s': 0.0,
+                   'plantillas_s': 0.0, 'plantillas_inicio': []}
+
+
+def _finalizar_peticion(respuesta):
+    medicion = g.pop('_metricas', None)
+    if medicion is None:
+        return respuesta
+
+    endpoint = request.endpoint or 'sin_ruta'
+    if endpoint == 'metricas':
+        return respuesta
+
+    duracion = time.perf_counter() - medicion['inicio']
+    with _lock:
+        _peticiones[(endpoint, request.method, str(respuesta.status_code))] += 1
+        _duraciones[endpoint].observar(duracion)
+        _consultas[endpoint].observar(medicion['sql_n'])
+        _sql_segundos[endpoint] += medicion['sql_s']
+        _plantillas_segundos[endpoint] += medicion['plantillas_s']
+    return respuesta
+
+
+# ============================================================================
+# PERFILADO BAJO DEMANDA (SOLO ADMINISTRADORES)
+# ============================================================================
+
+def _iniciar_perfil():
+    if request.args.get('perfil') == '1' and session.get('tipo') == 'administrador':
+        g._perfil = cProfile.Profile()
+        g._perfil.enable()
+
+
+def _finalizar_perfil(respuesta):
+    perfil = g.pop('_perfil', None)
+    if perfil is None:
+        return respuesta
+    perfil.disable()
+
+    directorio = os.path.join(current_app.instance_path, 'perfiles')
+    os.makedirs(directorio, exist_ok=True)
+    nombre = f"{time.strftime('%Y%m%d-%H%M%S')}-{(request.endpoint or 'sin_ruta').replace('.', '_')}.prof"
+    perfil.dump_stats(os.path.join(directorio, nombre))
+
+    salida = io.StringIO()
+    estadisticas = pstats.Stats(perfil, stream=salida)
+    estadisticas.sort_stats('cumulative').print_stats(FILAS_PERFIL)
+    texto = (f"Perfil de {request.method} {request.full_path}\n"
+             f"Estado original: {respuesta.status}\n"
+             f"Archivo: instance/perfiles/{nombre}\n\n{salida.getvalue()}")
+    return Response(texto, mimetype='text/plain')
+
+
+# ============================================================================
+# EXPOSICIÓN EN FORMATO PROMETHEUS
+# ============================================================================
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _etiquetas(**valores):
+    pares = ','.join(f'{clave}="{_escapar(valor)}"' for clave, valor in valores.items())
+    return '{' + pares + '}'
+
+
+def _histograma(lineas, nombre, ayuda, histogramas, etiqueta):
+    lineas.append(f'# HELP {nombre} {ayuda}')
+    lineas.append(f'# TYPE {nombre} histogram')
+    for clave, histograma in sorted(histogramas.items()):
+        for limite, conteo in zip(histograma.limites, histograma.conteos):
+            lineas.append(f'{nombre}_bucket{_etiquetas(**{etiqueta: clave, "le": limite})} {conteo}')
+        lineas.append(f'{nombre}_bucket{_etiquetas(**{etiqueta: clave, "le": "+Inf"})} {histograma.total}')
+        lineas.append(f'{nombre}_sum{_etiquetas(**{etiqueta: clave})} {histograma.suma:.6f}')
+        lineas.append(f'{nombre}_count{_etiquetas(**{etiqueta: clave})} {histograma.total}')
+
+
+def _contador(lineas, nombre, ayuda, valores, formato='.6f'):
+    lineas.append(f'# HELP {nombre} {ayuda}')
+    lineas.append(f'# TYPE {nombre} counter')
+    for endpoint, valor in sorted(valores.items()):
+        lineas.append(f'{nombre}{_etiquetas(endpoint=endpoint)} {valor:{formato}}')
+
+
+def exportar():
+    """
+    Métricas acumuladas en formato de texto de Prometheus
+
+    Returns:
+        str: Cuerpo para la respuesta de /metrics
+    """
+    lineas = []
+    with _lock:
+        lineas.append(f'# HELP {PREFIJO}_peticiones_total Peticiones atendidas')
+        lineas.append(f'# TYPE {PREFIJO}_peticiones_total counter')
+        for (endpoint, metodo, estado), total in sorted(_peticiones.items()):
+            lineas.append(f'{PREFIJO}_peticiones_total'
+                          f'{_etiquetas(endpoint=endpoint, metodo=metodo, estado=estado)} {total}')
+
+        _histograma(lineas, f'{PREFIJO}_peticion_segundos', 'Duración de las peticiones',
+                    _duraciones, 'endpoint')
+        _histograma(lineas, f'{PREFIJO}_sql_consultas_por_peticion', 'Consultas SQL por petición',
+                    _consultas, 'endpoint')
+        _contador(lineas, f'{PREFIJO}_sql_segundos_total', 'Tiempo en consultas SQL', _sql_segundos)
+        _contador(lineas, f'{PREFIJO}_plantilla_segundos_total', 'Tiempo renderizando plantillas',
+                  _plantillas_segundos)
+        _contador(lineas, f'{PREFIJO}_respuestas_304_total', 'Respuestas 304 (ETag / Last-Modified)',
+                  _no_modificadas, formato='d')
+        _contador(lineas, f'{PREFIJO}_bytes_ahorrados_total', 'Bytes de cuerpo no enviados gracias a los 304',
+                  _bytes_ahorrados, formato='d')
+        _histograma(lineas, f'{PREFIJO}_pdf_segundos', 'Generación de PDFs por tipo de trabajo',
+                    _pdf, 'tipo')
+    return '\n'.join(lineas) + '\n'
+
+
+def servir_metricas():
+    """Vista de /metrics"""
+    token = current_app.config.get('METRICAS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+    return Response(exportar(), mimetype='text/plain; version=0.0.4')
+
+
+# ============================================================================
+# INTEGRACIÓN CON FLASK
+# ============================================================================
+
+def init_app(app):
+    """
+    Activar el middleware de métricas y/o el perfilado según la configuración
+
+    - METRICAS_HABILITADAS: mide cada petición y publica /metrics
+    - METRICAS_TOKEN: token Bearer requerido por /metrics (opcional)
+    - PERFILADO_HABILITADO: permite ?perfil=1 a los administradores
+    """
+    app.config.setdefault('METRICAS_HABILITADAS', False)
+    app.config.setdefault('METRICAS_TOKEN', None)
+    app.config.setdefault('PERFILADO_HABILITADO', False)
+
+    # El perfil se registra primero: empieza antes y termina después que las métricas
+    if app.config['PERFILADO_HABILITADO']:
+        app.before_request(_iniciar_perfil)
+        app.after_request(_finalizar_perfil)
+
+    if app.config['METRICAS_HABILITADAS']:
+        app.before_request(_iniciar_peticion)
+        app.after_request(_finalizar_peticion)
+        app.add_url_rule('/metrics', 'metricas', servir_metricas)
+
+        before_render_template.connect(_antes_de_plantilla, app)
+        template_rendered.connect(_plantilla_renderizada, app)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', _antes_de_sql)
+                event.listen(engine, 'after_cursor_execute', _despues_de_sql)
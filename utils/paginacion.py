@@ -0,0 +1,170 @@
+"""
+================================================================================
+PAGINACIÓN POR CURSOR (KEYSET)
+================================================================================
+Permite recorrer listados grandes sin OFFSET: cada página se pide a partir
+del último registro visto (cursor), por lo que el costo de cada página es
+constante sin importar el tamaño de la tabla.
+
+El cursor es una cadena con los valores de las columnas de orden del último
+registro, por ejemplo "2025-06-24T08:53:05.264332|42" para (fecha, id).
+================================================================================
+"""
+
+from datetime import datetime, date
+from sqlalchemy import tuple_
+
+POR_PAGINA_DEFECTO = 50   # Registros por página si no se indica otro valor
+POR_PAGINA_MAX = 200      # Límite superior para proteger memoria y latencia
+
+SEPARADOR_CURSOR = '|'
+
+
+class Pagina:
+    """
+    Resultado de una consulta paginada
+
+    Atributos:
+    - items: Registros de la página actual
+    - siguiente_cursor: Cursor para pedir la página siguiente (None si es la última)
+    - cursor: Cursor con el que se pidió esta página (None en la primera)
+    - por_pagina: Tamaño de página aplicado
+    """
+
+    def __init__(self, items, siguiente_cursor, cursor, por_pagina):
+        self.items = items
+        self.siguiente_cursor = siguiente_cursor
+        self.cursor = cursor
+        self.por_pagina = por_pagina
+
+    @property
+    def tiene_siguiente(self):
+        return self.siguiente_cursor is not None
+
+    @property
+    def es_primera(self):
+        return self.cursor is None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def limitar_por_pagina(valor):
+    """
+    Normalizar el tamaño de página pedido por el cliente
+
+    Args:
+        valor (str|int|None): Valor recibido (por ejemplo de request.args)
+
+    Returns:
+        int: Tamaño entre 1 y POR_PAGINA_MAX
+    """
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        return POR_PAGINA_DEFECTO
+    return max(1, min(valor, POR_PAGINA_MAX))
+
+
+def parametros_pagina(args):
+    """
+    Extraer cursor y tamaño de página de los argumentos de la petición
+
+    Returns:
+        tuple: (cursor, por_pagina)
+    """
+    return args.get('cursor') or None, limitar_por_pagina(args.get('por_pagina'))
+
+
+def _codificar_valor(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _decodificar_valor(columna, texto):
+    tipo = columna.type.python_type
+    if tipo is datetime:
+        return datetime.fromisoformat(texto)
+    if tipo is date:
+        return date.fromisoformat(texto)
+    return tipo(texto)
+
+
+def codificar_cursor(registro, columnas):
+    """Generar el cursor a partir de un registro y sus columnas de orden"""
+    return SEPARADOR_CURSOR.join(_codificar_valor(getattr(registro, c.key)) for c in columnas)
+
+
+def decodificar_cursor(cursor, columnas):
+    """
+    Convertir el cursor en valores tipados
+
+    Raises:
+        ValueError: Si el cursor no corresponde a las columnas
+    """
+    partes = cursor.split(SEPARADOR_CURSOR)
+    if len(partes) != len(columnas):
+        raise ValueError('Cursor inválido')
+    return [_decodificar_valor(c, p) for c, p in zip(columnas, partes)]
+
+
+def normalizar_cursor(cursor, columnas):
+    """
+    Forma canónica de un cursor (para usarlo como clave de caché)
+
+    Returns:
+        str: El cursor recodificado, o None si falta o es inválido (las dos
+             cosas significan primera página, ver paginar)
+    """
+    if not cursor:
+        return None
+    try:
+        valores = decodificar_cursor(cursor, columnas)
+    except (TypeError, ValueError):
+        return None
+    return SEPARADOR_CURSOR.join(_codificar_valor(valor) for valor in valores)
+
+
+def paginar(query, columnas, cursor=None, por_pagina=POR_PAGINA_DEFECTO, descendente=False):
+    """
+    Aplicar paginación por cursor a una consulta
+
+    Args:
+        query (Query): Consulta base (con filtros ya aplicados)
+        columnas (list): Columnas de orden, la última debe ser única (id)
+        cursor (str, optional): Cursor de la página anterior
+        por_pagina (int): Tamaño de página
+        descendente (bool): Orden descendente (más recientes primero)
+
+    Returns:
+        Pagina: Registros de la página y cursor de la siguiente
+
+    Nota: Un cursor inválido se trata como primera página
+    """
+    por_pagina = limitar_por_pagina(por_pagina)
+
+    if cursor:
+        try:
+            valores = decodificar_cursor(cursor, columnas)
+        except (TypeError, ValueError):
+            cursor, valores = None, None
+        if valores is not None:
+            if len(columnas) == 1:
+                clave, valor = columnas[0], valores[0]
+            else:
+                clave, valor = tuple_(*columnas), tuple_(*valores)
+            query = query.filter(clave < valor if descendente else clave > valor)
+
+    orden = [c.desc() if descendente else c.asc() for c in columnas]
+    filas = query.order_by(*orden).limit(por_pagina + 1).all()
+
+    siguiente = None
+    if len(filas) > por_pagina:
+        filas = filas[:por_pagina]
+        siguiente = codificar_cursor(filas[-1], columnas)
+
+    return Pagina(filas, siguiente, cursor, por_pagina)
@@ -1,67 +1,264 @@
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.utils import ImageReader
 from datetime import datetime
 import os
+import tempfile
+import threading
 from io import BytesIO
 
+# Filas de ventas por cada sub-tabla del reporte en modo streaming
+FILAS_POR_TABLA = 40
+
+# Logo de la empresa (ruta absoluta para no depender del directorio actual)
+LOGO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'images', 'logo.png')
+
+# ============================================================================
+# RECURSOS COMPARTIDOS ENTRE GENERACIONES
+# ============================================================================
+
+class _Logo(Flowable):
+    """Flowable que dibuja el logo ya decodificado (ImageReader compartido)"""
+
+    def __init__(self, imagen, width, height):
+        super().__init__()
+        self.imagen = imagen
+        self.width = width
+        self.height = height
+        self.hAlign = 'CENTER'
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.imagen, 0, 0, self.width, self.height, mask='auto')
+
+class RecursosPDF:
+    """
+    Estilos, logo y anchos de columna usados por todos los PDFs
+
+    Se construyen una sola vez por proceso (ver obtener_recursos); los
+    ParagraphStyle y TableStyle no se modifican al usarlos, por lo que se
+    pueden compartir entre documentos.
+    """
+
+    def __init__(self):
+        self.styles = getSampleStyleSheet()
+
+        # ====================================================================
+        # ESTILOS DE TÍTULO
+        # ====================================================================
+
+        # Título de reportes (azul corporativo)
+        self.titulo_reporte = ParagraphStyle(
+            'CustomTitle',
+            parent=self.styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#0d6efd')
+        )
+
+        # Título de facturas (rojo corporativo)
+        self.titulo_factura = ParagraphStyle(
+            'CustomTitleFactura',
+            parent=self.styles['Heading1'],
+            fontSize=20,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#dc3545')
+        )
+
+        # ====================================================================
+        # ESTILOS DE TABLA
+        # ====================================================================
+
+        # Tabla de datos clave/valor (información del reporte y de la factura)
+        self.estilo_info = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+
+        # Tabla de ventas sin fila de totales (sub-tablas del modo streaming)
+        self.estilo_ventas = TableStyle([
+            # Encabezado
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d6efd')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            # Filas de datos
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            # Bordes
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 8)
+        ])
+
+        # Tabla de ventas completa con fila de totales al final
+        self.estilo_ventas_con_total = TableStyle([
+            # Encabezado
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d6efd')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 8),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            # Filas de datos
+            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
+            # Fila de totales
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#dc3545')),
+            ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            # Bordes
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 8)
+        ])
+
+        # Fila suelta de totales (modo streaming)
+        self.estilo_total_ventas = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#dc3545')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 0), (-1, -1), 8)
+        ])
+
+        # Resumen por tipo de venta
+        self.estilo_resumen = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#28a745')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+
+        # Detalle de la factura con totales
+        self.estilo_detalle_factura = TableStyle([
+            # Encabezado
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dc3545')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            # Totales
+            ('BACKGROUND', (0, -3), (-1, -1), colors.lightgrey),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+
+        # Inventario de productos
+        self.estilo_productos = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d6efd')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+
+        # ====================================================================
+        # ANCHOS DE COLUMNA
+        # ====================================================================
+
+        self.anchos = {
+            'info': [2*inch, 3*inch],
+            'ventas': [0.4*inch, 0.8*inch, 1.2*inch, 1.5*inch, 0.5*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch],
+            'resumen': [2*inch, 1*inch, 1.5*inch],
+            'agrupados': [2.5*inch, 0.8*inch, 0.8*inch, 1.5*inch],
+            'detalle_factura': [3*inch, 1*inch, 1.5*inch, 1.5*inch],
+            'productos': [0.5*inch, 2.5*inch, 1.5*inch, 1*inch, 0.8*inch, 1*inch],
+        }
+
+        # ====================================================================
+        # LOGO DECODIFICADO
+        # ====================================================================
+
+        # Si no se puede cargar el logo, los documentos se generan sin él
+        self.logo = None
+        try:
+            if os.path.exists(LOGO_PATH):
+                self.logo = ImageReader(LOGO_PATH)
+                self.logo.getRGBData()  # Decodificar una sola vez
+        except Exception:
+            self.logo = None
+
+    def logo_flowable(self):
+        """Nuevo flowable del logo (los flowables no se comparten entre documentos)"""
+        if self.logo is None:
+            return None
+        return _Logo(self.logo, 2*inch, 1*inch)
+
+_recursos = None
+_recursos_lock = threading.Lock()
+
+def obtener_recursos():
+    """Obtener el registro de recursos, creándolo en el primer uso"""
+    global _recursos
+    if _recursos is None:
+        with _recursos_lock:
+            if _recursos is None:
+                _recursos = RecursosPDF()
+    return _recursos
+
+def _encabezado(story, recursos, titulo_estilo, subtitulo):
+    """Agregar logo y títulos comunes al inicio del documento"""
+    logo = recursos.logo_flowable()
+    if logo:
+        story.append(logo)
+    story.append(Paragraph("MUEBLES MET VIL", titulo_estilo))
+    story.append(Paragraph(subtitulo, recursos.styles['Heading2']))
+    story.append(Spacer(1, 20))
+
+def _tabla_resumen_tipos(recursos, directas, total_directas, por_compra, total_por_compra):
+    resumen_data = [
+        ['Tipo de Venta', 'Cantidad', 'Total'],
+        ['Ventas Directas', str(directas), f'${total_directas:,.2f}'],
+        ['Ventas por Compras', str(por_compra), f'${total_por_compra:,.2f}']
+    ]
+    return Table(resumen_data, colWidths=recursos.anchos['resumen'], style=recursos.estilo_resumen)
+
 def generar_reporte_ventas(ventas, filename=None):
     # Generar nombre de archivo único si no se proporciona
     if filename is None:
         filename = f"reporte_ventas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    
+
     # Crear buffer en memoria para el PDF
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     story = []  # Lista de elementos que conformarán el PDF
-    styles = getSampleStyleSheet()
-    
-    # ========================================================================
-    # CONFIGURACIÓN DE ESTILOS PERSONALIZADOS
-    # ========================================================================
-    
-    # Estilo para el título principal
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#0d6efd')  # Azul corporativo
-    )
-    
+    recursos = obtener_recursos()
+    styles = recursos.styles
+
     # ========================================================================
     # ENCABEZADO DEL DOCUMENTO
     # ========================================================================
-    
-    # Intentar agregar logo de la empresa
-    try:
-        logo_path = "static/images/logo.png"
-        if os.path.exists(logo_path):
-            logo = Image(logo_path, width=2*inch, height=1*inch)
-            logo.hAlign = 'CENTER'
-            story.append(logo)
-    except:
-        # Si no se puede cargar el logo, continuar sin él
-        pass
-    
-    # Títulos del documento
-    story.append(Paragraph("MUEBLES MET VIL", title_style))
-    story.append(Paragraph("Reporte Completo de Ventas", styles['Heading2']))
-    story.append(Spacer(1, 20))
-    
+
+    _encabezado(story, recursos, recursos.titulo_reporte, "Reporte Completo de Ventas")
+
     # ========================================================================
     # INFORMACIÓN GENERAL DEL REPORTE
     # ========================================================================
-    
+
     # Calcular estadísticas generales
     total_ventas = sum(venta.total for venta in ventas)
     ventas_directas = [v for v in ventas if v.tipo_venta == 'directa']
     ventas_por_compra = [v for v in ventas if v.tipo_venta == 'por_compra']
-    
+
     # Tabla con información del reporte
     info_data = [
         ['Fecha de generación:', datetime.now().strftime('%d/%m/%Y %H:%M:%S')],
@@ -71,32 +268,23 @@ def generar_reporte_ventas(ventas, filename=None):
         ['Total ingresos:', f'${total_ventas:,.2f}'],
         ['Generado por:', 'Sistema Administrativo']
     ]
-    
-    # Crear y estilizar tabla de información
-    info_table = Table(info_data, colWidths=[2*inch, 3*inch])
-    info_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(info_table)
+
+    story.append(Table(info_data, colWidths=recursos.anchos['info'], style=recursos.estilo_info))
     story.append(Spacer(1, 20))
-    
+
     # ========================================================================
     # TABLA PRINCIPAL DE VENTAS
     # ========================================================================
-    
+
     if ventas:
         # Encabezados de la tabla
         data = [['ID', 'Fecha', 'Cliente', 'Producto', 'Cant.', 'P.Unit.', 'Total', 'Tipo', 'Origen']]
-        
+
         # Agregar cada venta a la tabla
         for venta in ventas:
             tipo_badge = 'Directa' if venta.tipo_venta == 'directa' else 'Por Compra'
             origen = f'Compra #{venta.compra_id}' if venta.compra_id else 'Manual'
-            
+
             data.append([
                 str(venta.id),
                 venta.fecha.strftime('%d/%m/%Y'),
@@ -108,108 +296,197 @@ def generar_reporte_ventas(ventas, filename=None):
                 tipo_badge,
                 origen
             ])
-        
+
         # Fila de totales
         data.append(['', '', '', '', '', '', f'${total_ventas:,.2f}', 'TOTAL', ''])
-        
-        # Crear tabla con anchos de columna específicos
-        table = Table(data, colWidths=[0.4*inch, 0.8*inch, 1.2*inch, 1.5*inch, 0.5*inch, 0.8*inch, 0.8*inch, 0.8*inch, 0.8*inch])
-        
-        # Aplicar estilos a la tabla
-        table.setStyle(TableStyle([
-            # Encabezado
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d6efd')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            # Filas de datos
-            ('BACKGROUND', (0, 1), (-1, -2), colors.beige),
-            # Fila de totales
-            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#dc3545')),
-            ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            # Bordes
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 8)
-        ]))
-        story.append(table)
-        
+
+        story.append(Table(data, colWidths=recursos.anchos['ventas'], style=recursos.estilo_ventas_con_total))
+
         # ====================================================================
         # RESUMEN POR TIPO DE VENTA
         # ====================================================================
-        
+
         story.append(Spacer(1, 20))
         story.append(Paragraph("Resumen por Tipo de Venta", styles['Heading3']))
-        
-        resumen_data = [
-            ['Tipo de Venta', 'Cantidad', 'Total'],
-            ['Ventas Directas', str(len(ventas_directas)), f'${sum(v.total for v in ventas_directas):,.2f}'],
-            ['Ventas por Compras', str(len(ventas_por_compra)), f'${sum(v.total for v in ventas_por_compra):,.2f}']
-        ]
-        
-        resumen_table = Table(resumen_data, colWidths=[2*inch, 1*inch, 1.5*inch])
-        resumen_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#28a745')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        story.append(resumen_table)
-        
+        story.append(_tabla_resumen_tipos(
+            recursos,
+            len(ventas_directas), sum(v.total for v in ventas_directas),
+            len(ventas_por_compra), sum(v.total for v in ventas_por_compra)
+        ))
+
     else:
         # Mensaje si no hay ventas
         story.append(Paragraph("No hay ventas registradas en el período seleccionado.", styles['Normal']))
-    
+
     # Construir el PDF y retornar buffer
     doc.build(story)
     buffer.seek(0)
     return buffer
 
+class _HistoriaPerezosa(list):
+    """
+    Lista de flowables que se rellena bajo demanda desde un generador
+
+    SimpleDocTemplate.build consume la historia desde el inicio (len,
+    historia[0], del historia[0]); al rellenarla solo cuando quedan pocos
+    elementos, nunca hay más de unas pocas sub-tablas en memoria.
+    """
+
+    MINIMO_EN_COLA = 2  # build() mira un elemento adelante (keepWithNext)
+
+    def __init__(self, iniciales, generador):
+        super().__init__(iniciales)
+        self._generador = generador
+
+    def _rellenar(self):
+        while self._generador is not None and list.__len__(self) < self.MINIMO_EN_COLA:
+            try:
+                self.append(next(self._generador))
+            except StopIteration:
+                self._generador = None
+
+    def __len__(self):
+        self._rellenar()
+        return list.__len__(self)
+
+    def __getitem__(self, indice):
+        self._rellenar()
+        return list.__getitem__(self, indice)
+
+def _bloques_ventas(filas, stats, recursos, tamano_bloque):
+    """
+    Generar las sub-tablas del reporte a partir de un iterador de filas
+
+    Args:
+        filas (iterable): Tuplas (id, fecha, cliente, producto, cantidad,
+                          precio_unitario, total, tipo_venta, compra_id)
+        stats (dict): Resultado de Venta.stats() para totales y resumen
+        recursos (RecursosPDF): Estilos y anchos compartidos
+        tamano_bloque (int): Filas por sub-tabla
+    """
+    encabezado = ['ID', 'Fecha', 'Cliente', 'Producto', 'Cant.', 'P.Unit.', 'Total', 'Tipo', 'Origen']
+    anchos = recursos.anchos['ventas']
+    estilo = recursos.estilo_ventas
+
+    bloque = [encabezado]
+    for venta_id, fecha, cliente, producto, cantidad, precio_unitario, total, tipo_venta, compra_id in filas:
+        bloque.append([
+            str(venta_id),
+            fecha.strftime('%d/%m/%Y') if fecha else '',
+            cliente,
+            producto or 'N/A',
+            str(cantidad),
+            f'${precio_unitario:,.2f}',
+            f'${total:,.2f}',
+            'Directa' if tipo_venta == 'directa' else 'Por Compra',
+            f'Compra #{compra_id}' if compra_id else 'Manual'
+        ])
+        if len(bloque) > tamano_bloque:
+            yield Table(bloque, colWidths=anchos, style=estilo, repeatRows=1)
+            bloque = [encabezado]
+    if len(bloque) > 1:
+        yield Table(bloque, colWidths=anchos, style=estilo, repeatRows=1)
+
+    # Fila de totales
+    yield Table([['', '', '', '', '', '', f'${stats["ingresos"]:,.2f}', 'TOTAL', '']],
+                colWidths=anchos, style=recursos.estilo_total_ventas)
+
+    # Resumen por tipo de venta
+    yield Spacer(1, 20)
+    yield Paragraph("Resumen por Tipo de Venta", recursos.styles['Heading3'])
+    yield _tabla_resumen_tipos(
+        recursos,
+        stats['directa']['cantidad'], stats['directa']['ingresos'],
+        stats['por_compra']['cantidad'], stats['por_compra']['ingresos']
+    )
+
+def _tablas_agrupadas(recursos, agrupados):
+    """
+    Ingresos por categoría y productos más vendidos
+
+    Args:
+        agrupados (dict): 'por_categoria' y 'por_producto', listas de tuplas
+                          (clave, ventas, unidades, ingresos)
+    """
+    secciones = [
+        ("Ingresos por Categoría", 'Categoría', agrupados['por_categoria']),
+        (f"Top {len(agrupados['por_producto'])} Productos por Ingresos", 'Producto', agrupados['por_producto']),
+    ]
+    for titulo, columna, filas in secciones:
+        if not filas:
+            continue
+        data = [[columna, 'Ventas', 'Unidades', 'Ingresos']]
+        data.extend([str(clave)[:35], str(ventas), str(unidades), f'${ingresos:,.2f}']
+                    for clave, ventas, unidades, ingresos in filas)
+        yield Paragraph(titulo, recursos.styles['Heading3'])
+        yield Table(data, colWidths=recursos.anchos['agrupados'], style=recursos.estilo_resumen)
+        yield Spacer(1, 20)
+
+def generar_reporte_ventas_stream(filas, stats, destino=None, tamano_bloque=FILAS_POR_TABLA, agrupados=None):
+    """
+    Generar el reporte de ventas sin cargar todas las ventas en memoria
+
+    Args:
+        filas (iterable): Filas de Venta.iter_filas_reporte() (leídas por lotes)
+        stats (dict): Totales de Venta.stats()
+        destino (file, optional): Archivo binario de salida; por defecto un
+                                  archivo temporal que se borra al cerrarse
+        tamano_bloque (int): Filas por sub-tabla (aprox. una página)
+        agrupados (dict, optional): Ingresos por categoría y top de productos
+                                    (ver _tablas_agrupadas)
+
+    Returns:
+        file: Archivo de destino posicionado al inicio, listo para send_file
+    """
+    if destino is None:
+        destino = tempfile.TemporaryFile()
+
+    doc = SimpleDocTemplate(destino, pagesize=A4)
+    recursos = obtener_recursos()
+    story = []
+
+    _encabezado(story, recursos, recursos.titulo_reporte, "Reporte Completo de Ventas")
+
+    info_data = [
+        ['Fecha de generación:', datetime.now().strftime('%d/%m/%Y %H:%M:%S')],
+        ['Total de ventas:', str(stats['cantidad'])],
+        ['Ventas directas:', str(stats['directa']['cantidad'])],
+        ['Ventas por compras:', str(stats['por_compra']['cantidad'])],
+        ['Total ingresos:', f'${stats["ingresos"]:,.2f}'],
+        ['Generado por:', 'Sistema Administrativo']
+    ]
+    story.append(Table(info_data, colWidths=recursos.anchos['info'], style=recursos.estilo_info))
+    story.append(Spacer(1, 20))
+
+    if agrupados:
+        story.extend(_tablas_agrupadas(recursos, agrupados))
+
+    if stats['cantidad']:
+        story = _HistoriaPerezosa(story, _bloques_ventas(filas, stats, recursos, tamano_bloque))
+    else:
+        story.append(Paragraph("No hay ventas registradas en el período seleccionado.", recursos.styles['Normal']))
+
+    doc.build(story)
+    destino.seek(0)
+    return destino
+
 def generar_factura_compra(compra, filename=None):
-    
+
     if filename is None:
         filename = f"factura_compra_{compra.id}_{datetime.now().strftime('%Y%m%d')}.pdf"
-    
+
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     story = []
-    styles = getSampleStyleSheet()
-    
-    # Estilo personalizado para facturas
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        spaceAfter=20,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#dc3545')  # Rojo corporativo
-    )
-    
+    recursos = obtener_recursos()
+    styles = recursos.styles
+
     # ========================================================================
     # ENCABEZADO DE LA FACTURA
     # ========================================================================
-    
-    # Logo de la empresa
-    try:
-        logo_path = "static/images/logo.png"
-        if os.path.exists(logo_path):
-            logo = Image(logo_path, width=2*inch, height=1*inch)
-            logo.hAlign = 'CENTER'
-            story.append(logo)
-    except:
-        pass
-    
-    # Títulos
-    story.append(Paragraph("MUEBLES MET VIL", title_style))
-    story.append(Paragraph("FACTURA DE COMPRA", styles['Heading2']))
-    story.append(Spacer(1, 20))
-    
+
+    _encabezado(story, recursos, recursos.titulo_factura, "FACTURA DE COMPRA")
+
     # Información de la empresa
     empresa_info = [
         "Dirección: Calle 123 #45-67, Ciudad",
@@ -217,15 +494,15 @@ def generar_factura_compra(compra, filename=None):
         "Email: info@mueblesmetvil.com",
         "NIT: 123.456.789-0"
     ]
-    
+
     for info in empresa_info:
         story.append(Paragraph(info, styles['Normal']))
     story.append(Spacer(1, 20))
-    
+
     # ========================================================================
     # INFORMACIÓN DE LA FACTURA
     # ========================================================================
-    
+
     factura_data = [
         ['Factura No.:', f"FAC-{compra.id:06d}"],
         ['Fecha:', compra.fecha_aprobacion.strftime('%d/%m/%Y') if compra.fecha_aprobacion else compra.fecha.strftime('%d/%m/%Y')],
@@ -233,113 +510,71 @@ def generar_factura_compra(compra, filename=None):
         ['Estado:', compra.estado.upper()],
         ['Venta Relacionada:', f"#{compra.venta[0].id}" if hasattr(compra, 'venta') and compra.venta else 'N/A']
     ]
-    
-    factura_table = Table(factura_data, colWidths=[2*inch, 3*inch])
-    factura_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(factura_table)
+
+    story.append(Table(factura_data, colWidths=recursos.anchos['info'], style=recursos.estilo_info))
     story.append(Spacer(1, 20))
-    
+
     # ========================================================================
     # DETALLE DE LA COMPRA
     # ========================================================================
-    
+
     story.append(Paragraph("DETALLE DE LA COMPRA", styles['Heading3']))
     story.append(Spacer(1, 10))
-    
+
     # Tabla de productos
     detalle_data = [
         ['Producto', 'Cantidad', 'Precio Unitario', 'Total']
     ]
-    
+
     detalle_data.append([
         compra.producto.nombre if compra.producto else 'N/A',
         str(compra.cantidad),
         f'${compra.precio_unitario:,.2f}',
         f'${compra.total:,.2f}'
     ])
-    
+
     # Cálculos de totales
     detalle_data.append(['', '', 'SUBTOTAL:', f'${compra.total:,.2f}'])
     detalle_data.append(['', '', 'IVA (19%):', f'${compra.total * 0.19:,.2f}'])
     detalle_data.append(['', '', 'TOTAL:', f'${compra.total * 1.19:,.2f}'])
-    
-    detalle_table = Table(detalle_data, colWidths=[3*inch, 1*inch, 1.5*inch, 1.5*inch])
-    detalle_table.setStyle(TableStyle([
-        # Encabezado
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dc3545')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        # Totales
-        ('BACKGROUND', (0, -3), (-1, -1), colors.lightgrey),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    story.append(detalle_table)
+
+    story.append(Table(detalle_data, colWidths=recursos.anchos['detalle_factura'], style=recursos.estilo_detalle_factura))
     story.append(Spacer(1, 30))
-    
+
     # ========================================================================
     # PIE DE PÁGINA
     # ========================================================================
-    
+
     story.append(Paragraph("¡Gracias por su compra!", styles['Heading3']))
     story.append(Paragraph("Esta factura es válida como comprobante de compra.", styles['Normal']))
-    
+
     # Agregar comentarios si existen
     if compra.comentarios:
         story.append(Spacer(1, 20))
         story.append(Paragraph(f"Comentarios: {compra.comentarios}", styles['Normal']))
-    
+
     # Construir PDF
     doc.build(story)
     buffer.seek(0)
     return buffer
 
 def generar_reporte_productos(productos, filename=None):
-    
+
     if filename is None:
         filename = f"reporte_productos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    
+
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     story = []
-    styles = getSampleStyleSheet()
-    
+    recursos = obtener_recursos()
+
     # Logo y título
-    try:
-        logo_path = "static/images/logo.png"
-        if os.path.exists(logo_path):
-            logo = Image(logo_path, width=2*inch, height=1*inch)
-            logo.hAlign = 'CENTER'
-            story.append(logo)
-    except:
-        pass
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#0d6efd')
-    )
-    
-    story.append(Paragraph("MUEBLES MET VIL", title_style))
-    story.append(Paragraph("Reporte de Inventario", styles['Heading2']))
-    story.append(Spacer(1, 20))
-    
+    _encabezado(story, recursos, recursos.titulo_reporte, "Reporte de Inventario")
+
     # Tabla de productos
     if productos:
         data = [['ID', 'Nombre', 'Categoría', 'Precio', 'Stock', 'Estado']]
-        
+
         for producto in productos:
             estado = 'Disponible' if producto.stock > 0 else 'Agotado'
             data.append([
@@ -350,20 +585,9 @@ def generar_reporte_productos(productos, filename=None):
                 str(producto.stock),
                 estado
             ])
-        
-        table = Table(data, colWidths=[0.5*inch, 2.5*inch, 1.5*inch, 1*inch, 0.8*inch, 1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d6efd')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        story.append(table)
-    
+
+        story.append(Table(data, colWidths=recursos.anchos['productos'], style=recursos.estilo_productos))
+
     doc.build(story)
     buffer.seek(0)
     return buffer
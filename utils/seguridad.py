@@ -0,0 +1,86 @@
+"""
+================================================================================
+UTILIDADES DE SEGURIDAD - HASH DE CONTRASEÑAS
+================================================================================
+Centraliza el hash y la verificación de contraseñas de usuarios y
+administradores.
+
+- Las contraseñas se guardan con un hash lento y con sal (scrypt de Werkzeug)
+- Las contraseñas antiguas en texto plano se siguen aceptando y se
+  actualizan a hash en el siguiente inicio de sesión exitoso
+- El hash se verifica solo al iniciar sesión: después la identidad viaja en
+  la cookie firmada de la sesión de Flask, así que el costo se paga una vez
+  por sesión. No se guardan verificaciones en memoria (una caché por
+  contraseña permitiría comprobarla con un hash rápido)
+- Si la cuenta no existe se verifica igual contra un hash ficticio, para
+  que el tiempo de respuesta no revele qué usuarios están registrados
+================================================================================
+"""
+
+import hmac
+import secrets
+from functools import lru_cache
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Prefijos de los métodos de hash soportados por Werkzeug
+METODOS_HASH = ('scrypt:', 'pbkdf2:')
+
+
+def hash_password(password):
+    """
+    Generar el hash con sal de una contraseña
+
+    Args:
+        password (str): Contraseña en texto plano
+
+    Returns:
+        str: Hash listo para guardar en la base de datos
+    """
+    return generate_password_hash(password)
+
+
+def es_hash(valor):
+    """Indica si el valor guardado ya es un hash (y no texto plano)"""
+    return bool(valor) and valor.startswith(METODOS_HASH)
+
+
+def verificar_password(guardado, password):
+    """
+    Verificar una contraseña contra el valor guardado
+
+    Args:
+        guardado (str): Hash (o texto plano heredado) de la base de datos
+        password (str): Contraseña enviada en el formulario
+
+    Returns:
+        bool: True si la contraseña es correcta
+    """
+    if not guardado or password is None:
+        return False
+
+    # Registros heredados: comparación en tiempo constante sobre texto plano
+    if not es_hash(guardado):
+        return hmac.compare_digest(guardado.encode('utf-8'), password.encode('utf-8'))
+
+    return check_password_hash(guardado, password)
+
+
+@lru_cache(maxsize=None)
+def _hash_ficticio():
+    """Hash de una contraseña aleatoria, con el mismo método y costo que los reales"""
+    return generate_password_hash(secrets.token_urlsafe(16))
+
+
+def verificar_sin_cuenta(password):
+    """
+    Hacer el mismo trabajo que verificar_password cuando la cuenta no existe
+
+    Args:
+        password (str): Contraseña enviada en el formulario
+
+    Returns:
+        bool: Siempre False
+    """
+    check_password_hash(_hash_ficticio(), password or '')
+    return False
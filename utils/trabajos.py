@@ -0,0 +1,359 @@
+"""
+================================================================================
+EJECUTOR DE TRABAJOS EN SEGUNDO PLANO
+================================================================================
+Ejecuta la generación de PDFs (reportes y facturas) en un pool de procesos
+para que los hilos de las peticiones nunca queden bloqueados en reportlab.
+
+Flujo:
+1. La petición llama a encolar() → se crea un registro Trabajo 'pendiente'
+2. El pool ejecuta ejecutar_trabajo() en otro proceso con su propio contexto
+3. El hijo informa el avance por etapas (filas procesadas del reporte)
+4. El navegador consulta /trabajos/<id>/estado hasta que esté 'completado'
+5. El archivo se descarga desde /trabajos/<id>/descargar
+
+Recuperación y limpieza (limpiar(), también `flask limpiar-trabajos`):
+- Si un proceso hijo muere (BrokenProcessPool) su trabajo pasa a 'error' y
+  el pool se recrea en el siguiente envío
+- Un trabajo activo más antiguo que TRABAJOS_TIEMPO_MAXIMO_MINUTOS se da por
+  perdido (ej. el servidor se reinició con trabajos en cola)
+- Los trabajos terminados y sus archivos se eliminan pasadas
+  TRABAJOS_RETENCION_HORAS; cada proceso web lo hace al encolar, como
+  máximo una vez cada INTERVALO_LIMPIEZA segundos
+================================================================================
+"""
+
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from database import db, transaccion
+from models.trabajo_model import Trabajo
+
+MAX_WORKERS_DEFECTO = 2
+RETENCION_HORAS_DEFECTO = 24        # Horas que se conservan los trabajos terminados y sus archivos
+TIEMPO_MAXIMO_MINUTOS_DEFECTO = 30  # Un trabajo activo más antiguo se da por perdido
+INTERVALO_LIMPIEZA = 600            # Segundos entre limpiezas automáticas de cada proceso web
+
+PROGRESO_INICIO = 5                 # Al empezar la generación
+PROGRESO_FIN = 95                   # Generación terminada, falta mover el archivo
+PASO_PROGRESO = 5                   # Puntos porcentuales mínimos entre actualizaciones
+FILAS_POR_AVANCE = 1000             # Cada cuántas filas del reporte se calcula el avance
+
+_pool = None
+_pool_lock = threading.Lock()
+_ultima_limpieza = 0.0
+
+
+def obtener_pool():
+    """
+    Obtener (o crear) el pool de procesos compartido por este proceso web
+
+    Se usa el método 'spawn' para que cada proceso hijo abra sus propias
+    conexiones a la base de datos en lugar de heredar las del padre.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            max_workers = current_app.config.get('TRABAJOS_MAX_WORKERS', MAX_WORKERS_DEFECTO)
+            _pool = ProcessPoolExecutor(max_workers=max_workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _reiniciar_pool(roto):
+    """Descartar el pool roto (si otro hilo no lo reemplazó ya)"""
+    global _pool
+    with _pool_lock:
+        if _pool is roto:
+            _pool = None
+    roto.shutdown(wait=False, cancel_futures=True)
+
+
+def _es_pool_roto(futuro):
+    return not futuro.cancelled() and isinstance(futuro.exception(), BrokenProcessPool)
+
+
+def enviar(funcion, *args):
+    """
+    Enviar una función al pool, recreándolo si un proceso hijo murió
+
+    Returns:
+        Future: Resultado pendiente de la función
+    """
+    pool = obtener_pool()
+    try:
+        futuro = pool.submit(funcion, *args)
+    except BrokenProcessPool:
+        _reiniciar_pool(pool)
+        pool = obtener_pool()
+        futuro = pool.submit(funcion, *args)
+    # Si el hijo muere durante la ejecución, el próximo envío usa un pool nuevo
+    futuro.add_done_callback(lambda f: _es_pool_roto(f) and _reiniciar_pool(pool))
+    return futuro
+
+
+def directorio_trabajos(app=None):
+    """Carpeta donde se guardan los archivos generados"""
+    app = app or current_app
+    directorio = os.path.join(app.instance_path, 'trabajos')
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def encolar(tipo, parametros=None, nombre_descarga=None, solicitado_por=None, tipo_solicitante=None):
+    """
+    Registrar un trabajo y enviarlo al pool de procesos
+
+    Args:
+        tipo (str): Uno de los tipos de GENERADORES
+        parametros (dict, optional): Parámetros del trabajo
+        nombre_descarga (str, optional): Nombre del archivo al descargar
+        solicitado_por (int, optional): ID de quien lo pide
+        tipo_solicitante (str, optional): 'usuario' o 'administrador'
+
+    Returns:
+        Trabajo: Registro creado (estado 'pendiente')
+
+    Nota: Confirma el trabajo antes de enviarlo (el hijo lo lee de la base
+    de datos), por eso no se puede llamar dentro de transaccion()
+    """
+    if tipo not in GENERADORES:
+        raise ValueError(f'Tipo de trabajo desconocido: {tipo}')
+    if db.session.info.get('en_transaccion'):
+        raise RuntimeError('encolar() no se puede llamar dentro de transaccion()')
+
+    _limpiar_si_corresponde()
+
+    trabajo = Trabajo(tipo, parametros, nombre_descarga, solicitado_por, tipo_solicitante)
+    with transaccion():
+        trabajo.save()
+
+    app = current_app._get_current_object()
+    trabajo_id = trabajo.id
+    futuro = enviar(ejecutar_trabajo, trabajo_id)
+    futuro.add_done_callback(lambda f: _al_terminar(app, tipo, trabajo_id, f))
+    return trabajo
+
+
+def _al_terminar(app, tipo, trabajo_id, futuro):
+    """
+    Callback en el proceso web cuando el hijo termina
+
+    - Publica en utils/metricas el tiempo de generación informado por el hijo
+    - Si el hijo murió (BrokenProcessPool) o falló fuera de ejecutar_trabajo,
+      el trabajo no pudo registrar su error: se marca aquí
+    """
+    from utils import metricas
+
+    if futuro.cancelled():
+        error = 'El trabajo fue cancelado'
+    elif futuro.exception() is not None:
+        error = futuro.exception()
+        if isinstance(error, BrokenProcessPool):
+            error = 'El proceso que generaba el archivo terminó inesperadamente'
+    else:
+        if futuro.result() is not None:
+            metricas.registrar_pdf(tipo, futuro.result())
+        return
+
+    with app.app_context():
+        with transaccion():
+            Trabajo.marcar_error(trabajo_id, str(error))
+
+
+# ============================================================================
+# EJECUCIÓN EN EL PROCESO HIJO
+# ============================================================================
+
+def ejecutar_trabajo(trabajo_id):
+    """
+    Punto de entrada en el proceso hijo: genera el archivo del trabajo
+
+    Args:
+        trabajo_id (str): ID del trabajo a ejecutar
+
+    Returns:
+        float: Segundos que tomó generar el archivo (None si no se generó)
+    """
+    from app import app
+
+    with app.app_context():
+        trabajo = Trabajo.get_by_id(trabajo_id)
+        if trabajo is None or trabajo.estado != 'pendiente':
+            return  # Eliminado, o dado por perdido mientras esperaba en la cola
+
+        with transaccion():
+            trabajo.update(estado='en_proceso', progreso=PROGRESO_INICIO)
+        ruta = os.path.join(directorio_trabajos(app), f'{trabajo.id}.pdf')
+        ruta_temporal = ruta + '.tmp'
+        try:
+            inicio = time.perf_counter()
+            with open(ruta_temporal, 'wb') as destino:
+                GENERADORES[trabajo.tipo](trabajo.get_parametros(), destino, _Progreso(trabajo.id))
+            duracion = time.perf_counter() - inicio
+            os.replace(ruta_temporal, ruta)
+            with transaccion():
+                trabajo.update(estado='completado', progreso=100, archivo=ruta)
+            return duracion
+        except Exception as e:
+            db.session.rollback()
+            if os.path.exists(ruta_temporal):
+                os.remove(ruta_temporal)
+            with transaccion():
+                trabajo.update(estado='error', error=str(e))
+
+
+class _Progreso:
+    """
+    Avance de una generación: recibe la fracción hecha (0 a 1) y la guarda
+    como porcentaje entre PROGRESO_INICIO y PROGRESO_FIN, solo cuando avanzó
+    al menos PASO_PROGRESO puntos
+    """
+
+    def __init__(self, trabajo_id):
+        self.trabajo_id = trabajo_id
+        self.ultimo = PROGRESO_INICIO
+
+    def __call__(self, fraccion):
+        fraccion = min(max(fraccion, 0.0), 1.0)
+        porcentaje = PROGRESO_INICIO + int((PROGRESO_FIN - PROGRESO_INICIO) * fraccion)
+        if porcentaje - self.ultimo >= PASO_PROGRESO:
+            Trabajo.registrar_progreso(self.trabajo_id, porcentaje)
+            self.ultimo = porcentaje
+
+
+def _con_avance(filas, total, progreso):
+    """Recorrer las filas informando el avance cada FILAS_POR_AVANCE"""
+    for numero, fila in enumerate(filas, start=1):
+        if numero % FILAS_POR_AVANCE == 0:
+            progreso(numero / total)
+        yield fila
+
+
+def _generar_reporte_ventas(parametros, destino, progreso):
+    from models.venta_model import Venta
+    from utils import analitica
+    from utils.pdf_generator import generar_reporte_ventas_stream
+    # Ingresos por categoría y top de productos con la capa pandas (por bloques)
+    agrupados = analitica.resumen(secciones=('categoria', 'producto'))
+    stats = Venta.stats()
+    # Las filas se consumen mientras reportlab arma las páginas: el avance
+    # sigue a la generación real del documento
+    filas = _con_avance(Venta.iter_filas_reporte(), max(stats['cantidad'], 1), progreso)
+    generar_reporte_ventas_stream(filas, stats, destino, agrupados=agrupados)
+
+
+def _generar_reporte_productos(parametros, destino, progreso):
+    from models.producto_model import Producto
+    from utils.pdf_generator import generar_reporte_productos
+    productos = Producto.get_all()
+    progreso(0.3)
+    destino.write(generar_reporte_productos(productos).getvalue())
+
+
+def _generar_factura(parametros, destino, progreso):
+    from models.compra_model import Compra
+    from utils import cache_facturas
+    compra = Compra.get_by_id(parametros['compra_id'])
+    if compra is None:
+        raise ValueError('Compra no encontrada')
+    progreso(0.2)
+    # La factura queda también en la caché para las siguientes descargas
+    ruta, _ = cache_facturas.obtener_o_generar(compra)
+    progreso(0.9)
+    with open(ruta, 'rb') as origen:
+        shutil.copyfileobj(origen, destino)
+
+
+# Tipos de trabajo soportados y su función generadora
+GENERADORES = {
+    'reporte_ventas': _generar_reporte_ventas,
+    'reporte_productos': _generar_reporte_productos,
+    'factura': _generar_factura,
+}
+
+
+# ============================================================================
+# RECUPERACIÓN Y LIMPIEZA
+# ============================================================================
+
+def limpiar(app=None):
+    """
+    Dar por perdidos los trabajos colgados y borrar los vencidos
+
+    1. Los trabajos activos encolados hace más de TRABAJOS_TIEMPO_MAXIMO_MINUTOS
+       pasan a 'error' (su proceso murió o el servidor se reinició)
+    2. Los trabajos terminados hace más de TRABAJOS_RETENCION_HORAS se
+       eliminan junto con su archivo
+    3. Se borran los archivos sueltos de instance/trabajos más antiguos que la
+       retención (temporales de generaciones interrumpidas)
+
+    Returns:
+        dict: Cantidades 'abandonados', 'eliminados' y 'archivos'
+    """
+    app = app or current_app
+    ahora = datetime.utcnow()
+    tiempo_maximo = timedelta(minutes=app.config.get('TRABAJOS_TIEMPO_MAXIMO_MINUTOS', TIEMPO_MAXIMO_MINUTOS_DEFECTO))
+    retencion = timedelta(hours=app.config.get('TRABAJOS_RETENCION_HORAS', RETENCION_HORAS_DEFECTO))
+
+    with transaccion():
+        abandonados = Trabajo.marcar_abandonados(ahora - tiempo_maximo,
+                                                 'El trabajo superó el tiempo máximo sin terminar')
+        expirados = Trabajo.get_expirados(ahora - retencion)
+        for trabajo in expirados:
+            trabajo.delete()
+    # Los archivos se borran después del commit: nunca queda un trabajo sin su archivo
+    archivos = [trabajo.archivo for trabajo in expirados if trabajo.archivo]
+
+    limite_archivos = time.time() - retencion.total_seconds()
+    directorio = directorio_trabajos(app)
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        try:
+            if os.path.getmtime(ruta) < limite_archivos:
+                archivos.append(ruta)
+        except OSError:
+            continue
+
+    borrados = 0
+    for ruta in set(archivos):
+        try:
+            os.remove(ruta)
+            borrados += 1
+        except OSError:
+            pass
+    return {'abandonados': abandonados, 'eliminados': len(expirados), 'archivos': borrados}
+
+
+def _limpiar_si_corresponde():
+    """Ejecutar limpiar() como máximo una vez cada INTERVALO_LIMPIEZA por proceso"""
+    global _ultima_limpieza
+    ahora = time.monotonic()
+    if _ultima_limpieza and ahora - _ultima_limpieza < INTERVALO_LIMPIEZA:
+        return
+    _ultima_limpieza = ahora
+    try:
+        limpiar()
+    except Exception:
+        # La limpieza nunca impide encolar; se reintenta en el próximo intervalo
+        db.session.rollback()
+        current_app.logger.exception('No se pudo limpiar la tabla de trabajos')
+
+
+def init_app(app):
+    """Registrar el comando flask limpiar-trabajos"""
+
+    @app.cli.command('limpiar-trabajos')
+    def limpiar_trabajos():
+        """Marcar trabajos colgados como error y borrar los vencidos con sus archivos"""
+        resultado = limpiar(app)
+        print(f"Trabajos dados por perdidos: {resultado['abandonados']}, "
+              f"eliminados: {resultado['eliminados']}, archivos borrados: {resultado['archivos']}")
@@ -1,7 +1,7 @@
 from flask import render_template
 
-def list(compras):
-    return render_template('compras/index.html', compras=compras)
+def list(pagina, conteo):
+    return render_template('compras/index.html', compras=pagina.items, pagina=pagina, conteo=conteo)
 
 def create(proveedores, productos):
     return render_template('compras/create.html', proveedores=proveedores, productos=productos)
@@ -11,3 +11,6 @@ def edit(compra, proveedores, productos):
 
 def pendientes(compras_pendientes):
     return render_template('compras/pendientes.html', compras_pendientes=compras_pendientes)
+
+def resultado_lote(accion, resultados):
+    return render_template('compras/resultado_lote.html', accion=accion, resultados=resultados)
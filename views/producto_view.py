@@ -1,10 +1,25 @@
 from flask import render_template
+from utils.paginacion import POR_PAGINA_DEFECTO
 
-def list(productos):
-    return render_template('productos/index.html', productos=productos)
+def list(catalogo, categoria=None):
+    return render_template('productos/index.html', catalogo=catalogo, categoria=categoria)
+
+def catalogo_grid(pagina, categoria=None):
+    # Los enlaces de paginación solo llevan por_pagina: la grilla se guarda en
+    # caché y no debe repetir otros argumentos de la URL que la generó
+    parametros = {} if pagina.por_pagina == POR_PAGINA_DEFECTO else {'por_pagina': pagina.por_pagina}
+    return render_template('partials/catalogo_grid.html', productos=pagina.items, pagina=pagina,
+                           categoria=categoria, parametros_paginacion=parametros)
 
 def create():
     return render_template('productos/create.html')
 
 def edit(producto):
     return render_template('productos/edit.html', producto=producto)
+
+def buscar(texto, productos, facetas, filtros):
+    return render_template('productos/buscar.html', texto=texto, productos=productos,
+                           facetas=facetas, filtros=filtros)
+
+def importar(resultado=None):
+    return render_template('productos/importar.html', resultado=resultado)
@@ -0,0 +1,4 @@
+from flask import render_template
+
+def estado(trabajo):
+    return render_template('trabajos/estado.html', trabajo=trabajo)
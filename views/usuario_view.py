@@ -1,7 +1,7 @@
 from flask import render_template
 
-def list(usuarios):
-    return render_template('usuarios/index.html', usuarios=usuarios)
+def list(pagina):
+    return render_template('usuarios/index.html', usuarios=pagina.items, pagina=pagina)
 
 def create():
     return render_template('usuarios/create.html')
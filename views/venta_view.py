@@ -1,22 +1,25 @@
 from flask import render_template
 from models.venta_model import Venta
 
-def list(ventas):
-    total_ventas = Venta.get_total_ventas()
-    ventas_directas_count = len([v for v in ventas if v.tipo_venta == 'directa'])
-    ventas_compras_count = len([v for v in ventas if v.tipo_venta == 'por_compra'])
+def list(pagina, tipo_venta=None):
+    stats = Venta.stats()
+    total_ventas = stats['ingresos']
+    ventas_directas_count = stats['directa']['cantidad']
+    ventas_compras_count = stats['por_compra']['cantidad']
     
     return render_template('ventas/index.html', 
-                         ventas=ventas, 
+                         ventas=pagina.items, 
+                         pagina=pagina,
+                         tipo_venta=tipo_venta,
                          total_ventas=total_ventas,
                          ventas_directas_count=ventas_directas_count,
                          ventas_compras_count=ventas_compras_count)
 
-def list_directas(ventas):
-    return render_template('ventas/directas.html', ventas=ventas)
+def list_directas(pagina):
+    return list(pagina, tipo_venta='directa')
 
-def list_por_compras(ventas):
-    return render_template('ventas/por_compras.html', ventas=ventas)
+def list_por_compras(pagina):
+    return list(pagina, tipo_venta='por_compra')
 
 def create(productos):
     return render_template('ventas/create.html', productos=productos)